@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+離線效能測試
+Off-device benchmarks for the pinball hardware paths, run on the simulated GPIO
+backend and SDL's dummy drivers so they work on any workstation.
+
+    python bench.py                       # run every benchmark
+    python bench.py tm1637 leds           # run selected benchmarks
+    python bench.py --save base.json      # store the results
+    python bench.py --compare base.json   # fail if anything got slower than the stored run
+    python bench.py startup               # cold start: time from launch to the first frame
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Must be set before the game modules import GPIO / pygame
+os.environ.setdefault('PINBALL_GPIO', 'sim')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ['PINBALL_SCORES'] = '' # Keep benchmark games out of the score store
+
+from gpio_backend import GPIO, SIMULATED
+
+
+def _quiet():
+    """Silences the game's print() output while a benchmark runs."""
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+_game = None
+
+
+def _get_game():
+    # One headless game instance shared by the benchmarks that need it
+    global _game
+    if _game is None:
+        from pinball_game import PinballGame
+        with _quiet():
+            _game = PinballGame()
+            _game.sounds.ready.result(5) # The background loader prints as it goes
+        _game.animator.cancel(wait=True) # The attract-mode show would write LED pins during the benchmarks
+    return _game
+
+
+def bench_tm1637(iterations=300):
+    """Countdown on the TM1637 driver, as update_game_timer does during a game."""
+    import bus_timing
+    from pinball_game import TM1637
+    GPIO.setmode(GPIO.BOARD)
+    display = TM1637(33, 35)
+    transitions_before = display.transmitter.transitions
+    # Measure how closely the bit delays match the requested half period
+    bus_timing.stats.reset()
+    bus_timing.stats.enabled = True
+    t0 = time.perf_counter_ns()
+    try:
+        for value in range(iterations, 0, -1):
+            display.display_number(value)
+        elapsed = time.perf_counter_ns() - t0
+    finally:
+        bus_timing.stats.enabled = False
+    delays = bus_timing.stats.summary()
+    return {
+        'us_per_update': elapsed / iterations / 1000.0,
+        'transitions_per_update': (display.transmitter.transitions - transitions_before) / iterations,
+        'delay_requested_ns': delays['avg_requested_ns'],
+        'delay_actual_ns': delays['avg_actual_ns'],
+        'delay_max_overshoot_ns': delays['max_overshoot_ns'],
+    }
+
+
+class _SpiBus:
+    """Stands in for spidev.SpiDev: keeps the bytes written so the benchmark can count them."""
+
+    def __init__(self):
+        self.bytes_written = 0
+
+    def writebytes(self, data):
+        self.bytes_written += len(data)
+
+    def close(self):
+        pass
+
+
+def bench_max7219(iterations=3000):
+    """Countdown on the MAX7219 driver; wire time is the SPI bytes at the driver's clock rate."""
+    from max7219 import MAX7219
+    spi = _SpiBus()
+    display = MAX7219(spi=spi, digits=4)
+    bytes_before = spi.bytes_written
+    t0 = time.perf_counter_ns()
+    for value in range(iterations, 0, -1):
+        display.display_number(value)
+    elapsed = time.perf_counter_ns() - t0
+    bytes_per_update = (spi.bytes_written - bytes_before) / iterations
+    return {
+        'us_per_update': elapsed / iterations / 1000.0,
+        'spi_bytes_per_update': bytes_per_update,
+        'wire_us_per_update': bytes_per_update * 8 * 1000000.0 / display.speed_hz,
+    }
+
+
+def bench_leds(iterations=2000):
+    """PinballGame.update_leds with one LED changing per call."""
+    game = _get_game()
+    outputs_before = GPIO.stats['outputs'] if SIMULATED else 0
+    hw_writes_before = game.leds.hw_writes
+    t0 = time.perf_counter_ns()
+    for i in range(iterations):
+        game.leds.toggle(i % 8)
+        game.update_leds()
+    elapsed = time.perf_counter_ns() - t0
+    result = {
+        'us_per_call': elapsed / iterations / 1000.0,
+        'gpio_calls_per_call': (game.leds.hw_writes - hw_writes_before) / iterations,
+    }
+    if SIMULATED:
+        result['pin_writes_per_call'] = (GPIO.stats['outputs'] - outputs_before) / iterations
+    return result
+
+
+def bench_switch_to_led(iterations=200):
+    """Switch edge -> GPIO callback -> event queue -> game logic -> LED pin, in Game 3."""
+    if not SIMULATED:
+        return {}
+    game = _get_game()
+    with _quiet():
+        game.current_game = 3
+        game.start_game3()
+    total_ns = 0
+    led_changes = 0
+    for i in range(iterations):
+        pin = game.switch_pins[i % 8]
+        start_virtual = GPIO.clock.advance(1) # Past anything earlier benchmarks wrote at this time
+        with _quiet():
+            t0 = time.perf_counter_ns()
+            GPIO.inject(pin, GPIO.LOW) # Switch pressed
+            game.process_gpio_events()
+            total_ns += time.perf_counter_ns() - t0
+        led_changes += len(GPIO.transitions_since(start_virtual, game.led_pins[i % 8]))
+        GPIO.inject(pin, GPIO.HIGH) # Released
+        GPIO.clock.advance(200000000) # Next press after the debounce window
+    return {
+        'us_per_hit': total_ns / iterations / 1000.0,
+        'led_changes_per_hit': led_changes / iterations,
+    }
+
+
+def bench_render(frames=600):
+    """Game 1 countdown frames: render_frame + display update, and pixels pushed per frame."""
+    import pygame
+    game = _get_game()
+    with _quiet():
+        game.current_game = 1
+        game.start_game1()
+    game.render_frame() # First frame of the screen is a full redraw
+    pixels = 0
+    t0 = time.perf_counter_ns()
+    for _ in range(frames):
+        game.game_time += 1.0 / 60
+        rects = game.render_frame()
+        if rects:
+            pygame.display.update(rects)
+            pixels += sum(rect.width * rect.height for rect in rects)
+    elapsed = time.perf_counter_ns() - t0
+    return {
+        'us_per_frame': elapsed / frames / 1000.0,
+        'pixels_per_frame': pixels / frames,
+    }
+
+
+# Run in a fresh interpreter by bench_startup: starts the game, lets it draw one frame
+# and quit, then prints the startup timings as JSON on the last line
+_STARTUP_SCRIPT = """
+import contextlib, io, json, time
+with contextlib.redirect_stdout(io.StringIO()):
+    import pygame
+    from pinball_game import PinballGame
+    t_init = time.perf_counter()
+    game = PinballGame()
+    pygame.event.post(pygame.event.Event(pygame.QUIT)) # Quit after the first frame
+    game.run()
+startup = game.startup
+print(json.dumps({
+    'first_frame_wall': time.time() - (time.perf_counter() - startup.t0) + startup.first_frame_ms / 1000.0,
+    'init_to_first_frame_ms': startup.first_frame_ms + (startup.t0 - t_init) * 1000.0,
+}))
+"""
+
+
+def bench_startup(runs=5):
+    """Cold start: new process -> imports -> PinballGame() -> first frame presented."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    launch_to_frame = []
+    init_to_frame = []
+    for _ in range(runs):
+        t_launch = time.time()
+        output = subprocess.run([sys.executable, '-c', _STARTUP_SCRIPT], cwd=here, env=os.environ,
+                                capture_output=True, text=True, check=True).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+        launch_to_frame.append((timings['first_frame_wall'] - t_launch) * 1000.0)
+        init_to_frame.append(timings['init_to_first_frame_ms'])
+    return {
+        'ms_to_first_frame': sorted(launch_to_frame)[runs // 2],
+        'ms_init_to_first_frame': sorted(init_to_frame)[runs // 2],
+    }
+
+
+BENCHMARKS = {
+    'tm1637': bench_tm1637,
+    'max7219': bench_max7219,
+    'leds': bench_leds,
+    'switch_to_led': bench_switch_to_led,
+    'render': bench_render,
+    'startup': bench_startup,
+}
+
+# Metrics where a larger value is a regression
+TIMING_METRICS = ('us_per_update', 'us_per_call', 'us_per_hit', 'us_per_frame',
+                  'ms_to_first_frame', 'ms_init_to_first_frame')
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regressions (timing metrics more than tolerance slower than baseline)."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if metric in TIMING_METRICS and base and value > base * (1.0 + tolerance):
+                regressions.append(f"{name}.{metric}: {value:.2f} vs baseline {base:.2f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Off-device pinball benchmarks")
+    parser.add_argument('benchmarks', nargs='*', help=f"benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--save', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="compare against a JSON file written by --save")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown for --compare (default 0.2 = 20%%)")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in args.benchmarks or list(BENCHMARKS):
+        results[name] = BENCHMARKS[name]()
+        metrics = ", ".join(f"{k}={v:.2f}" for k, v in results[name].items())
+        print(f"{name:15s} {metrics}")
+
+    if _game is not None:
+        with _quiet():
+            _game.cleanup()
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+位元敲擊（bit-bang）匯流排的延遲工具
+Calibrated short delays for the bit-banged display buses.
+
+time.sleep() on Linux rounds even a 1 µs request up to tens of microseconds, so
+short bus delays busy-wait on perf_counter_ns instead, and only long delays sleep.
+"""
+
+import time
+
+# Delays shorter than this busy-wait; longer ones sleep for most of the time
+SPIN_THRESHOLD_NS = 10000
+# How much of a long delay is left to spin after sleeping (covers sleep wake-up jitter)
+SLEEP_MARGIN_NS = 80000
+
+_perf_counter_ns = time.perf_counter_ns
+_overhead_ns = 0 # Cost of one perf_counter_ns() call, measured by calibrate()
+_calibrated = False
+
+
+class DelayStats:
+    """Per-call delay statistics (requested vs. actual time), collected only when enabled."""
+
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.requested_ns = 0
+        self.actual_ns = 0
+        self.max_overshoot_ns = 0
+
+    def record(self, requested_ns, actual_ns):
+        self.calls += 1
+        self.requested_ns += requested_ns
+        self.actual_ns += actual_ns
+        overshoot = actual_ns - requested_ns
+        if overshoot > self.max_overshoot_ns:
+            self.max_overshoot_ns = overshoot
+
+    def summary(self):
+        """Returns the statistics as a dict (averages in nanoseconds)."""
+        calls = self.calls or 1
+        return {
+            'calls': self.calls,
+            'avg_requested_ns': self.requested_ns / calls,
+            'avg_actual_ns': self.actual_ns / calls,
+            'max_overshoot_ns': self.max_overshoot_ns,
+            'timer_overhead_ns': _overhead_ns,
+        }
+
+
+stats = DelayStats()
+
+
+def calibrate(samples=2000):
+    """Measures the overhead of perf_counter_ns() so busy-waits can compensate for it."""
+    global _overhead_ns, _calibrated
+    clock = _perf_counter_ns
+    best = None
+    for _ in range(samples):
+        t0 = clock()
+        t1 = clock()
+        if best is None or t1 - t0 < best:
+            best = t1 - t0
+    _overhead_ns = best or 0
+    _calibrated = True
+    return _overhead_ns
+
+
+def is_calibrated():
+    return _calibrated
+
+
+def timer_overhead_ns():
+    return _overhead_ns
+
+
+def delay_ns(ns):
+    """Waits at least ns nanoseconds: busy-waits for short delays, sleeps for long ones."""
+    clock = _perf_counter_ns
+    start = clock()
+    deadline = start + ns - _overhead_ns
+    if ns >= SPIN_THRESHOLD_NS:
+        sleep_ns = ns - SLEEP_MARGIN_NS
+        if sleep_ns > 0:
+            time.sleep(sleep_ns / 1e9)
+    while clock() < deadline:
+        pass
+    if stats.enabled:
+        stats.record(ns, clock() - start)
+
+
+def delay_us(us):
+    """Waits at least us microseconds (see delay_ns)."""
+    delay_ns(int(us * 1000))
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多台機台事件匯流
+Streams game events from every cabinet to one aggregator over a Unix-domain or
+localhost TCP socket, for live per-table and global leaderboards.
+
+    PINBALL_FEED=/tmp/pinball.sock PINBALL_TABLE=2 python pinball_game.py   # each cabinet
+    python cabinet_feed.py /tmp/pinball.sock                               # the aggregator
+
+Addresses are a socket path, or host:port for TCP. Records are 16 bytes, little
+endian: kind u8, arg u8, table u16, value i32, t_us i64 (wall clock when the
+event happened, so the aggregator can measure how late it sees it).
+
+The publisher never blocks the game: publish() appends to a bounded buffer
+(the oldest records are dropped when it is full) and a sender thread writes
+whatever has accumulated in one send, reconnecting in the background while the
+aggregator is away.
+"""
+
+import argparse
+import collections
+import os
+import selectors
+import socket
+import struct
+import threading
+import time
+
+RECORD = struct.Struct('<BBHiq')
+MAX_TABLE = 0xFFFF # Table ids are u16 in the record
+
+# Record kinds
+HIT = 0 # arg = switch index, value = score (Game 2: points) after the hit
+GAME_START = 1 # arg = game
+GAME_OVER = 2 # arg = game, value = final score/points
+GAME_LEFT = 3 # arg = game, value = score/points of a game abandoned before its end
+
+KIND_NAMES = {HIT: 'hit', GAME_START: 'game_start', GAME_OVER: 'game_over', GAME_LEFT: 'game_left'}
+
+
+def parse_address(address):
+    """'host:port' -> (AF_INET, (host, port)); anything else is a Unix socket path."""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    return socket.AF_UNIX, address
+
+
+def _now_us():
+    return time.time_ns() // 1000
+
+
+class FeedPublisher:
+    def __init__(self, address, table, capacity=1024, batch_records=256, retry_s=1.0, send_timeout_s=0.5):
+        if not 0 <= table <= MAX_TABLE:
+            # Caught here rather than as a struct.error from the first publish() mid-game
+            raise ValueError(f"Table id must be from 0 to {MAX_TABLE}, not {table}")
+        self.family, self.address = parse_address(address)
+        self.table = table
+        self.capacity = capacity
+        self.batch_records = batch_records # Most records per send
+        self.retry_s = retry_s # Wait between connection attempts
+        self.send_timeout_s = send_timeout_s # A stalled aggregator only stalls the sender thread
+
+        self._buffer = collections.deque(maxlen=capacity) # Packed records; full -> oldest dropped
+        self._wake = threading.Event()
+        self._idle = False # Sender waiting for records: only then does publish() need to wake it
+        self._sock = None
+
+        # Counters
+        self.published = 0
+        self.sent = 0
+        self.sends = 0
+        self.dropped_full = 0 # Overwritten in a full buffer (game thread only)
+        self.dropped_send = 0 # Lost in a failed send (sender thread only)
+        self.reconnects = 0
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="cabinet-feed", daemon=True)
+        self._thread.start()
+
+    def publish(self, kind, arg=0, value=0):
+        """Queues one record for the aggregator (never blocks)."""
+        buffer = self._buffer
+        if len(buffer) == self.capacity:
+            self.dropped_full += 1
+        buffer.append(RECORD.pack(kind, arg, self.table, value, _now_us()))
+        self.published += 1
+        if self._idle:
+            self._wake.set()
+
+    def _connect(self):
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.send_timeout_s)
+        try:
+            sock.connect(self.address)
+        except OSError:
+            sock.close()
+            return False
+        if self.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # Batching is done here
+        self._sock = sock
+        self.reconnects += 1
+        return True
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _run(self):
+        buffer = self._buffer
+        while self._running:
+            self._idle = True # Set before looking at the buffer, so no record is missed
+            if not buffer:
+                self._wake.wait()
+            self._wake.clear()
+            self._idle = False
+            while buffer and self._running:
+                if self._sock is None and not self._connect():
+                    # Aggregator away: keep the newest records and retry later
+                    time.sleep(self.retry_s)
+                    continue
+                batch = []
+                while buffer and len(batch) < self.batch_records:
+                    batch.append(buffer.popleft())
+                try:
+                    self._sock.sendall(b''.join(batch))
+                except OSError:
+                    self.dropped_send += len(batch) # Partly sent, so the whole batch counts as lost
+                    self._disconnect()
+                    continue
+                self.sent += len(batch)
+                self.sends += 1
+
+    @property
+    def dropped(self):
+        """Records lost either way."""
+        return self.dropped_full + self.dropped_send
+
+    def stats(self):
+        return {
+            'published': self.published,
+            'sent': self.sent,
+            'sends': self.sends,
+            'dropped': self.dropped,
+            'dropped_full': self.dropped_full,
+            'dropped_send': self.dropped_send,
+            'queued': len(self._buffer),
+            'connected': self._sock is not None,
+        }
+
+    def close(self, timeout=1.0):
+        """Sends what is still buffered (if connected) and stops the sender thread."""
+        self._wake.set()
+        deadline = time.monotonic() + timeout
+        while self._buffer and self._sock is not None and time.monotonic() < deadline:
+            time.sleep(0.005)
+        self._running = False
+        self._wake.set()
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        self._disconnect()
+
+
+class TableState:
+    __slots__ = ('game', 'value', 'hits', 'games', 'best', 'last_seen_us')
+
+    def __init__(self):
+        self.game = 0
+        self.value = 0
+        self.hits = 0
+        self.games = 0
+        self.best = {} # Game -> [value], best first
+        self.last_seen_us = 0
+
+
+def _insert_top(top, entry, top_n):
+    top.append(entry)
+    top.sort(reverse=True)
+    del top[top_n:]
+
+
+class FeedAggregator:
+    """Merges the record streams of many cabinets; run() or poll() on one thread."""
+
+    def __init__(self, address, top_n=10):
+        self.family, self.address = parse_address(address)
+        self.top_n = top_n
+        self.tables = {} # Table id -> TableState
+        self.leaderboard = {} # Game -> [(value, table)], best first, all tables
+
+        self._listener = socket.socket(self.family, socket.SOCK_STREAM)
+        if self.family == socket.AF_UNIX:
+            try:
+                os.unlink(self.address) # Stale socket from a previous run
+            except FileNotFoundError:
+                pass
+        else:
+            self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(self.address)
+        self._listener.listen()
+        self._listener.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ)
+        self._pending = {} # Connection -> bytes of an incomplete record
+
+        # Counters
+        self.records = 0
+        self.connections = 0
+        self.latency_max_us = 0
+        self._latency_total_us = 0
+
+    def poll(self, timeout=None):
+        """Accepts connections and handles every record that has arrived; waits up to timeout."""
+        for key, _ in self._selector.select(timeout):
+            sock = key.fileobj
+            if sock is self._listener:
+                conn, _ = sock.accept()
+                conn.setblocking(False)
+                self._selector.register(conn, selectors.EVENT_READ)
+                self._pending[conn] = b''
+                self.connections += 1
+                continue
+            try:
+                data = sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                continue
+            except OSError:
+                data = b''
+            if not data:
+                self._selector.unregister(sock)
+                del self._pending[sock]
+                sock.close()
+                continue
+            data = self._pending[sock] + data
+            size = RECORD.size
+            end = len(data) - len(data) % size
+            for record in RECORD.iter_unpack(data[:end]):
+                self.handle(*record)
+            self._pending[sock] = data[end:]
+
+    def handle(self, kind, arg, table, value, t_us):
+        state = self.tables.get(table)
+        if state is None:
+            state = self.tables[table] = TableState()
+        now_us = _now_us()
+        latency = now_us - t_us
+        self._latency_total_us += latency
+        if latency > self.latency_max_us:
+            self.latency_max_us = latency
+        self.records += 1
+        state.last_seen_us = now_us
+
+        if kind == HIT:
+            state.hits += 1
+            state.value = value
+        elif kind == GAME_START:
+            state.game = arg
+            state.value = 0
+        elif kind == GAME_OVER or kind == GAME_LEFT:
+            state.games += 1
+            state.value = value
+            _insert_top(state.best.setdefault(arg, []), value, self.top_n)
+            _insert_top(self.leaderboard.setdefault(arg, []), (value, table), self.top_n)
+
+    def stats(self):
+        return {
+            'tables': len(self.tables),
+            'connections': self.connections,
+            'records': self.records,
+            'latency_mean_us': self._latency_total_us / self.records if self.records else 0.0,
+            'latency_max_us': self.latency_max_us,
+        }
+
+    def report(self):
+        lines = []
+        for game in sorted(self.leaderboard):
+            board = ', '.join(f"{value} (table {table})" for value, table in self.leaderboard[game])
+            lines.append(f"Game {game}: {board}")
+        for table in sorted(self.tables):
+            state = self.tables[table]
+            best = {game: top[0] for game, top in sorted(state.best.items())}
+            lines.append(f"Table {table}: game {state.game}, value {state.value}, "
+                         f"{state.hits} hits, {state.games} games, best {best}")
+        lines.append(f"Feed: {self.stats()}")
+        return '\n'.join(lines)
+
+    def run(self, report_every_s=None):
+        next_report = time.monotonic() + report_every_s if report_every_s else None
+        while True:
+            self.poll(timeout=report_every_s)
+            if next_report is not None and time.monotonic() >= next_report:
+                print(self.report())
+                next_report = time.monotonic() + report_every_s
+
+    def close(self):
+        for conn in list(self._pending):
+            conn.close()
+        self._pending.clear()
+        self._selector.close()
+        self._listener.close()
+        if self.family == socket.AF_UNIX:
+            try:
+                os.unlink(self.address)
+            except FileNotFoundError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge the event feeds of several cabinets into live leaderboards")
+    parser.add_argument('address', help="socket path or host:port to listen on")
+    parser.add_argument('--top', type=int, default=10, help="leaderboard length (default 10)")
+    parser.add_argument('--report-every', type=float, default=5.0, help="seconds between reports (default 5)")
+    args = parser.parse_args()
+    aggregator = FeedAggregator(args.address, top_n=args.top)
+    try:
+        aggregator.run(report_every_s=args.report_every)
+    except KeyboardInterrupt:
+        print(aggregator.report())
+    finally:
+        aggregator.close()
+
+
+if __name__ == "__main__":
+    main()
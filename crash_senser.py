@@ -1,4 +1,4 @@
-import RPi.GPIO as GPIO
+from gpio_backend import GPIO
 import time
 
 INPUT_PIN = 3
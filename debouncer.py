@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+開關去彈跳
+Software debouncing of the microswitches from raw edge timestamps (both edges,
+no GPIO bouncetime), one small state machine per switch:
+
+  - A press (closing edge) is accepted when the switch has opened since the last
+    accepted press, and has stayed open for at least release_ns.
+  - A closing edge in the hold_ns after an accepted press is contact bounce.
+  - A closing edge sooner than release_ns after the switch opened is release bounce.
+
+A genuine re-hit therefore only needs the switch to close, open and stay open for a
+few milliseconds, instead of the fixed 150 ms of GPIO bouncetime. Only openings that
+reverted (closed again) inside a window count as bounce: a short press that opens
+within hold_ns and stays open is a press, not a bounce. Bounce is measured per
+switch, and every tune_every accepted presses that switch's windows are re-fitted
+to the bounce it actually shows (see tune).
+
+RPi.GPIO callbacks only get the channel, and reading the pin on the callback thread
+can already see a later level, so the direction of an edge is not read: every edge
+flips the line, and edge() toggles the level it tracks. Should the kernel merge two
+edges into one event, the game loop notices the tracked level disagreeing with the
+settled line (check) and the next edge starts from the right level.
+"""
+
+NEVER = -(1 << 62) # Timestamp for "no such edge yet"
+
+
+class SwitchState:
+    """Debounce state and statistics of one switch."""
+
+    __slots__ = ('hold_ns', 'release_ns', 'closed', 'edges', 'edge_at', 'pressed_at', 'opened_at',
+                 'accepted', 'bounces', 'hold_bounce_ns', 'release_bounce_ns', 'short_gaps',
+                 'since_tune', 'resync', 'mismatch', 'resyncs')
+
+    def __init__(self, hold_ns, release_ns):
+        self.hold_ns = hold_ns
+        self.release_ns = release_ns
+        # Written by edge() only (GPIO callback thread)
+        self.closed = False # Tracked line level (pull-up: idle open)
+        self.edges = 0
+        self.edge_at = NEVER # Time of the last edge either way
+        self.pressed_at = NEVER # Time of the last accepted press
+        self.opened_at = NEVER + 1 # Time of the last opening edge
+        self.accepted = 0
+        self.bounces = 0 # Openings that reverted inside a window
+        # Longest bounce seen since the last tune: after a press, and after the switch opened
+        self.hold_bounce_ns = 0
+        self.release_bounce_ns = 0
+        # Accepted presses that came barely after the release window: maybe undetected bounce
+        self.short_gaps = 0
+        self.since_tune = 0
+        # Written by check() only (game loop): (edges, settled level) when the tracked
+        # level was found wrong, applied by the next edge if no edge came in between
+        self.resync = None
+        self.mismatch = -1 # Edge count at the first disagreeing check
+        self.resyncs = 0
+
+
+class SwitchDebouncer:
+    def __init__(self, num_switches, hold_ms=10.0, release_ms=8.0, auto_tune=True,
+                 tune_every=32, min_ms=2.0, max_ms=60.0, margin=1.5):
+        self.switches = [SwitchState(int(hold_ms * 1000000), int(release_ms * 1000000))
+                         for _ in range(num_switches)]
+        self.auto_tune = auto_tune
+        self.tune_every = tune_every
+        # Tuned windows stay within [min_ms, max_ms], at margin times the longest bounce seen
+        self.min_ns = int(min_ms * 1000000)
+        self.max_ns = int(max_ms * 1000000)
+        self.margin = margin
+
+    def edge(self, switch_index, t_ns):
+        """
+        Feeds one raw edge (either direction) of a switch. Returns True if it is the
+        closing edge of a genuine press.
+        """
+        s = self.switches[switch_index]
+        resync = s.resync
+        if resync is not None and resync[0] == s.edges and resync[1] != s.closed:
+            # An edge was missed: the line settled at the other level after edge_at
+            s.closed = resync[1]
+            if not s.closed:
+                s.opened_at = s.edge_at
+        closed = s.closed = not s.closed
+        s.edges += 1
+        s.edge_at = t_ns
+        if not closed:
+            # Whether this opening was bounce depends on what follows it
+            s.opened_at = t_ns
+            return False
+
+        since_press = t_ns - s.pressed_at
+        if since_press < s.hold_ns:
+            # Closed again inside the hold window: the opening before it was bounce
+            s.bounces += 1
+            if since_press > s.hold_bounce_ns:
+                s.hold_bounce_ns = since_press
+            return False
+        since_open = t_ns - s.opened_at
+        if since_open < s.release_ns:
+            # Closed again too soon after opening: release bounce
+            s.bounces += 1
+            if since_open > s.release_bounce_ns:
+                s.release_bounce_ns = since_open
+            return False
+
+        if since_open < 2 * s.release_ns:
+            s.short_gaps += 1
+        s.pressed_at = t_ns
+        s.accepted += 1
+        s.since_tune += 1
+        if self.auto_tune and s.since_tune >= self.tune_every:
+            self.tune(switch_index)
+        return True
+
+    def check(self, switch_index, closed, t_ns):
+        """
+        Game loop: compares the tracked level of a switch with the line read now
+        (closed is True while pressed). Only a switch that has been quiet for both
+        windows is compared, and only a disagreement seen twice with no edge in
+        between (so not an edge whose callback is still on its way) is corrected.
+        Returns True when a correction was posted.
+        """
+        s = self.switches[switch_index]
+        edges = s.edges
+        if closed == s.closed or t_ns - s.edge_at < s.hold_ns + s.release_ns:
+            s.mismatch = -1
+            return False
+        if s.mismatch != edges:
+            s.mismatch = edges
+            return False
+        if s.resync is not None and s.resync[0] == edges:
+            return False # Already posted
+        s.resync = (edges, closed)
+        s.resyncs += 1
+        return True
+
+    def _fit(self, window, bounce, suspicious):
+        if bounce:
+            target = int(bounce * self.margin)
+        else:
+            target = window * 3 // 4 # No bounce seen near the edge of the window: shrink slowly
+        if suspicious:
+            target = max(target, window * 3 // 2) # Possible bounce slipping through: widen
+        return min(max(target, self.min_ns), self.max_ns)
+
+    def tune(self, switch_index):
+        """Re-fits the hold/release windows of one switch to the bounce measured since the last tune."""
+        s = self.switches[switch_index]
+        # More than a quarter of the presses right after the release window is suspicious
+        suspicious = s.short_gaps * 4 > s.since_tune
+        s.hold_ns = self._fit(s.hold_ns, s.hold_bounce_ns, False)
+        s.release_ns = self._fit(s.release_ns, s.release_bounce_ns, suspicious)
+        s.hold_bounce_ns = s.release_bounce_ns = 0
+        s.short_gaps = 0
+        s.since_tune = 0
+
+    def stats(self):
+        """Per switch: accepted presses, bounces, level corrections and the current windows (ms)."""
+        return [{
+            'accepted': s.accepted,
+            'bounces': s.bounces,
+            'resyncs': s.resyncs,
+            'hold_ms': s.hold_ns / 1000000.0,
+            'release_ms': s.release_ns / 1000000.0,
+        } for s in self.switches]
+
+    @property
+    def bounces(self):
+        return sum(s.bounces for s in self.switches)
@@ -1,5 +1,6 @@
-import RPi.GPIO as GPIO
+from gpio_backend import GPIO
 import time
+from bus_timing import calibrate, delay_us
 
 # 設定 GPIO 腳位
 CLK = 3
@@ -9,6 +10,10 @@ GPIO.setmode(GPIO.BOARD)
 GPIO.setup(CLK, GPIO.OUT)
 GPIO.setup(DIO, GPIO.OUT)
 
+# 匯流排延遲（微秒），以忙等待實現，避免 time.sleep 的數十微秒誤差
+BIT_DELAY_US = 2
+calibrate()
+
 # 七段顯示對應的位元資料（共陰極）
 SEGMENTS = {
     0: 0x3f,
@@ -27,13 +32,13 @@ SEGMENTS = {
 def start():
     GPIO.output(CLK, GPIO.HIGH)
     GPIO.output(DIO, GPIO.HIGH)
-    time.sleep(0.001)
+    delay_us(BIT_DELAY_US)
     GPIO.output(DIO, GPIO.LOW)
 
 def stop():
     GPIO.output(CLK, GPIO.LOW)
     GPIO.output(DIO, GPIO.LOW)
-    time.sleep(0.001)
+    delay_us(BIT_DELAY_US)
     GPIO.output(CLK, GPIO.HIGH)
     GPIO.output(DIO, GPIO.HIGH)
 
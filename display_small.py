@@ -1,5 +1,6 @@
-import RPi.GPIO as GPIO
+from gpio_backend import GPIO
 import time
+from bus_timing import calibrate, delay_us
 
 
 CLK = 33
@@ -9,6 +10,10 @@ GPIO.setmode(GPIO.BOARD)
 GPIO.setup(CLK, GPIO.OUT)
 GPIO.setup(DIO, GPIO.OUT)
 
+# Bus delay in microseconds (busy-wait; time.sleep overshoots by tens of microseconds)
+BIT_DELAY_US = 2
+calibrate()
+
 SEGMENTS = {
     0: 0x3f,
     1: 0x06,
@@ -26,13 +31,13 @@ SEGMENTS = {
 def start():
     GPIO.output(CLK, GPIO.HIGH)
     GPIO.output(DIO, GPIO.HIGH)
-    time.sleep(0.001)
+    delay_us(BIT_DELAY_US)
     GPIO.output(DIO, GPIO.LOW)
 
 def stop():
     GPIO.output(CLK, GPIO.LOW)
     GPIO.output(DIO, GPIO.LOW)
-    time.sleep(0.001)
+    delay_us(BIT_DELAY_US)
     GPIO.output(CLK, GPIO.HIGH)
     GPIO.output(DIO, GPIO.HIGH)
 
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+7段顯示器背景更新執行緒
+Runs a 7-segment display driver on its own thread so the game loop never bit-bangs.
+"""
+
+import threading
+import time
+
+
+class DisplayWorker:
+    """
+    Owns a display driver (anything with display_number) on a background thread.
+
+    Callers post a value through display_number() and return immediately. Only the
+    latest posted value is kept (a one-slot mailbox), so values posted faster than
+    the display refreshes are coalesced, and refreshes are capped at max_rate_hz.
+
+    driver may also be a factory (open_driver=True): it is then called on the worker
+    thread, so a slow driver setup does not hold up the caller. Values posted before
+    it returns are kept in the mailbox as usual.
+    """
+
+    def __init__(self, driver, max_rate_hz=10.0, on_post=None, on_transmit=None, open_driver=False):
+        self.driver = None if open_driver else driver
+        self._open_driver = driver if open_driver else None
+        # Optional hooks: on_post runs on the caller's thread, on_transmit on the worker thread
+        self.on_post = on_post
+        self.on_transmit = on_transmit
+        # Minimum time between two transmissions (0 disables the cap)
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz else 0.0
+
+        # Mailbox: latest value not yet transmitted (None when empty)
+        self._pending = None
+        self._last_sent = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._idle.set()
+
+        # Counters
+        self.posted = 0 # Values handed to display_number()
+        self.coalesced = 0 # Values replaced before being sent, or equal to what is shown
+        self.transmitted = 0 # Values actually written to the driver
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="display-worker", daemon=True)
+        self._thread.start()
+
+    def display_number(self, number):
+        """Posts a number to be shown. Never blocks on the display bus."""
+        if not self._running:
+            return
+        with self._lock:
+            if self._pending is not None:
+                self.coalesced += 1 # Previous value was never shown
+            self._pending = number
+            self.posted += 1
+            self._idle.clear()
+        if self.on_post is not None:
+            self.on_post()
+        self._wake.set()
+
+    def _take_pending(self):
+        with self._lock:
+            number = self._pending
+            self._pending = None
+            return number
+
+    def _run(self):
+        if self._open_driver is not None:
+            try:
+                self.driver = self._open_driver()
+            except Exception as e:
+                print(f"Display setup failed: {e}")
+                self._running = False # Later values are dropped (see display_number)
+                self._idle.set()
+                return
+        last_tx = 0.0
+        while self._running:
+            self._wake.wait()
+            self._wake.clear()
+
+            # Respect the refresh cap; values posted meanwhile replace each other
+            wait = last_tx + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+
+            number = self._take_pending()
+            if number is None:
+                self._idle.set()
+                continue
+            if number == self._last_sent:
+                with self._lock:
+                    self.coalesced += 1
+            else:
+                try:
+                    self.driver.display_number(number)
+                    self._last_sent = number
+                    self.transmitted += 1
+                    if self.on_transmit is not None:
+                        self.on_transmit()
+                except Exception as e:
+                    print(f"Display update failed: {e}")
+                last_tx = time.monotonic()
+
+            with self._lock:
+                if self._pending is None:
+                    self._idle.set()
+
+    def flush(self, timeout=None):
+        """Waits until the most recently posted value has been handled."""
+        return self._idle.wait(timeout)
+
+    def stats(self):
+        """Returns the worker counters as a dict."""
+        return {
+            'posted': self.posted,
+            'coalesced': self.coalesced,
+            'transmitted': self.transmitted,
+        }
+
+    def stop(self, timeout=1.0):
+        """Sends the last pending value (if any) and stops the worker thread."""
+        self.flush(timeout)
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout)
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+賭博遊戲經濟模擬
+Monte Carlo simulator for the Game 2 (Gambling) economy, vectorized with NumPy:
+every array element is one player session, and a whole batch plays a round at
+once. The rules and numbers (starting points, bet step, multipliers and target
+counts) come from GameEngine, so the simulation always matches the game.
+
+    python economy_sim.py                                  # 1M sessions, flat minimum bets, random multiplier
+    python economy_sim.py --multiplier 5 --strategy martingale
+    python economy_sim.py --skill 0.2 --sessions 5000000   # players aim 20% better than chance
+    python economy_sim.py --round-seconds 12 --round-cv 0  # session lengths with fixed 12 s rounds
+
+Session lengths are reported in rounds and in seconds. A round lasts round_seconds
+on average (setting the bet, then the shot), with a gamma-distributed spread of
+round_cv; the time of a whole session is drawn in one go as the sum of its rounds.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from game_engine import GameEngine
+
+STRATEGIES = ('flat', 'fraction', 'martingale', 'all_in')
+
+
+def hit_probability(multiplier, skill=0.0, engine=GameEngine):
+    """
+    Chance that a hit lands on a target LED. Targets are a uniform random set, so a
+    player hitting switches at random wins with targets/LEDs; skill is the share of
+    hits that are aimed (always on a target), the rest are random.
+    """
+    chance = engine.TARGETS[multiplier] / engine.NUM_LEDS
+    return skill + (1.0 - skill) * chance
+
+
+def _next_bet(strategy, points, last_bet, lost, fraction, engine):
+    """Bet of every session for the coming round, with the game's step and limits."""
+    step = engine.BET_STEP
+    if strategy == 'flat':
+        bet = np.full_like(points, engine.MIN_BET)
+    elif strategy == 'fraction':
+        bet = (points * fraction) // step * step
+    elif strategy == 'martingale':
+        # Double after a loss, back to the minimum after a win
+        bet = np.where(lost, last_bet * 2, engine.MIN_BET)
+    else: # all_in
+        bet = points // step * step
+    # bet_up never goes past the points held, and never below the minimum bet
+    return np.maximum(np.minimum(bet, points), engine.MIN_BET)
+
+
+def session_seconds(rounds, round_seconds, round_cv, rng):
+    """
+    Length in seconds of sessions of the given numbers of rounds, each round taking
+    round_seconds on average with a coefficient of variation of round_cv. Round
+    times are gamma distributed, so a session of n rounds is one gamma draw.
+    """
+    if round_cv <= 0.0:
+        return rounds * float(round_seconds)
+    shape = 1.0 / (round_cv * round_cv)
+    seconds = np.zeros(len(rounds))
+    played = rounds > 0
+    seconds[played] = rng.gamma(rounds[played] * shape, round_seconds / shape)
+    return seconds
+
+
+def simulate(sessions=1000000, max_rounds=500, multiplier=None, strategy='flat', skill=0.0,
+             fraction=0.1, goal=None, seed=None, batch=1000000, round_seconds=8.0, round_cv=0.5,
+             engine=GameEngine):
+    """
+    Plays sessions of Game 2 until the player is ruined (cannot cover the minimum bet),
+    reaches goal points (if given) or has played max_rounds. multiplier=None picks one
+    of the game's multipliers at random every round.
+
+    Returns a dict with the final points, rounds played, length in seconds (see
+    session_seconds) and ruin flag of every session (NumPy arrays), plus the total
+    wagered and won.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    rng = np.random.default_rng(seed)
+    multipliers = np.array(engine.MULTIPLIERS)
+    win_chance = np.array([hit_probability(m, skill, engine) for m in engine.MULTIPLIERS])
+
+    final_points = np.empty(sessions, dtype=np.int64)
+    rounds = np.empty(sessions, dtype=np.int32)
+    wagered = 0
+    won = 0
+    for start in range(0, sessions, batch):
+        n = min(batch, sessions - start)
+        points = np.full(n, engine.START_POINTS, dtype=np.int64)
+        played = np.zeros(n, dtype=np.int32)
+        last_bet = np.full(n, engine.MIN_BET, dtype=np.int64)
+        lost = np.zeros(n, dtype=bool)
+        playing = np.arange(n) # Indexes of sessions still going
+
+        for _ in range(max_rounds):
+            p = points[playing]
+            bet = _next_bet(strategy, p, last_bet[playing], lost[playing], fraction, engine)
+            if multiplier is None:
+                choice = rng.integers(0, len(multipliers), size=len(playing))
+            else:
+                choice = np.full(len(playing), engine.MULTIPLIERS.index(multiplier))
+            hit = rng.random(len(playing)) < win_chance[choice]
+            # The bet is taken when the round starts; a target hit pays bet * multiplier
+            payout = np.where(hit, bet * multipliers[choice], 0)
+            p = p - bet + payout
+            points[playing] = p
+            played[playing] += 1
+            last_bet[playing] = bet
+            lost[playing] = ~hit
+            wagered += int(bet.sum())
+            won += int(payout.sum())
+
+            still = p >= engine.MIN_BET
+            if goal is not None:
+                still &= p < goal
+            playing = playing[still]
+            if not len(playing):
+                break
+
+        final_points[start:start + n] = points
+        rounds[start:start + n] = played
+
+    return {
+        'final_points': final_points,
+        'rounds': rounds,
+        'seconds': session_seconds(rounds, round_seconds, round_cv, rng),
+        'ruined': final_points < engine.MIN_BET,
+        'wagered': wagered,
+        'won': won,
+    }
+
+
+def summarize(result, engine=GameEngine):
+    """Expected value, risk of ruin and session length statistics of a simulate() result."""
+    final_points = result['final_points']
+    rounds = result['rounds']
+    wagered = result['wagered']
+    p10, p50, p90, p99 = np.percentile(rounds, [10, 50, 90, 99])
+    seconds = result['seconds']
+    s10, s50, s90, s99 = np.percentile(seconds, [10, 50, 90, 99])
+    return {
+        'sessions': len(final_points),
+        'ev_per_session': float(final_points.mean()) - engine.START_POINTS,
+        'ev_per_point_bet': (result['won'] - wagered) / wagered if wagered else 0.0,
+        'risk_of_ruin': float(result['ruined'].mean()),
+        'mean_final_points': float(final_points.mean()),
+        'rounds_mean': float(rounds.mean()),
+        'rounds_p10': float(p10),
+        'rounds_p50': float(p50),
+        'rounds_p90': float(p90),
+        'rounds_p99': float(p99),
+        'seconds_mean': float(seconds.mean()),
+        'seconds_p10': float(s10),
+        'seconds_p50': float(s50),
+        'seconds_p90': float(s90),
+        'seconds_p99': float(s99),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of the Game 2 economy")
+    parser.add_argument('--sessions', type=int, default=1000000, help="number of player sessions (default 1M)")
+    parser.add_argument('--max-rounds', type=int, default=500, help="rounds after which a player walks away")
+    parser.add_argument('--multiplier', type=int, choices=GameEngine.MULTIPLIERS,
+                        help="multiplier played every round (default: a random one each round)")
+    parser.add_argument('--strategy', choices=STRATEGIES, default='flat', help="betting strategy (default flat)")
+    parser.add_argument('--fraction', type=float, default=0.1, help="share of points bet by the fraction strategy")
+    parser.add_argument('--skill', type=float, default=0.0, help="share of hits aimed at a target (0 = random)")
+    parser.add_argument('--goal', type=int, help="points at which a player cashes out")
+    parser.add_argument('--round-seconds', type=float, default=8.0,
+                        help="mean length of a round, bet setup plus shot (default 8)")
+    parser.add_argument('--round-cv', type=float, default=0.5,
+                        help="spread of round lengths as a coefficient of variation (default 0.5, 0 = fixed)")
+    parser.add_argument('--seed', type=int, help="random seed")
+    args = parser.parse_args(argv)
+    if not 0.0 <= args.skill <= 1.0:
+        parser.error("--skill must be between 0 and 1")
+    if args.round_seconds <= 0.0 or args.round_cv < 0.0:
+        parser.error("--round-seconds must be positive and --round-cv not negative")
+
+    print("Rules from GameEngine: start {} points, bets of {} (min {}), targets {}".format(
+        GameEngine.START_POINTS, GameEngine.BET_STEP, GameEngine.MIN_BET,
+        ", ".join(f"{m}x: {GameEngine.TARGETS[m]}/{GameEngine.NUM_LEDS}" for m in GameEngine.MULTIPLIERS)))
+    for m in GameEngine.MULTIPLIERS:
+        p = hit_probability(m, args.skill)
+        print(f"  {m}x  win chance {p:.3f}, expected return per point bet {p * m - 1:+.3f}")
+
+    t0 = time.perf_counter()
+    result = simulate(args.sessions, args.max_rounds, args.multiplier, args.strategy, args.skill,
+                      args.fraction, args.goal, args.seed, round_seconds=args.round_seconds,
+                      round_cv=args.round_cv)
+    elapsed = time.perf_counter() - t0
+
+    for name, value in summarize(result).items():
+        print(f"{name:18s} {value:.4f}" if isinstance(value, float) else f"{name:18s} {value}")
+    print(f"Simulated {args.sessions} sessions in {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
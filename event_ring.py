@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+開關事件環形緩衝區
+Fixed-capacity ring buffer of (switch index, timestamp) records between the GPIO
+callback thread (the single producer) and the game loop (the single consumer).
+
+No lock is taken: the producer only writes the slots and the write sequence, the
+consumer only writes the read sequence, and each of those is a single attribute
+store under the GIL. With DROP_OLDEST the producer overwrites unread slots; each
+slot carries the sequence number of the event in it, cleared before the slot is
+rewritten and set last, so the consumer can tell an intact slot from one that was
+overwritten (even halfway) while it was reading, and skips it.
+"""
+
+DROP_OLDEST = 'drop_oldest' # Keep the newest events when full
+DROP_NEWEST = 'drop_newest' # Keep the oldest events when full
+
+
+class SwitchEventRing:
+    def __init__(self, capacity=32, overflow=DROP_OLDEST):
+        if overflow not in (DROP_OLDEST, DROP_NEWEST):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        # Round capacity up to a power of two so slots can be found with a mask
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.capacity = size
+        self._mask = size - 1
+        self.overflow = overflow
+
+        # Preallocated slots
+        self._switch = [0] * size
+        self._stamp = [0] * size
+        self._seq = [-1] * size # Sequence number of the event in each slot, -1 while rewriting
+
+        # Monotonic sequence numbers (slot = sequence & mask)
+        self._write = 0 # Written by the producer only
+        self._read = 0 # Written by the consumer only
+
+        # Counters (each written by one side only)
+        self.enqueued = 0
+        self.max_depth = 0
+        self._dropped_newest = 0 # Producer side
+        self._dropped_oldest = 0 # Consumer side
+
+    def push(self, switch_index, t_ns):
+        """Producer: adds one event. Returns False if it was dropped (DROP_NEWEST and full)."""
+        write = self._write
+        depth = write - self._read
+        if depth >= self.capacity:
+            if self.overflow == DROP_NEWEST:
+                self._dropped_newest += 1
+                return False
+            depth = self.capacity - 1 # The oldest unread event is about to be overwritten
+        slot = write & self._mask
+        seq = self._seq
+        seq[slot] = -1 # Invalidate first, so a reader in the middle of this slot notices
+        self._switch[slot] = switch_index
+        self._stamp[slot] = t_ns
+        seq[slot] = write
+        self._write = write + 1 # Publish the slot
+        self.enqueued += 1
+        if depth + 1 > self.max_depth:
+            self.max_depth = depth + 1
+        return True
+
+    def drain(self, handler):
+        """Consumer: calls handler(switch_index, t_ns) for every queued event, oldest first.
+        Only events already queued when drain starts are handled. Returns the number handled."""
+        mask = self._mask
+        switches = self._switch
+        stamps = self._stamp
+        seq = self._seq
+        read = self._read
+        end = self._write
+        handled = 0
+        while read < end:
+            lapped = self._write - self.capacity
+            if read < lapped:
+                # Already overwritten by the producer before we got to them (DROP_OLDEST)
+                self._dropped_oldest += lapped - read
+                read = lapped
+                self._read = read
+                continue
+            slot = read & mask
+            if seq[slot] == read:
+                switch_index = switches[slot]
+                t_ns = stamps[slot]
+                intact = seq[slot] == read # Not rewritten while we read it
+            else:
+                intact = False
+            read += 1
+            self._read = read
+            if intact:
+                handler(switch_index, t_ns)
+                handled += 1
+            else:
+                self._dropped_oldest += 1 # Overwritten by the producer (DROP_OLDEST)
+        return handled
+
+    def __len__(self):
+        return min(self._write - self._read, self.capacity)
+
+    @property
+    def dropped(self):
+        """Total number of events lost to overflow (either policy)."""
+        return self._dropped_newest + self._dropped_oldest
+
+    def stats(self):
+        """Returns the ring counters as a dict."""
+        return {
+            'capacity': self.capacity,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'max_depth': self.max_depth,
+            'depth': len(self),
+        }
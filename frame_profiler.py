@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每幀分段效能分析
+Per-phase frame timing for the game loop: fixed-size histograms per phase, an
+over-budget frame counter, an on-screen overlay and CSV export.
+"""
+
+import csv
+import time
+
+import pygame
+
+
+class Histogram:
+    """Fixed-size linear histogram of durations (bucket_us wide buckets, last bucket is overflow)."""
+
+    def __init__(self, bucket_us=50, buckets=1000):
+        self.bucket_ns = bucket_us * 1000
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, ns):
+        index = ns // self.bucket_ns
+        counts = self.counts
+        if index >= len(counts):
+            index = len(counts) - 1
+        counts[index] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, p):
+        """Returns the upper edge (in ms) of the bucket holding the p-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = self.count * p / 100.0
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return (index + 1) * self.bucket_ns / 1e6
+        return len(self.counts) * self.bucket_ns / 1e6
+
+    def mean_ms(self):
+        return self.total_ns / self.count / 1e6 if self.count else 0.0
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+
+class FrameProfiler:
+    """
+    Times the phases of each frame with perf_counter_ns.
+
+        profiler.begin_frame()
+        ...; profiler.mark('events')   # time since the previous mark goes to 'events'
+        ...; profiler.mark('draw')
+        profiler.end_frame()           # whole frame goes to 'frame', checked against the budget
+    """
+
+    PHASES = ('events', 'gpio', 'timer', 'draw', 'flip')
+    OVERLAY_REFRESH_NS = 500000000
+
+    def __init__(self, phases=PHASES, budget_ms=1000.0 / 60, bucket_us=50, buckets=1000):
+        self.phases = tuple(phases)
+        self.budget_ns = int(budget_ms * 1e6)
+        self.histograms = {name: Histogram(bucket_us, buckets) for name in self.phases + ('frame',)}
+        self.frames = 0
+        self.over_budget = 0
+        self.overlay_visible = False
+        self._frame_start = 0
+        self._last_mark = 0
+        self._overlay_lines = []
+        self._overlay_state = None
+
+    def begin_frame(self):
+        self._frame_start = self._last_mark = time.perf_counter_ns()
+
+    def mark(self, phase):
+        now = time.perf_counter_ns()
+        self.histograms[phase].add(now - self._last_mark)
+        self._last_mark = now
+
+    def end_frame(self):
+        elapsed = time.perf_counter_ns() - self._frame_start
+        self.histograms['frame'].add(elapsed)
+        self.frames += 1
+        if elapsed > self.budget_ns:
+            self.over_budget += 1
+
+    def toggle_overlay(self):
+        self.overlay_visible = not self.overlay_visible
+
+    def summary(self):
+        """Returns rows of (name, count, mean ms, p50, p95, p99, max ms) for every phase and the frame."""
+        rows = []
+        for name, hist in self.histograms.items():
+            rows.append((name, hist.count, hist.mean_ms(), hist.percentile(50),
+                         hist.percentile(95), hist.percentile(99), hist.max_ns / 1e6))
+        return rows
+
+    def overlay_state(self):
+        """Changes twice a second: the overlay only needs redrawing when this value changes."""
+        return time.perf_counter_ns() // self.OVERLAY_REFRESH_NS
+
+    def draw_overlay(self, surface, font, color=(255, 255, 0), pos=(10, 10)):
+        """Draws p50/p95/p99 per phase and returns the rect covered.
+        The text is re-rendered at most twice a second."""
+        if not self.overlay_visible:
+            return pygame.Rect(pos, (0, 0))
+        state = self.overlay_state()
+        if state != self._overlay_state:
+            lines = ["phase     p50    p95    p99 (ms)"]
+            for name, _, _, p50, p95, p99, _ in self.summary():
+                lines.append(f"{name:8s} {p50:6.2f} {p95:6.2f} {p99:6.2f}")
+            lines.append(f"over budget: {self.over_budget}/{self.frames}")
+            self._overlay_lines = [font.render(line, True, color, (0, 0, 0)) for line in lines]
+            self._overlay_state = state
+        x, y = pos
+        rect = pygame.Rect(pos, (0, 0))
+        for text in self._overlay_lines:
+            rect.union_ip(surface.blit(text, (x, y)))
+            y += text.get_height()
+        return rect
+
+    def export_csv(self, path):
+        """Writes the per-phase statistics (and the over-budget count) to a CSV file."""
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['phase', 'count', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms'])
+            for row in self.summary():
+                writer.writerow([row[0], row[1]] + [f"{value:.3f}" for value in row[2:]])
+            writer.writerow([])
+            writer.writerow(['budget_ms', f"{self.budget_ns / 1e6:.3f}"])
+            writer.writerow(['frames', self.frames])
+            writer.writerow(['over_budget', self.over_budget])
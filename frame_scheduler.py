@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+自適應幀排程
+Adaptive frame pacing: full rate while something on screen is moving, and
+otherwise block until a key/window event or a switch hit arrives (or the idle
+floor rate comes due), so the menu and waiting screens use almost no CPU.
+"""
+
+import time
+
+import pygame
+
+
+class AdaptiveScheduler:
+    def __init__(self, clock, active_fps=60, idle_fps=2, has_pending=None):
+        self.clock = clock
+        self.active_fps = active_fps
+        # Idle floor: even with no input, run at least this many frames per second
+        self.idle_fps = idle_fps
+        # Callable returning True if switch events are already queued
+        self.has_pending = has_pending or (lambda: False)
+        # Event type posted by other threads to wake an idle loop
+        self.WAKE_EVENT = pygame.event.custom_type()
+
+        self.idle = False # True while the main loop is (about to be) blocked
+        self._pending_event = None # Event consumed by pygame.event.wait, handed back to the game
+        self.active_frames = 0
+        self.idle_frames = 0
+        self.idle_time = 0.0 # Seconds spent blocked
+
+    def wait(self, active):
+        """Waits for the next frame and returns the elapsed time in seconds (after an idle
+        wait, at most one active frame period)."""
+        if active:
+            self.active_frames += 1
+            return self.clock.tick(self.active_fps) / 1000.0
+
+        # Announce that we are going to sleep before checking for queued switch events,
+        # so a callback either sees idle=True (and wakes us) or its event is seen here.
+        self.idle = True
+        if not self.has_pending() and not pygame.event.peek():
+            t0 = time.monotonic()
+            event = pygame.event.wait(int(1000 / self.idle_fps))
+            self.idle_time += time.monotonic() - t0
+            if event.type not in (pygame.NOEVENT, self.WAKE_EVENT):
+                self._pending_event = event
+        self.idle = False
+        self.idle_frames += 1
+        # The time spent blocked is not game time: a key that wakes the loop may start a
+        # timed game in this very frame, which must not lose the idle period at once
+        return min(self.clock.tick() / 1000.0, 1.0 / self.active_fps)
+
+    def wake(self):
+        """Wakes an idle main loop. Safe to call from other threads (e.g. GPIO callbacks)."""
+        if self.idle:
+            try:
+                pygame.event.post(pygame.event.Event(self.WAKE_EVENT))
+            except pygame.error:
+                pass # Event queue full: the loop is about to wake anyway
+
+    def take_event(self):
+        """Returns (and forgets) the event that ended the last idle wait, if any."""
+        event = self._pending_event
+        self._pending_event = None
+        return event
+
+    def stats(self):
+        return {
+            'active_frames': self.active_frames,
+            'idle_frames': self.idle_frames,
+            'idle_time_s': self.idle_time,
+        }
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+遊戲規則引擎
+The rules of the three games (Lighting Up, Gambling, Toggle Lighting) with no
+pygame, GPIO, servo or sound in sight. Inputs are method calls (switch hits,
+menu/game actions, timer ticks); outputs are effect commands appended to
+engine.effects as (kind, arg) tuples, for the caller to carry out and clear.
+
+    engine = GameEngine()
+    engine.select_game(3)
+    engine.start()
+    engine.switch(4)
+    for kind, arg in engine.effects:
+        ...
+    engine.effects.clear()
+"""
+
+import random
+
+# Effect commands: (kind, arg)
+LEDS = 0 # arg = LED bitmask to show
+SOUND = 1 # arg = sound name
+SERVO = 2 # arg = angle in degrees
+DISPLAY = 3 # arg = number for the 7-segment display
+JACKPOT = 4 # arg = points won (Game 2 target hit)
+BANNER = 5 # arg = short message for the screen
+ATTRACT = 6 # arg = True to start the attract-mode light show, False to end it
+GAME_OVER = 7 # arg = final score/points
+GAME_START = 8 # arg = game number (a new game begins, Game 2: fresh starting points)
+GAME_LEFT = 9 # arg = score/points of a game abandoned before its end (menu or restart)
+
+EFFECT_NAMES = {LEDS: 'leds', SOUND: 'sound', SERVO: 'servo', DISPLAY: 'display',
+                JACKPOT: 'jackpot', BANNER: 'banner', ATTRACT: 'attract', GAME_OVER: 'game_over',
+                GAME_START: 'game_start', GAME_LEFT: 'game_left'}
+
+MENU = 0
+LIGHTING_UP = 1
+GAMBLING = 2
+TOGGLE_LIGHTING = 3
+
+
+class GameEngine:
+    NUM_LEDS = 8
+    GAME_DURATION = 30 # Seconds, Game 1 and 3
+    HIT_SCORE = 10 # Score change per LED in Game 1 and 3
+
+    # Game 2
+    START_POINTS = 100
+    BET_STEP = 10
+    MIN_BET = 10
+    MULTIPLIERS = (2, 3, 5)
+    TARGETS = {2: 4, 3: 2, 5: 1} # Multiplier -> number of target LEDs
+
+    SERVO_HOME = 90
+    SERVO_PLAY = 0
+
+    __slots__ = ('current_game', 'game_active', 'score', 'game_time', 'game_duration',
+                 'led_mask', 'points', 'bet_amount', 'multiplier', 'target_mask',
+                 'game2_round_active', 'game2_game_over', 'round_rng', 'effects')
+
+    def __init__(self, round_rng=None):
+        # Returns the random generator for a Game 2 round (anything with sample())
+        self.round_rng = round_rng or (lambda: random)
+        self.effects = []
+        self.current_game = MENU
+        self.reset()
+        self.effects.clear()
+
+    # --- Game state ---
+
+    def reset(self):
+        """Resets all game-specific variables (LEDs off)."""
+        self.score = 0
+        self.game_time = 0.0
+        self.game_duration = self.GAME_DURATION
+        self.game_active = False # Game 1/3 running; in Game 2, betting is possible
+        self.led_mask = 0
+        self.effects.append((LEDS, 0))
+
+        self.points = self.START_POINTS
+        self.bet_amount = self.MIN_BET
+        self.multiplier = self.MULTIPLIERS[0]
+        self.target_mask = 0
+        self.game2_round_active = False
+        self.game2_game_over = False
+
+    def _set_leds(self, mask):
+        self.led_mask = mask
+        self.effects.append((LEDS, mask))
+
+    # --- Menu and game actions ---
+
+    def select_game(self, game):
+        """Main menu choice (1, 2 or 3)."""
+        effects = self.effects
+        effects.append((ATTRACT, False))
+        self.current_game = game
+        self.reset()
+        if game == GAMBLING:
+            # Game 2 is "active" as long as points are left, even between rounds
+            effects.append((DISPLAY, self.points))
+            self.game_active = True
+            effects.append((GAME_START, game))
+        else:
+            effects.append((DISPLAY, 0))
+
+    def _leave(self):
+        """Reports the value of a game still in progress before it is thrown away."""
+        if self.game_active:
+            final_value = self.score if self.current_game != GAMBLING else self.points
+            self.effects.append((GAME_LEFT, final_value))
+
+    def to_menu(self):
+        """Back to the main menu from any game."""
+        self._leave()
+        self.current_game = MENU
+        self.reset()
+        self.effects.append((DISPLAY, 0))
+        self.effects.append((SERVO, self.SERVO_HOME))
+        self.effects.append((ATTRACT, True))
+
+    def start(self):
+        """
+        Start key: starts Game 1/3 if not running, or a Game 2 round if none is in
+        progress. Returns True if a game or round started.
+        """
+        game = self.current_game
+        if game == LIGHTING_UP or game == TOGGLE_LIGHTING:
+            if not self.game_active:
+                self.start_game()
+                return True
+        elif game == GAMBLING:
+            if not self.game2_round_active and not self.game2_game_over:
+                return self.start_round()
+        return False
+
+    def restart(self):
+        """Restarts the current game (Game 2: back to the starting points)."""
+        game = self.current_game
+        if game == LIGHTING_UP or game == TOGGLE_LIGHTING:
+            self.start_game()
+        elif game == GAMBLING:
+            self._leave()
+            self.reset()
+            self.effects.append((DISPLAY, self.points))
+            self.game_active = True
+            self.effects.append((SERVO, self.SERVO_HOME))
+            self.effects.append((GAME_START, game))
+
+    def start_game(self):
+        """Starts Game 1 or 3: timer from zero, LEDs off."""
+        self._leave()
+        self.reset()
+        self.game_active = True
+        self.effects.append((DISPLAY, 0))
+        self.effects.append((SERVO, self.SERVO_PLAY))
+        self.effects.append((GAME_START, self.current_game))
+
+    def can_bet(self):
+        """True when the Game 2 bet and multiplier may be changed."""
+        return self.current_game == GAMBLING and not self.game2_round_active and not self.game2_game_over
+
+    def bet_up(self):
+        if self.can_bet():
+            # Capped at the current points, but never below the minimum bet
+            self.bet_amount = max(min(self.bet_amount + self.BET_STEP, self.points), self.MIN_BET)
+
+    def bet_down(self):
+        if self.can_bet():
+            self.bet_amount = max(self.bet_amount - self.BET_STEP, self.MIN_BET)
+
+    def cycle_multiplier(self, step):
+        """Moves step places (+1/-1) through MULTIPLIERS, wrapping around."""
+        if self.can_bet():
+            multipliers = self.MULTIPLIERS
+            index = multipliers.index(self.multiplier)
+            self.multiplier = multipliers[(index + step) % len(multipliers)]
+
+    def start_round(self):
+        """Starts a Game 2 round: takes the bet and picks the target LEDs."""
+        if self.points < self.bet_amount:
+            self.effects.append((BANNER, "Not enough points to bet!"))
+            return False
+        self.points -= self.bet_amount
+        self.game2_round_active = True
+        self.effects.append((SERVO, self.SERVO_PLAY))
+
+        mask = 0
+        for led_index in self.round_rng().sample(range(self.NUM_LEDS), self.TARGETS[self.multiplier]):
+            mask |= 1 << led_index
+        self.target_mask = mask
+        self._set_leds(mask)
+        self.effects.append((DISPLAY, self.points))
+        return True
+
+    # --- Inputs ---
+
+    def switch(self, switch_index):
+        """A microswitch hit."""
+        self.effects.append((SOUND, 'hit'))
+        game = self.current_game
+        if game == LIGHTING_UP:
+            bit = 1 << switch_index
+            if self.game_active and not self.led_mask & bit:
+                self.score += self.HIT_SCORE
+                self.effects.append((SOUND, 'score'))
+                self._set_leds(self.led_mask | bit)
+        elif game == GAMBLING:
+            if self.game2_round_active and not self.game2_game_over:
+                self._settle_round(switch_index)
+        elif game == TOGGLE_LIGHTING:
+            if self.game_active:
+                bit = 1 << switch_index
+                mask = self.led_mask ^ bit
+                self.score += self.HIT_SCORE if mask & bit else -self.HIT_SCORE
+                self._set_leds(mask)
+                self.effects.append((SOUND, 'score'))
+
+    def _settle_round(self, switch_index):
+        effects = self.effects
+        if (self.target_mask >> switch_index) & 1:
+            win_amount = self.bet_amount * self.multiplier
+            self.points += win_amount
+            effects.append((SOUND, 'jackpot'))
+            effects.append((JACKPOT, win_amount))
+        else:
+            effects.append((BANNER, "Miss!")) # The bet taken at the start of the round is lost
+        effects.append((SERVO, self.SERVO_HOME))
+        self.game2_round_active = False
+        self._set_leds(0)
+        effects.append((DISPLAY, self.points))
+        if self.points <= 0:
+            self.game2_game_over = True
+            self.end_game()
+
+    def tick(self, dt):
+        """Advances the Game 1/3 timer by dt seconds."""
+        if (self.current_game == LIGHTING_UP or self.current_game == TOGGLE_LIGHTING) and self.game_active:
+            self.game_time += dt
+            # Remaining time in tenths of a second for the 7-segment display
+            remaining_time = max(0, self.game_duration - self.game_time)
+            self.effects.append((DISPLAY, int(remaining_time * 10)))
+            if self.game_time >= self.game_duration:
+                self.end_game()
+
+    def end_game(self):
+        """Ends Game 1/3 when time is up, or Game 2 when the points run out."""
+        self.game_active = False
+        self.game2_round_active = False
+        self._set_leds(0)
+        final_value = self.score if self.current_game != GAMBLING else self.points
+        self.effects.append((DISPLAY, final_value))
+        if self.current_game != GAMBLING:
+            self.effects.append((SERVO, self.SERVO_HOME))
+        self.effects.append((GAME_OVER, final_value))
+
+    # --- Queries ---
+
+    def is_lit(self, i):
+        return (self.led_mask >> i) & 1 == 1
+
+    def is_target(self, i):
+        return (self.target_mask >> i) & 1 == 1
+
+    def target_leds(self):
+        return [i for i in range(self.NUM_LEDS) if (self.target_mask >> i) & 1]
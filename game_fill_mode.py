@@ -1,4 +1,4 @@
-import RPi.GPIO as GPIO
+from gpio_backend import GPIO
 import time
 
 # 使用 BOARD 模式（實體腳位編號）
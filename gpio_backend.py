@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GPIO 後端選擇
+Picks the GPIO implementation: the real RPi.GPIO on a cabinet, or the simulated
+backend (sim_gpio) when PINBALL_GPIO=sim, e.g. for benchmarking on a workstation.
+
+Usage: from gpio_backend import GPIO
+"""
+
+import os
+import time
+
+BACKEND = os.environ.get('PINBALL_GPIO', 'rpi').lower()
+
+if BACKEND == 'sim':
+    import sim_gpio as GPIO
+else:
+    import RPi.GPIO as GPIO
+
+SIMULATED = BACKEND == 'sim'
+
+# Clock for input edge timestamps (debouncing): the simulator's virtual time, so
+# simulated presses keep their spacing, or the monotonic clock on hardware
+edge_time_ns = GPIO.clock.now_ns if SIMULATED else time.monotonic_ns
@@ -1,5 +1,5 @@
-import RPi.GPIO as GPIO
-import time
+from gpio_backend import GPIO
+from keypad import Keypad, KEYS
 
 # 使用實體腳位（BOARD 模式）
 GPIO.setmode(GPIO.BOARD)
@@ -8,34 +8,22 @@ GPIO.setmode(GPIO.BOARD)
 ROWS = [29, 31, 33, 35]  # 對應原本 BCM: 5, 6, 13, 19
 COLS = [32, 36, 38, 40]  # 對應原本 BCM: 12, 16, 20, 21
 
-KEYS = [
-    ['1','2','3','A'],
-    ['4','5','6','B'],
-    ['7','8','9','C'],
-    ['*','0','#','D']
-]
-
-# 設定 GPIO
-for row in ROWS:
-    GPIO.setup(row, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-
-for col in COLS:
-    GPIO.setup(col, GPIO.OUT)
-    GPIO.output(col, GPIO.HIGH)
+# 背景執行緒掃描鍵盤，可同時按住多個按鍵
+keypad = Keypad(GPIO, ROWS, COLS, KEYS)
 
 try:
     print("請按鍵盤上的任意按鍵...")
     while True:
-        for col_idx, col in enumerate(COLS):
-            GPIO.output(col, GPIO.LOW)
-            for row_idx, row in enumerate(ROWS):
-                if GPIO.input(row) == GPIO.LOW:
-                    print(f"你按下的是: {KEYS[row_idx][col_idx]}")
-                    while GPIO.input(row) == GPIO.LOW:
-                        time.sleep(0.1)  # 等待放開
-            GPIO.output(col, GPIO.HIGH)
-        time.sleep(0.05)
+        event = keypad.wait_event(timeout=0.5)
+        if event is None:
+            continue
+        key, pressed, _ = event
+        if pressed:
+            print(f"你按下的是: {key}")
+        else:
+            print(f"你放開的是: {key}")
 
 except KeyboardInterrupt:
+    keypad.stop()
     GPIO.cleanup()
     print("程式結束")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+4x4 矩陣鍵盤驅動
+Matrix keypad driver. A background thread scans the matrix, debounces every key
+on its own and publishes press/release events into a queue, so any number of keys
+can be held at once and the reader never waits on the scan.
+
+While no key is down the scan stops: all columns are driven low and a falling edge
+on any row (GPIO interrupt) wakes the scanner, which then scans at scan_hz until
+every key is released again.
+
+Without a diode per key, three keys on the corners of a rectangle make the fourth
+corner read as pressed (ghosting); the driver reports what the matrix shows.
+"""
+
+import queue
+import threading
+import time
+
+KEYS = [
+    ['1', '2', '3', 'A'],
+    ['4', '5', '6', 'B'],
+    ['7', '8', '9', 'C'],
+    ['*', '0', '#', 'D']
+]
+
+
+class Keypad:
+    def __init__(self, gpio, rows, cols, keys=KEYS, scan_hz=200, debounce_scans=3,
+                 queue_size=64, on_event=None, interrupts=True):
+        self.gpio = gpio
+        self.rows = list(rows)
+        self.cols = list(cols)
+        self.keys = [list(row) for row in keys]
+        self.scan_interval = 1.0 / scan_hz
+        # A key changes state after this many consecutive scans agree
+        self.debounce_scans = debounce_scans
+        # Called on the scanner thread after each event is queued (e.g. to wake a game loop)
+        self.on_event = on_event
+        self.interrupts = interrupts
+
+        # (key, pressed, t_ns) events for the reader
+        self.events = queue.Queue(maxsize=queue_size)
+
+        n = len(self.rows) * len(self.cols)
+        self._state = [False] * n # Debounced state of each key (index = row * cols + col)
+        self._count = [0] * n # Consecutive scans disagreeing with _state
+        self.scans = 0
+        self.dropped = 0 # Events lost because the reader fell behind
+
+        for row in self.rows:
+            gpio.setup(row, gpio.IN, pull_up_down=gpio.PUD_UP)
+        gpio.setup(self.cols, gpio.OUT, initial=gpio.LOW if interrupts else gpio.HIGH)
+
+        self._wake = threading.Event()
+        if interrupts:
+            for row in self.rows:
+                gpio.add_event_detect(row, gpio.FALLING, callback=self._row_edge)
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="keypad", daemon=True)
+        self._thread.start()
+
+    def _row_edge(self, channel):
+        self._wake.set()
+
+    def _scan(self):
+        """Reads every key once. Returns the list of raw key states."""
+        gpio = self.gpio
+        rows = self.rows
+        cols = self.cols
+        low = gpio.LOW
+        high = gpio.HIGH
+        width = len(cols)
+        raw = [False] * len(self._state)
+        gpio.output(cols, high)
+        for c, col in enumerate(cols):
+            gpio.output(col, low)
+            for r, row in enumerate(rows):
+                if gpio.input(row) == low:
+                    raw[r * width + c] = True
+            gpio.output(col, high)
+        self.scans += 1
+        return raw
+
+    def _debounce(self, raw):
+        """Updates the debounced states from one scan and publishes the changes. Returns True if any key is down."""
+        state = self._state
+        count = self._count
+        width = len(self.cols)
+        any_down = False
+        for i, down in enumerate(raw):
+            if down != state[i]:
+                count[i] += 1
+                if count[i] >= self.debounce_scans:
+                    state[i] = down
+                    count[i] = 0
+                    self._publish(self.keys[i // width][i % width], down)
+            else:
+                count[i] = 0
+            any_down = any_down or down or state[i]
+        return any_down
+
+    def _publish(self, key, pressed):
+        try:
+            self.events.put_nowait((key, pressed, time.monotonic_ns()))
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self.on_event is not None:
+            self.on_event()
+
+    def _run(self):
+        gpio = self.gpio
+        next_scan = time.monotonic()
+        while self._running:
+            if self.interrupts:
+                # Idle: all columns low, any key pulls its row low and wakes us
+                gpio.output(self.cols, gpio.LOW)
+                self._wake.clear()
+                if not any(gpio.input(row) == gpio.LOW for row in self.rows):
+                    self._wake.wait()
+                if not self._running:
+                    break
+                next_scan = time.monotonic()
+            # Active: scan at the configured rate until every key is released
+            while self._running:
+                active = self._debounce(self._scan())
+                if not active and self.interrupts:
+                    break
+                next_scan += self.scan_interval
+                delay = next_scan - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_scan = time.monotonic() # Fell behind: don't try to catch up
+
+    def get_events(self):
+        """Returns every queued (key, pressed, t_ns) event without blocking."""
+        events = []
+        try:
+            while True:
+                events.append(self.events.get_nowait())
+        except queue.Empty:
+            return events
+
+    def wait_event(self, timeout=None):
+        """Blocks until the next (key, pressed, t_ns) event; returns None on timeout."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def pressed_keys(self):
+        """Keys currently held down (debounced)."""
+        width = len(self.cols)
+        return [self.keys[i // width][i % width] for i, down in enumerate(self._state) if down]
+
+    def stats(self):
+        return {'scans': self.scans, 'dropped': self.dropped, 'held': len(self.pressed_keys())}
+
+    def stop(self, timeout=1.0):
+        """Stops the scanner thread and removes the row interrupts."""
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout)
+        if self.interrupts:
+            for row in self.rows:
+                self.gpio.remove_event_detect(row)
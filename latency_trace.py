@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+開關到回饋的延遲追蹤
+End-to-end latency tracing for switch hits: each hit is stamped (monotonic ns) at the
+GPIO callback and at every later stage, and latencies are aggregated per switch and
+per game mode.
+
+Stages, all measured from the GPIO callback:
+    dequeue  - the main loop took the event off the queue
+    led      - the LED pins were written
+    display  - the 7-segment display was written (by the display worker), for hits
+               whose own effects posted a value to it
+    present  - the frame showing the result was presented
+"""
+
+import threading
+import time
+
+from frame_profiler import Histogram
+
+STAGES = ('dequeue', 'led', 'display', 'present')
+MODE_NAMES = {0: 'menu', 1: 'lighting', 2: 'gambling', 3: 'toggle'}
+
+# A trace waiting for a display write is closed without it after this long
+DISPLAY_TIMEOUT_NS = 2000000000
+
+
+class _Trace:
+    __slots__ = ('switch', 'mode', 't_callback', 'stamps', 'display_posted')
+
+    def __init__(self, switch, mode, t_callback):
+        self.switch = switch
+        self.mode = mode
+        self.t_callback = t_callback
+        self.stamps = {}
+        self.display_posted = False
+
+
+class LatencyTracer:
+    """Collects per-stage latencies for switch events (see module docstring)."""
+
+    def __init__(self, bucket_us=100, buckets=2000):
+        self._bucket_us = bucket_us
+        self._buckets = buckets
+        self._lock = threading.Lock() # The display stage is stamped from the display worker
+        self._open = [] # Traces still collecting stages
+        self._waiting_display = [] # Presented traces still waiting for their display write
+        self.histograms = {} # (switch, mode, stage) -> Histogram
+        self.completed = 0
+
+    def begin(self, switch_index, mode, t_callback_ns):
+        """Starts a trace for an event taken off the queue (stamps 'dequeue')."""
+        trace = _Trace(switch_index, mode, t_callback_ns)
+        trace.stamps['dequeue'] = time.monotonic_ns()
+        with self._lock:
+            self._open.append(trace)
+        return trace
+
+    def mark(self, stage):
+        """Stamps stage on every open trace that has not reached it yet."""
+        if not self._open:
+            return
+        now = time.monotonic_ns()
+        with self._lock:
+            for trace in self._open:
+                if stage not in trace.stamps:
+                    trace.stamps[stage] = now
+
+    def display_posted(self, trace):
+        """Called when the effects of trace's own event post a value to the display; the
+        trace then waits for the next display write."""
+        trace.display_posted = True
+
+    def display_written(self):
+        """Called by the display worker after each transmission."""
+        if not self._open and not self._waiting_display:
+            return
+        now = time.monotonic_ns()
+        with self._lock:
+            for trace in self._open:
+                if trace.display_posted and 'display' not in trace.stamps:
+                    trace.stamps['display'] = now
+            for trace in self._waiting_display:
+                trace.stamps['display'] = now
+                self._record(trace)
+            self._waiting_display = []
+
+    def present(self):
+        """Stamps 'present' on open traces and closes them (or parks them until the display is written)."""
+        if not self._open and not self._waiting_display:
+            return
+        now = time.monotonic_ns()
+        with self._lock:
+            for trace in self._open:
+                trace.stamps['present'] = now
+                if trace.display_posted and 'display' not in trace.stamps:
+                    self._waiting_display.append(trace)
+                else:
+                    self._record(trace)
+            self._open = []
+            # Give up on display writes that never came (e.g. the value did not change)
+            expired = [t for t in self._waiting_display if now - t.t_callback > DISPLAY_TIMEOUT_NS]
+            for trace in expired:
+                self._waiting_display.remove(trace)
+                self._record(trace)
+
+    def _record(self, trace):
+        for stage, t in trace.stamps.items():
+            key = (trace.switch, trace.mode, stage)
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(self._bucket_us, self._buckets)
+            hist.add(max(0, t - trace.t_callback))
+        self.completed += 1
+
+    def summary(self):
+        """Returns rows of (switch, mode, stage, count, mean ms, p50, p95, p99, max ms)."""
+        rows = []
+        for (switch, mode, stage), hist in sorted(self.histograms.items(),
+                                                  key=lambda item: (item[0][0], item[0][1], STAGES.index(item[0][2]))):
+            rows.append((switch, mode, stage, hist.count, hist.mean_ms(), hist.percentile(50),
+                         hist.percentile(95), hist.percentile(99), hist.max_ns / 1e6))
+        return rows
+
+    def report(self):
+        """Formats the summary as a text table (latencies from the GPIO callback, in ms)."""
+        lines = [f"Switch latency ({self.completed} events, ms from GPIO callback)",
+                 "switch mode      stage      count   mean    p50    p95    p99    max"]
+        for switch, mode, stage, count, mean, p50, p95, p99, peak in self.summary():
+            lines.append(f"{switch + 1:6d} {MODE_NAMES.get(mode, mode):9s} {stage:8s} {count:7d} "
+                         f"{mean:6.2f} {p50:6.2f} {p95:6.2f} {p99:6.2f} {peak:6.2f}")
+        return "\n".join(lines)
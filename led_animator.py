@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LED 動畫排程器
+LED effects (chase, blink, software-PWM fade, jackpot flash) compiled ahead of
+time into timelines of (offset, bitmask) frames, and played back on a dedicated
+thread against absolute deadlines so timing errors never accumulate.
+
+    animator = LedAnimator(leds)
+    animator.play(chase(8, step_ms=80), loop=True)  # attract mode
+    animator.cancel()                                # LEDs go back to the game state
+"""
+
+import threading
+import time
+
+from bus_timing import delay_ns
+
+MS = 1000000 # Nanoseconds per millisecond
+
+
+class Timeline:
+    """Precomputed animation: frames of (offset_ns from start, LED mask), and the total length."""
+
+    __slots__ = ('frames', 'duration_ns')
+
+    def __init__(self, frames, duration_ns):
+        self.frames = tuple(frames)
+        self.duration_ns = duration_ns
+
+    def __add__(self, other):
+        """Plays self, then other."""
+        shift = self.duration_ns
+        return Timeline(self.frames + tuple((t + shift, m) for t, m in other.frames),
+                        self.duration_ns + other.duration_ns)
+
+
+# --- Pattern compilers ---
+
+def chase(num_leds, step_ms=80, cycles=1, width=1, reverse=False):
+    """A block of width lit LEDs running along the row, cycles times."""
+    block = (1 << width) - 1
+    order = range(num_leds - 1, -1, -1) if reverse else range(num_leds)
+    all_mask = (1 << num_leds) - 1
+    frames = []
+    t = 0
+    for _ in range(cycles):
+        for i in order:
+            mask = block << i
+            mask = (mask | (mask >> num_leds)) & all_mask # Wrap around the end of the row
+            frames.append((t, mask))
+            t += step_ms * MS
+    return Timeline(frames, t)
+
+
+def blink(mask, on_ms=150, off_ms=150, count=3):
+    """mask on/off count times."""
+    frames = []
+    t = 0
+    for _ in range(count):
+        frames.append((t, mask))
+        t += on_ms * MS
+        frames.append((t, 0))
+        t += off_ms * MS
+    return Timeline(frames, t)
+
+
+def fade(mask, duration_ms=1000, fade_in=True, pwm_hz=100, levels=16):
+    """Fades mask in (or out) with software PWM: each PWM period is split into an on and an off frame."""
+    period_ns = 1000000000 // pwm_hz
+    periods = max(1, duration_ms * MS // period_ns)
+    frames = []
+    t = 0
+    for p in range(periods):
+        level = (p * levels) // periods + 1 # 1..levels
+        if not fade_in:
+            level = levels + 1 - level
+        on_ns = period_ns * level // levels
+        frames.append((t, mask))
+        if on_ns < period_ns:
+            frames.append((t + on_ns, 0))
+        t += period_ns
+    frames.append((t, mask if fade_in else 0))
+    return Timeline(frames, t)
+
+
+def jackpot_flash(num_leds, target_mask, flashes=4, flash_ms=70):
+    """Jackpot effect: whole row strobes, targets and the rest alternate, then a fast chase."""
+    all_mask = (1 << num_leds) - 1
+    strobe = blink(all_mask, flash_ms, flash_ms, flashes)
+    frames = []
+    t = 0
+    for _ in range(flashes):
+        frames.append((t, target_mask))
+        t += flash_ms * MS
+        frames.append((t, all_mask & ~target_mask))
+        t += flash_ms * MS
+    alternate = Timeline(frames, t)
+    return strobe + alternate + chase(num_leds, step_ms=30, cycles=2, width=2)
+
+
+# --- Playback ---
+
+class LedAnimator:
+    """Plays one Timeline at a time on an LedBank from its own thread."""
+
+    # Sleep until this close to a deadline, then busy-wait the rest
+    SPIN_NS = 500000
+
+    def __init__(self, bank):
+        self.bank = bank
+        self._cond = threading.Condition()
+        self._request = None # (timeline, loop) waiting to start
+        self._playing = False
+        self._generation = 0 # Bumped by play()/cancel() to interrupt the current playback
+        self._running = True
+        # Statistics
+        self.frames_shown = 0
+        self.frames_skipped = 0 # Frames dropped because the thread woke up after the next one was due
+        self.max_lateness_ns = 0
+        self._thread = threading.Thread(target=self._run, name="led-animator", daemon=True)
+        self._thread.start()
+
+    def play(self, timeline, loop=False):
+        """Starts timeline, replacing whatever is playing. Returns immediately."""
+        with self._cond:
+            self._request = (timeline, loop)
+            self._generation += 1
+            self._cond.notify()
+
+    def cancel(self, wait=False, timeout=1.0):
+        """
+        Stops the current animation; the LEDs go back to the game state. With wait=True,
+        returns only once the thread has stopped writing and released the LEDs.
+        """
+        with self._cond:
+            self._request = None
+            self._generation += 1
+            self._cond.notify_all()
+            if wait:
+                self._cond.wait_for(lambda: not self._playing, timeout)
+
+    def is_playing(self):
+        return self._playing or self._request is not None
+
+    def _wait_until(self, deadline, generation):
+        """Sleeps until deadline (perf_counter_ns). Returns False if interrupted by play/cancel."""
+        while True:
+            remaining = deadline - time.perf_counter_ns()
+            if self._generation != generation or not self._running:
+                return False
+            if remaining <= 0:
+                return True
+            if remaining > self.SPIN_NS:
+                with self._cond:
+                    if self._generation != generation:
+                        return False
+                    self._cond.wait((remaining - self.SPIN_NS) / 1e9)
+            else:
+                delay_ns(remaining)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and self._request is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                timeline, loop = self._request
+                self._request = None
+                generation = self._generation
+                self._playing = True
+
+            completed = self._play(timeline, loop, generation)
+
+            with self._cond:
+                self._playing = False
+                if completed or self._request is None:
+                    self.bank.release() # Back to the game state
+                # else: a new animation takes over the LEDs without a flicker of the game state
+                self._cond.notify_all() # Wakes cancel(wait=True)
+
+    def _play(self, timeline, loop, generation):
+        frames = timeline.frames
+        count = len(frames)
+        if not count:
+            return True
+        start = time.perf_counter_ns()
+        while True:
+            i = 0
+            while i < count:
+                offset, mask = frames[i]
+                if not self._wait_until(start + offset, generation):
+                    return False
+                # Drift correction: deadlines are absolute, and if we woke up after the next
+                # frame was already due, jump to the latest due frame instead of replaying all
+                now = time.perf_counter_ns()
+                lateness = now - (start + offset)
+                if lateness > self.max_lateness_ns:
+                    self.max_lateness_ns = lateness
+                while i + 1 < count and start + frames[i + 1][0] <= now:
+                    i += 1
+                    self.frames_skipped += 1
+                    mask = frames[i][1]
+                self.bank.show(mask)
+                self.frames_shown += 1
+                i += 1
+            if not loop:
+                return self._wait_until(start + timeline.duration_ns, generation)
+            start += timeline.duration_ns
+
+    def stats(self):
+        return {
+            'frames_shown': self.frames_shown,
+            'frames_skipped': self.frames_skipped,
+            'max_lateness_us': self.max_lateness_ns / 1000.0,
+        }
+
+    def stop(self, timeout=1.0):
+        """Stops the animator thread and gives the LEDs back to the game state."""
+        with self._cond:
+            self._running = False
+            self._request = None
+            self._generation += 1
+            self._cond.notify()
+        self._thread.join(timeout)
+        self.bank.release()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LED 輸出組（位元遮罩）
+The playfield LEDs as an integer bitmask (bit i = LED i) with a shadow of the
+last state written to the pins. flush() XORs the two and writes only the pins
+that changed, in a single GPIO.output call.
+
+While an animation plays (see led_animator.py) it sets override to the frame it
+wants shown; the game's own mask is kept and comes back when override is cleared.
+"""
+
+import threading
+
+
+class LedBank:
+    def __init__(self, gpio, pins):
+        self.gpio = gpio
+        self.pins = list(pins)
+        self.all_mask = (1 << len(self.pins)) - 1
+        self.mask = 0 # Wanted state (game)
+        self.override = None # Mask shown instead of mask while an animation plays
+        self._lock = threading.Lock() # flush() is called from the game loop and the animator thread
+        self.hw_writes = 0 # GPIO.output calls made by flush()
+        self.pin_writes = 0 # Individual pin changes written
+        # Configure all LED pins as outputs, off; the shadow then matches the hardware
+        gpio.setup(self.pins, gpio.OUT, initial=gpio.LOW)
+        self._shadow = 0
+
+    # --- State changes (not written to the pins until flush) ---
+
+    def is_on(self, i):
+        return (self.mask >> i) & 1 == 1
+
+    def set(self, i, on):
+        if on:
+            self.mask |= 1 << i
+        else:
+            self.mask &= ~(1 << i)
+
+    def toggle(self, i):
+        """Flips LED i and returns its new state."""
+        self.mask ^= 1 << i
+        return self.is_on(i)
+
+    def set_mask(self, mask):
+        self.mask = mask & self.all_mask
+
+    def update(self, on_mask=0, off_mask=0):
+        """Turns several LEDs on and off in one step."""
+        self.mask = ((self.mask | on_mask) & ~off_mask) & self.all_mask
+
+    def count(self):
+        """Number of LEDs currently on."""
+        return bin(self.mask).count('1')
+
+    # --- Hardware ---
+
+    def flush(self):
+        """Writes the changed pins (if any) in one batched call. Returns the number of pins written."""
+        with self._lock:
+            mask = self.mask if self.override is None else self.override
+            changed = mask ^ self._shadow
+            if not changed:
+                return 0
+            gpio = self.gpio
+            channels = []
+            values = []
+            i = 0
+            while changed:
+                if changed & 1:
+                    channels.append(self.pins[i])
+                    values.append(gpio.HIGH if (mask >> i) & 1 else gpio.LOW)
+                changed >>= 1
+                i += 1
+            gpio.output(channels, values)
+            self._shadow = mask
+            self.hw_writes += 1
+            self.pin_writes += len(channels)
+            return len(channels)
+
+    def show(self, mask):
+        """Shows mask on the pins without touching the game state (used by animations)."""
+        self.override = mask & self.all_mask
+        return self.flush()
+
+    def release(self):
+        """Ends an override and writes the game state back to the pins."""
+        self.override = None
+        return self.flush()
+
+    def invalidate(self):
+        """Forgets the shadow so the next flush rewrites every pin."""
+        self._shadow = ~self.mask & self.all_mask
+
+    def stats(self):
+        return {
+            'mask': self.mask,
+            'hw_writes': self.hw_writes,
+            'pin_writes': self.pin_writes,
+        }
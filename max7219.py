@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MAX7219 SPI 7段顯示器驅動
+MAX7219 driver over hardware SPI, with the same display_number() interface as the
+bit-banged TM1637 driver in pinball_game.py.
+
+The driver keeps a framebuffer of 8 digit registers per module and a shadow of
+what each chip holds; flush() sends only the registers that differ. Cascaded
+modules (DOUT -> DIN) share one chip select: every transfer carries one 16-bit
+word per module, farthest module first, and all chips latch together when CS
+rises. A chip latches one register per transfer, so a flush takes as many
+transfers as the most changed digits on any one module, with NO-OP words for
+the modules that have nothing left to send.
+
+Digits use the chip's Code B decoding: position 0 is DIGIT0, the rightmost digit.
+"""
+
+import time
+
+# Register addresses
+REG_NOOP = 0x00
+REG_DIGIT0 = 0x01 # DIGIT0-DIGIT7 are 0x01-0x08
+REG_DECODE_MODE = 0x09
+REG_INTENSITY = 0x0A
+REG_SCAN_LIMIT = 0x0B
+REG_SHUTDOWN = 0x0C
+REG_DISPLAY_TEST = 0x0F
+
+# Code B characters
+CODE_B_DASH = 0x0A
+CODE_B_BLANK = 0x0F
+
+
+class MAX7219:
+    def __init__(self, spi=None, bus=0, device=0, speed_hz=10000000, modules=1, digits=4, brightness=15):
+        if spi is None:
+            import spidev # Only needed on the Pi
+            spi = spidev.SpiDev()
+            spi.open(bus, device)
+            spi.max_speed_hz = speed_hz
+        self.spi = spi
+        self.speed_hz = speed_hz
+        self.modules = modules
+        self.digits = digits # Digits wired per module (scan limit)
+        self.brightness = brightness
+        # Framebuffer and chip shadow: one list of 8 Code B values per module
+        self.frame = [[CODE_B_BLANK] * 8 for _ in range(modules)]
+        self._shadow = [[None] * 8 for _ in range(modules)]
+        self._intensity_sent = None
+        # Counters
+        self.updates = 0
+        self.transfers = 0
+        self.bytes_sent = 0
+        self.digit_writes = 0
+        self.last_update_us = 0.0
+        self.init_chips()
+
+    def _transfer(self, words):
+        """One chip-select frame: words is a list of (register, data), one per module, module 0 first."""
+        burst = []
+        for register, data in reversed(words): # Farthest module is shifted in first
+            burst.append(register)
+            burst.append(data)
+        self.spi.writebytes(burst)
+        self.transfers += 1
+        self.bytes_sent += len(burst)
+
+    def _broadcast(self, register, data):
+        self._transfer([(register, data)] * self.modules)
+
+    def init_chips(self):
+        """Configures every module (decoding, scan limit, brightness, display on) and clears it."""
+        self._broadcast(REG_DISPLAY_TEST, 0x00)
+        self._broadcast(REG_DECODE_MODE, 0xFF) # Code B on all digits
+        self._broadcast(REG_SCAN_LIMIT, self.digits - 1)
+        self._broadcast(REG_INTENSITY, self.brightness & 0x0F)
+        self._intensity_sent = self.brightness & 0x0F
+        self._broadcast(REG_SHUTDOWN, 0x01) # Normal operation
+        self._shadow = [[None] * 8 for _ in range(self.modules)]
+        self.flush()
+
+    def set_digit(self, module, position, value):
+        """Puts a Code B value (0-9, CODE_B_DASH, CODE_B_BLANK) in the framebuffer; sent by flush()."""
+        self.frame[module][position] = value
+
+    def flush(self):
+        """Sends every framebuffer digit that differs from the chips. Returns the number of transfers."""
+        pending = []
+        for module in range(self.modules):
+            frame = self.frame[module]
+            shadow = self._shadow[module]
+            pending.append([(REG_DIGIT0 + i, frame[i]) for i in range(self.digits) if frame[i] != shadow[i]])
+        rounds = max(len(changes) for changes in pending)
+        for r in range(rounds):
+            words = []
+            for module, changes in enumerate(pending):
+                if r < len(changes):
+                    register, data = changes[r]
+                    words.append(changes[r])
+                    self._shadow[module][register - REG_DIGIT0] = data
+                    self.digit_writes += 1
+                else:
+                    words.append((REG_NOOP, 0))
+            self._transfer(words)
+        control = self.brightness & 0x0F
+        if control != self._intensity_sent:
+            self._broadcast(REG_INTENSITY, control)
+            self._intensity_sent = control
+            rounds += 1
+        return rounds
+
+    def display_number(self, number, module=0):
+        """Displays a number (0-9999 on 4 digits) with leading zeros; only changed digits are sent."""
+        t0 = time.perf_counter_ns()
+        limit = 10 ** self.digits - 1
+        number = max(0, min(limit, int(number)))
+        frame = self.frame[module]
+        for position in range(self.digits):
+            frame[position] = number % 10
+            number //= 10
+        self.flush()
+        self.updates += 1
+        self.last_update_us = (time.perf_counter_ns() - t0) / 1000.0
+
+    def set_brightness(self, brightness):
+        """Sets the brightness (0-15); sent with the next flush."""
+        self.brightness = max(0, min(15, int(brightness)))
+
+    def invalidate(self):
+        """Forgets the shadow state so the next flush rewrites everything (e.g. after a chip reset)."""
+        self._shadow = [[None] * 8 for _ in range(self.modules)]
+        self._intensity_sent = None
+
+    def stats(self):
+        """Returns driver counters: updates, transfers, bytes and digit writes, last update cost."""
+        return {
+            'updates': self.updates,
+            'transfers': self.transfers,
+            'bytes_sent': self.bytes_sent,
+            'digit_writes': self.digit_writes,
+            'last_update_us': self.last_update_us,
+            # Time the bytes took on the bus at speed_hz (without CS setup between transfers)
+            'wire_us_total': self.bytes_sent * 8 * 1000000.0 / self.speed_hz,
+        }
+
+    def close(self):
+        self.spi.close()
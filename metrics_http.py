@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prometheus 監控端點
+Serves live game metrics over HTTP in the Prometheus text format, from a thread of
+its own.
+
+    PINBALL_METRICS=9100 python pinball_game.py
+    curl http://127.0.0.1:9100/metrics
+
+Nothing is counted here: the game's modules already keep plain integer counters
+(frames, switch presses, pin writes, ...) that they bump without locks. A scrape
+calls collect(), which reads them as they are and returns MetricFamily objects,
+so the hot paths pay nothing extra. Values read during a frame may be one
+increment apart from each other, which Prometheus tolerates.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricFamily:
+    """One metric (counter, gauge or histogram) and its samples."""
+
+    __slots__ = ('name', 'kind', 'help', 'samples')
+
+    def __init__(self, name, kind, help):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.samples = [] # (name suffix, labels, value)
+
+    def add(self, value, suffix='', **labels):
+        self.samples.append((suffix, labels, value))
+        return self
+
+
+def counter(name, help, value=None, **labels):
+    family = MetricFamily(name, 'counter', help)
+    if value is not None:
+        family.add(value, **labels)
+    return family
+
+
+def gauge(name, help, value=None, **labels):
+    family = MetricFamily(name, 'gauge', help)
+    if value is not None:
+        family.add(value, **labels)
+    return family
+
+
+def histogram(name, help, hist, bounds_s):
+    """
+    Converts a frame_profiler.Histogram (linear buckets) to a Prometheus histogram
+    with the given upper bounds in seconds. Bounds are rounded down to bucket edges;
+    bounds past the histogram's range (where only the overflow bucket would hold the
+    samples) are left out rather than reported with a wrong count.
+    """
+    family = MetricFamily(name, 'histogram', help)
+    counts = list(hist.counts) # Snapshot: the game loop keeps adding
+    last = len(counts) - 1 # Overflow bucket, only in +Inf
+    for bound in bounds_s:
+        edge = int(bound * 1e9) // hist.bucket_ns
+        if edge > last:
+            continue
+        family.add(sum(counts[:edge]), '_bucket', le=f"{bound:g}")
+    total = sum(counts)
+    family.add(total, '_bucket', le='+Inf')
+    family.add(hist.total_ns / 1e9, '_sum')
+    family.add(total, '_count')
+    return family
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(int(value))
+
+
+def render(families):
+    """Text exposition format of the metric families."""
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family.name} {family.help}")
+        lines.append(f"# TYPE {family.name} {family.kind}")
+        for suffix, labels, value in family.samples:
+            if labels:
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f"{family.name}{suffix}{{{label_text}}} {_format_value(value)}")
+            else:
+                lines.append(f"{family.name}{suffix} {_format_value(value)}")
+    lines.append('')
+    return '\n'.join(lines)
+
+
+class MetricsServer:
+    """HTTP server for /metrics; collect() returns the MetricFamily list and runs on the server thread."""
+
+    def __init__(self, collect, port=9100, host='127.0.0.1'):
+        self.collect = collect
+        self.scrapes = 0
+        self.errors = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                try:
+                    body = render(server.collect()).encode()
+                except Exception as e: # A failed scrape must not take the server down
+                    server.errors += 1
+                    self.send_error(500, str(e))
+                    return
+                server.scrapes += 1
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # No console line per scrape
+
+        self._httpd = HTTPServer((host, port), Handler)
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join(timeout)
@@ -1,4 +1,4 @@
-import RPi.GPIO as GPIO
+from gpio_backend import GPIO
 import time
 
 # 設定 GPIO 模式為 BCM
@@ -7,12 +7,32 @@
 """
 
 import pygame
-import RPi.GPIO as GPIO
+from gpio_backend import GPIO, edge_time_ns
 import time
 import random
-import threading
-from collections import defaultdict
 import os
+from display_worker import DisplayWorker
+from tm1637_wave import TM1637Encoder, TM1637Transmitter
+import bus_timing
+from servo_controller import ServoController
+from frame_profiler import FrameProfiler
+from latency_trace import LatencyTracer
+from event_ring import SwitchEventRing, DROP_OLDEST
+from render_cache import TextCache
+from frame_scheduler import AdaptiveScheduler
+from led_bank import LedBank
+from led_animator import LedAnimator, chase, jackpot_flash
+from sound_pool import SoundPool
+from startup import StartupProfile
+from session_log import SessionRecorder
+from score_store import ScoreStore
+import cabinet_feed
+import metrics_http
+from debouncer import SwitchDebouncer
+from keypad import Keypad
+from max7219 import MAX7219
+from game_engine import (GameEngine, LEDS, SOUND, SERVO, DISPLAY, JACKPOT, BANNER, ATTRACT,
+                         GAME_OVER, GAME_START, GAME_LEFT, GAMBLING)
 
 # TM1637 7段顯示器控制類
 class TM1637:
@@ -38,113 +58,167 @@ class TM1637:
         ' ': 0x00 # 0b00000000 (Blank)
     }
 
-    def __init__(self, clk_pin, dio_pin):
+    # Command bytes
+    DATA_FIXED_ADDRESS = 0x44 # Data command: write to a fixed address, normal mode
+    ADDRESS_BASE = 0xC0 # Address command for digit 0 (digits are 0xC0-0xC3)
+    DISPLAY_ON = 0x88 # Display control: display on, OR'ed with brightness 0-7
+
+    # Precomputed segment frames for 0-9999, filled in by _build_frames() below
+    FRAMES = ()
+
+    # Half clock period on the bus. The TM1637 accepts CLK up to 250 kHz (4 µs period),
+    # so 2 µs per phase runs the bus at the chip's limit.
+    BIT_DELAY_NS = 2000
+
+    def __init__(self, clk_pin, dio_pin, brightness=7, ack_check=False, bit_delay_ns=BIT_DELAY_NS):
         self.clk_pin = clk_pin
         self.dio_pin = dio_pin
-        # Set GPIO pins as output
-        GPIO.setup(self.clk_pin, GPIO.OUT)
-        GPIO.setup(self.dio_pin, GPIO.OUT)
+        self.brightness = brightness
+        # Shadow of what the chip currently holds (None = unknown, forces a write)
+        self._shown = [None] * 4
+        self._data_cmd_sent = None
+        self._control_sent = None
+        self.digit_writes = 0 # Number of single-digit transactions sent
+        # Per-update measurements: pin transitions and wall-clock time of the last update
+        self.updates = 0
+        self.last_update_transitions = 0
+        self.last_update_us = 0.0
+        # Transactions are compiled to pin transition lists once and replayed
+        # (ack_check=False never turns DIO around, see TM1637Encoder)
+        self.encoder = TM1637Encoder(clk_pin, dio_pin, ack_check=ack_check, high=GPIO.HIGH, low=GPIO.LOW)
+        if not bus_timing.is_calibrated():
+            bus_timing.calibrate()
+        self.transmitter = TM1637Transmitter(GPIO, self.encoder, half_period_ns=bit_delay_ns)
+        # Set GPIO pins as output, both lines idle high
+        GPIO.setup(self.clk_pin, GPIO.OUT, initial=GPIO.HIGH)
+        GPIO.setup(self.dio_pin, GPIO.OUT, initial=GPIO.HIGH)
         # Initialize display to off
         self.display_number(0)
 
-    def _start(self):
-        # Start condition for TM1637 communication
-        GPIO.output(self.dio_pin, GPIO.HIGH)
-        GPIO.output(self.clk_pin, GPIO.HIGH)
-        time.sleep(0.000001) # Small delay for clock and data setup
-        GPIO.output(self.dio_pin, GPIO.LOW)
-        time.sleep(0.000001) # Small delay after data goes low
-
-    def _stop(self):
-        # Stop condition for TM1637 communication
-        GPIO.output(self.clk_pin, GPIO.LOW)
-        time.sleep(0.000001) # Small delay after clock goes low
-        GPIO.output(self.dio_pin, GPIO.LOW)
-        time.sleep(0.000001) # Small delay after data goes low
-        GPIO.output(self.clk_pin, GPIO.HIGH)
-        time.sleep(0.000001) # Small delay after clock goes high
-        GPIO.output(self.dio_pin, GPIO.HIGH)
-        time.sleep(0.000001) # Small delay after data goes high
-
-    def _write_byte(self, data):
-        # Write a byte of data to the TM1637, bit by bit (LSB first)
-        for i in range(8):
-            GPIO.output(self.clk_pin, GPIO.LOW) # Clock low to prepare for data change
-            time.sleep(0.000001) # Small delay
-            
-            # Set DIO based on the current bit (LSB first)
-            GPIO.output(self.dio_pin, (data >> i) & 0x01) 
-            time.sleep(0.000001) # Small delay for data to stabilize
-
-            GPIO.output(self.clk_pin, GPIO.HIGH) # Clock high to latch the data
-            time.sleep(0.000001) # Small delay
-
-        # Acknowledge pulse from TM1637 (master releases DIO, slave pulls it low)
-        GPIO.output(self.clk_pin, GPIO.LOW) # Clock low
-        time.sleep(0.000001)
-        GPIO.setup(self.dio_pin, GPIO.IN, pull_up_down=GPIO.PUD_UP) # Switch DIO to input mode to read ACK
-        time.sleep(0.000001)
-        # ack = GPIO.input(self.dio_pin) # Optional: read the ACK signal
-        GPIO.output(self.clk_pin, GPIO.HIGH) # Clock high to signal ACK
-        time.sleep(0.000001) # Wait for ACK pulse
-        GPIO.output(self.clk_pin, GPIO.LOW) # Clock low to end ACK pulse
-        time.sleep(0.000001)
-        GPIO.setup(self.dio_pin, GPIO.OUT) # Switch DIO back to output mode
-        GPIO.output(self.dio_pin, GPIO.HIGH) # Ensure DIO is high after switching back
-        time.sleep(0.000001)
+    @classmethod
+    def _build_frames(cls):
+        """Builds the segment frame (4 digit patterns) for every number 0-9999."""
+        digits = [cls.SEGMENTS[d] for d in range(10)]
+        return tuple(
+            (digits[n // 1000], digits[n // 100 % 10], digits[n // 10 % 10], digits[n % 10])
+            for n in range(10000)
+        )
 
+    def _send(self, *payload):
+        # One transaction (start, bytes, ACK slots, stop) from the precompiled waveform cache
+        return self.transmitter.send(payload)
 
     def display_number(self, number):
         """
         Displays a number (up to 4 digits) on the 7-segment display.
         Handles leading zeros and limits to 4 digits.
+        Only the digits that differ from what the chip already shows are sent,
+        each as a fixed-address write.
         """
         # Ensure number is within valid range for 4 digits (0-9999)
         number = max(0, min(9999, int(number)))
-        
-        # Convert number to a 4-character string, padding with leading zeros
-        num_str = str(number).zfill(4)
-        
-        display_data = []
-        for digit_char in num_str:
-            # Convert each character digit back to an integer and get its segment pattern
-            digit_val = int(digit_char)
-            # Use .get() with a default of blank (0x00) for robustness
-            display_data.append(self.SEGMENTS.get(digit_val, self.SEGMENTS[' '])) 
-
-        # Command 1: Data command (auto address increment, normal mode)
-        self._start()
-        self._write_byte(0x40) 
-        self._stop()
-
-        # Command 2: Address command (start address 0)
-        self._start()
-        self._write_byte(0xC0) 
-        for data in display_data:
-            self._write_byte(data) # Write each digit's segment data
-        self._stop()
-
-        # Command 3: Display control command (display on, max brightness)
-        self._start()
-        self._write_byte(0x88 | 0x07) # 0x88 = Display ON, 0x07 = 7/8 brightness (max)
-        self._stop()
+        frame = self.FRAMES[number]
+        shown = self._shown
+
+        if frame[0] == shown[0] and frame[1] == shown[1] and frame[2] == shown[2] and frame[3] == shown[3]:
+            return # Nothing changed
+
+        transmitter = self.transmitter
+        t0 = time.perf_counter_ns()
+        transitions_before = transmitter.transitions
+
+        # Command 1: Data command (fixed address, normal mode), only sent once
+        if self._data_cmd_sent != self.DATA_FIXED_ADDRESS:
+            self._send(self.DATA_FIXED_ADDRESS)
+            self._data_cmd_sent = self.DATA_FIXED_ADDRESS
+
+        # Command 2: Address command + segment data, for each changed digit only
+        for position in range(4):
+            segments = frame[position]
+            if segments != shown[position]:
+                self._send(self.ADDRESS_BASE | position, segments)
+                shown[position] = segments
+                self.digit_writes += 1
+
+        # Command 3: Display control command (display on + brightness), only when changed
+        control = self.DISPLAY_ON | (self.brightness & 0x07)
+        if self._control_sent != control:
+            self._send(control)
+            self._control_sent = control
+
+        self.updates += 1
+        self.last_update_transitions = transmitter.transitions - transitions_before
+        self.last_update_us = (time.perf_counter_ns() - t0) / 1000.0
+
+    def stats(self):
+        """Returns driver counters: updates, digit writes, last update cost and bus totals."""
+        stats = self.transmitter.stats()
+        stats.update({
+            'bus_delay': bus_timing.stats.summary(),
+            'updates': self.updates,
+            'digit_writes': self.digit_writes,
+            'last_update_transitions': self.last_update_transitions,
+            'last_update_us': self.last_update_us,
+            'waveforms_cached': self.encoder.cache_size(),
+        })
+        return stats
+
+    def set_brightness(self, brightness):
+        """Sets the brightness (0-7); sent with the next display update."""
+        self.brightness = max(0, min(7, int(brightness)))
+
+    def invalidate(self):
+        """Forgets the shadow state so the next update rewrites everything (e.g. after a chip reset)."""
+        self._shown = [None] * 4
+        self._data_cmd_sent = None
+        self._control_sent = None
+
+TM1637.FRAMES = TM1637._build_frames()
+
+def _engine_attr(name):
+    """Game state lives in the engine; PinballGame exposes it under the same name."""
+    return property(lambda self: getattr(self.engine, name),
+                    lambda self, value: setattr(self.engine, name, value))
+
 
 class PinballGame:
+    # Rules and game state are in GameEngine (game_engine.py); this class feeds it input
+    # and carries out its effects on the screen, LEDs, servo, display and speakers.
+    current_game = _engine_attr('current_game') # 0: Main Menu, 1: Game 1, 2: Game 2, 3: Game 3
+    game_active = _engine_attr('game_active')
+    score = _engine_attr('score')
+    game_time = _engine_attr('game_time')
+    game_duration = _engine_attr('game_duration')
+    points = _engine_attr('points')
+    bet_amount = _engine_attr('bet_amount')
+    multiplier = _engine_attr('multiplier')
+    game2_round_active = _engine_attr('game2_round_active')
+    game2_game_over = _engine_attr('game2_game_over')
+
     def __init__(self):
-        # Initialize pygame modules
-        pygame.init()
-        pygame.mixer.init()
-        
-        # Screen settings
-        self.screen_width = 1024
-        self.screen_height = 768
-        self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-        pygame.display.set_caption("Pinball Game System")
+        # Startup stages are timed and logged when the first frame is up (see run)
+        self.startup = StartupProfile()
+
+        # Initialize only the pygame modules the game uses. The mixer is opened by the
+        # sound loader in the background (see load_sounds).
+        with self.startup.stage('video'):
+            pygame.display.init()
+            pygame.font.init()
+
+            # Screen settings
+            self.screen_width = 1024
+            self.screen_height = 768
+            self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
+            pygame.display.set_caption("Pinball Game System")
         
         # Font settings
-        self.font_large = pygame.font.Font(None, 72)
-        self.font_medium = pygame.font.Font(None, 48)
-        self.font_small = pygame.font.Font(None, 36)
+        with self.startup.stage('fonts'):
+            self.font_large = pygame.font.Font(None, 72)
+            self.font_medium = pygame.font.Font(None, 48)
+            self.font_small = pygame.font.Font(None, 36)
+            self.font_debug = pygame.font.Font(None, 24) # Profiler overlay
+        # Rendered text cache: static strings are rendered once, numbers use digit atlases
+        self.text = TextCache(max_entries=256)
         
         # Color definitions
         self.BLACK = (0, 0, 0)
@@ -158,225 +232,339 @@ class PinballGame:
         self.CYAN = (0, 255, 255)
         self.PINK = (255, 192, 203)
         
-        # GPIO setup
-        GPIO.setmode(GPIO.BOARD) # Use board pin numbering
+        # LED grid on screen: size, spacing and the color of each LED when lit
+        self.LED_SIZE = 60
+        self.LED_SPACING = 80
+        self.LED_COLORS = [self.RED, self.GREEN, self.BLUE, self.YELLOW,
+                           self.ORANGE, self.PURPLE, self.CYAN, self.PINK]
         
-        # LED pins - Ensure these are connected correctly on your RPi
-        self.led_pins = [40, 38, 36, 18, 32, 26, 24, 22] 
-        # Microswitch pins - Ensure these are connected correctly on your RPi
-        self.switch_pins = [3, 5, 7, 11, 13, 15, 19, 21] 
+        # Retained-mode rendering state (see render_frame)
+        self.MAX_BACKGROUNDS = 16
+        self.backgrounds = {} # Screen key -> baked background surface
+        self.background_key = None
+        self.background = None
+        self.widget_rects = {} # Widget name -> (state, rect) as last drawn
+        self.banner = None # (text, color, until) from show_banner()
+        self.pixels_pushed = 0 # Total pixels sent with pygame.display.update
         
-        # Configure GPIO for LEDs as outputs (initially off)
-        for pin in self.led_pins:
-            GPIO.setup(pin, GPIO.OUT)
-            GPIO.output(pin, GPIO.LOW)
-            
-        # Configure GPIO for switches as inputs with pull-up resistors
-        for pin in self.switch_pins:
-            GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-            
-        # --- Servo Motor Setup ---
-        self.servo_pin = 31 # SG90 servo control pin
-        GPIO.setup(self.servo_pin, GPIO.OUT)
-        self.servo_pwm = GPIO.PWM(self.servo_pin, 50) # 50Hz PWM for SG90
-        self.servo_pwm.start(0) # Start with 0 duty cycle, will set to default 90 degrees in next line
-        self.set_servo_angle(90) # Default position for servo
-        # --- End Servo Motor Setup ---
-
-        # 7-segment display (CLK on pin 33, DIO on pin 35)
-        self.display = TM1637(33, 35)
+        # GPIO setup
+        with self.startup.stage('gpio'):
+            GPIO.setmode(GPIO.BOARD) # Use board pin numbering
+
+            # LED pins - Ensure these are connected correctly on your RPi
+            self.led_pins = [40, 38, 36, 18, 32, 26, 24, 22] 
+            # Microswitch pins - Ensure these are connected correctly on your RPi
+            self.switch_pins = [3, 5, 7, 11, 13, 15, 19, 21] 
+
+            # Configure GPIO for LEDs as outputs (initially off). LED state is kept as a bitmask
+            # (bit i = LED i); update_leds() writes only the pins that changed, in one call.
+            self.leds = LedBank(GPIO, self.led_pins)
+            # Light shows (attract mode, jackpot) play on their own timing thread over the game state
+            self.animator = LedAnimator(self.leds)
+            self.ATTRACT_PATTERN = chase(len(self.led_pins), step_ms=90, cycles=2) + \
+                chase(len(self.led_pins), step_ms=90, cycles=2, reverse=True)
+
+            # Configure GPIO for switches as inputs with pull-up resistors (one batched call)
+            GPIO.setup(self.switch_pins, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+
+            # --- Servo Motor Setup ---
+            self.servo_pin = 31 # SG90 servo control pin
+            GPIO.setup(self.servo_pin, GPIO.OUT)
+            self.servo_pwm = GPIO.PWM(self.servo_pin, 50) # 50Hz PWM for SG90
+            self.servo_pwm.start(0) # Start with 0 duty cycle, will set to default 90 degrees in next line
+            # Moves run on the servo controller thread; nothing in the game waits for them
+            self.servo = ServoController(self.servo_pwm, settle_time=0.5)
+            self.set_servo_angle(90) # Default position for servo (homes in the background)
+            # --- End Servo Motor Setup ---
+
+        # 7-segment display: bit-banged TM1637 (CLK on pin 33, DIO on pin 35) by default, or
+        # PINBALL_DISPLAY=max7219 for a MAX7219 module on SPI bus 0, CE0
+        self.DISPLAY_DRIVER = os.environ.get('PINBALL_DISPLAY', 'tm1637').lower()
+        # The display is driven from a background worker so the game loop never waits on
+        # the bus; the worker keeps the same display_number() interface. The driver is
+        # opened (bus calibration and display clear) on the worker thread too.
+        self.DISPLAY_REFRESH_HZ = 10 # The timer only shows 0.1s resolution
+        # Switch-to-feedback latency tracing (PINBALL_LATENCY_REPORT=1 prints the table on exit)
+        self.latency = LatencyTracer()
+        # Trace of the switch hit whose effects are being applied (its display posts are traced)
+        self.hit_trace = None
+        self.display = DisplayWorker(self._open_display, max_rate_hz=self.DISPLAY_REFRESH_HZ,
+                                     on_transmit=self.latency.display_written,
+                                     open_driver=True)
         
         # Sound loading
-        self.sounds = {}
-        self.load_sounds()
+        # Effects are decoded in the background (sounds.ready is a Future) and played on a
+        # reserved channel pool: a jackpot can cut off a hit, never the other way round
+        self.SOUND_PRIORITIES = {'hit': 1, 'score': 2, 'jackpot': 3}
+        self.sounds = SoundPool(self.SOUND_PRIORITIES, num_channels=4, min_interval_s=0.05)
+        self.startup.track('audio', self.load_sounds())
         
         # Game state variables
-        self.current_game = 0  # 0: Main Menu, 1: Game 1, 2: Game 2, 3: Game 3
+        self.engine = GameEngine(round_rng=self.round_rng)
         self.running = True
         self.clock = pygame.time.Clock()
+        self.FPS = 60
+
+        # Frame profiler: F3 toggles the overlay, PINBALL_PROFILE_CSV=<file> exports on exit
+        # 50 µs buckets up to the largest metrics bucket bound (plus the overflow bucket)
+        self.profiler = FrameProfiler(budget_ms=1000.0 / self.FPS, bucket_us=50,
+                                      buckets=int(self.FRAME_TIME_BUCKETS_S[-1] * 1e6) // 50 + 1)
+        self.profile_csv = os.environ.get('PINBALL_PROFILE_CSV')
+        # Gameplay log for replay.py: PINBALL_RECORD=<file> records frames, keys, switch
+        # hits, RNG seeds and the score/points trace (a SessionReplay stands in on replay)
+        record_path = os.environ.get('PINBALL_RECORD')
+        self.session = SessionRecorder(record_path) if record_path else None
+        # High scores, session stats and switch hit counts: PINBALL_SCORES=<file> (empty
+        # to disable). Written by a background thread; the game only touches the cache.
+        scores_path = os.environ.get('PINBALL_SCORES', 'scores.db')
+        self.scores = ScoreStore(scores_path) if scores_path else None
+        # Live feed to a multi-cabinet aggregator: PINBALL_FEED=<socket path or host:port>,
+        # PINBALL_TABLE=<table id>. Sent from a background thread, dropped if it falls behind.
+        feed_address = os.environ.get('PINBALL_FEED')
+        self.feed = None
+        if feed_address:
+            table = os.environ.get('PINBALL_TABLE', '1')
+            try:
+                self.feed = cabinet_feed.FeedPublisher(feed_address, int(table))
+            except ValueError:
+                raise ValueError(f"PINBALL_TABLE must be a table id from 0 to {cabinet_feed.MAX_TABLE}, "
+                                 f"not {table!r}") from None
+        self.play_game = 0
+        self.play_started = None # Wall-clock start of the game being played, None between games
+        self.play_t0 = 0.0
+        self.play_hits = 0
         
         # Game variables initialization
         self.reset_game_variables()
 
         # --- Initialize GPIO Event Detection ---
-        # Debounce time for each switch (milliseconds), using GPIO's built-in bouncetime here
-        self.GPIO_DEBOUNCE_TIME_MS = 150 # Recommended value, adjust based on actual switch
+        # Switches are debounced in software from the raw edges (both directions): after a
+        # press, edges within the hold window are bounce, and a new press needs the switch
+        # to have stayed open for the release window. Windows are re-tuned per switch
+        # from the bounce measured on it.
+        self.DEBOUNCE_HOLD_MS = 10
+        self.DEBOUNCE_RELEASE_MS = 8
+        self.debouncer = SwitchDebouncer(len(self.switch_pins), hold_ms=self.DEBOUNCE_HOLD_MS,
+                                         release_ms=self.DEBOUNCE_RELEASE_MS)
+        self.switch_index = {pin: i for i, pin in enumerate(self.switch_pins)}
         
-        # Queue to store button events, for cross-thread communication
-        self.event_queue = []
-        # Lock to protect event_queue access
-        self.queue_lock = threading.Lock() 
+        # Ring buffer of (switch index, timestamp) events from the GPIO callback thread to the
+        # game loop. Fixed size and lock-free; when full the oldest events are dropped so a
+        # stalled frame cannot replay a long burst of stale hits.
+        self.SWITCH_QUEUE_CAPACITY = 32
+        self.event_queue = SwitchEventRing(self.SWITCH_QUEUE_CAPACITY, overflow=DROP_OLDEST)
+
+        # Frame pacing: full rate only while something is moving; otherwise the loop blocks
+        # until a key/window event or a switch hit, running at least IDLE_FPS frames per second
+        self.IDLE_FPS = 2
+        self.scheduler = AdaptiveScheduler(self.clock, active_fps=self.FPS, idle_fps=self.IDLE_FPS,
+                                           has_pending=lambda: len(self.event_queue) > 0)
 
         for i, pin in enumerate(self.switch_pins):
-            # Add GPIO event detection: Trigger when pin goes from high to low (Falling edge)
-            # And use built-in bouncetime for debouncing
-            GPIO.add_event_detect(pin, GPIO.FALLING, callback=self._gpio_callback_wrapper, bouncetime=self.GPIO_DEBOUNCE_TIME_MS)
+            # Add GPIO event detection on both edges, without bouncetime (see debouncer)
+            GPIO.add_event_detect(pin, GPIO.BOTH, callback=self._gpio_callback_wrapper)
         # --- End of GPIO Event Detection Initialization ---
 
-        # Game 2 specific state: True if a gambling round is actively in progress
-        self.game2_round_active = False 
-        self.game2_game_over = False # New flag to indicate if Game 2 is completely over
+        # Optional 4x4 keypad in place of a USB keyboard: PINBALL_KEYPAD="rows:cols" with
+        # comma-separated BOARD pins, e.g. "29,31,33,35:32,36,38,40" (those defaults from
+        # keyboard.py share pins with the servo, display and LEDs, so rewire first).
+        # Its keys are translated to the pygame keys handle_events already understands.
+        self.KEYPAD_MAP = {
+            '1': pygame.K_1, '2': pygame.K_2, '3': pygame.K_3,
+            'A': pygame.K_SPACE, 'B': pygame.K_r, 'C': pygame.K_m, 'D': pygame.K_ESCAPE,
+            '4': pygame.K_LEFT, '6': pygame.K_RIGHT, '#': pygame.K_UP, '*': pygame.K_DOWN,
+        }
+        self.keypad = None
+        keypad_pins = os.environ.get('PINBALL_KEYPAD')
+        if keypad_pins:
+            rows, cols = ([int(pin) for pin in part.split(',')] for part in keypad_pins.split(':'))
+            self.keypad = Keypad(GPIO, rows, cols, on_event=self.scheduler.wake)
+
+        # Prometheus metrics on http://127.0.0.1:<port>/metrics: PINBALL_METRICS=<port> or
+        # <host:port>. Scrapes read the existing counters on the server thread (collect_metrics).
+        self.metrics = None
+        metrics_address = os.environ.get('PINBALL_METRICS')
+        if metrics_address:
+            host, _, port = metrics_address.rpartition(':')
+            self.metrics = metrics_http.MetricsServer(self.collect_metrics, port=int(port), host=host or '127.0.0.1')
+
+        # Start background music once the mixer is open
+        self.sounds.ready.add_done_callback(lambda _: self.play_background_music())
 
-        # Start background music
-        self.play_background_music()
+        # The game opens on the main menu: run the attract-mode light show
+        self.start_attract_mode()
 
     def set_servo_angle(self, angle):
         """
-        Sets the SG90 servo motor to a specified angle.
+        Sets the SG90 servo motor to a specified angle without blocking.
         SG90 typically maps 0-180 degrees to 2-12.5% duty cycle at 50Hz.
         A duty cycle of 2.5% is 0 degrees, 7.5% is 90 degrees, 12.5% is 180 degrees.
         The formula (angle / 18) + 2 is derived from this.
+        The servo controller drives the move, gives it 0.5s to settle and then drops
+        the duty cycle to 0. Returns a MoveHandle that can be waited on if needed.
         """
-        # Calculate duty cycle based on the provided formula
-        duty = 2 + (angle / 18)
-        self.servo_pwm.ChangeDutyCycle(duty)
-        # This sleep is to allow the servo to physically move to the position.
-        # It will block the main game loop for 0.5 seconds.
-        # For fluid gameplay, this might be too long and could be optimized
-        # by managing movement over multiple frames or in a separate thread.
-        time.sleep(0.5)
+        return self.servo.move_to(angle)
         
     def _gpio_callback_wrapper(self, channel):
         """Wrapper for GPIO event callback, adds triggered event to queue."""
+        # Timestamp first, so latency tracing starts as close to the edge as possible
+        t_callback = time.monotonic_ns()
         # Find the switch_index corresponding to the triggered channel
-        try:
-            switch_index = self.switch_pins.index(channel)
-            with self.queue_lock:
-                self.event_queue.append(switch_index)
-        except ValueError:
+        switch_index = self.switch_index.get(channel)
+        if switch_index is None:
             print(f"Error: Unknown GPIO channel {channel} triggered callback.")
+            return
+        # No GPIO.input here: by now the pin may already show a later level (see debouncer)
+        if self.debouncer.edge(switch_index, edge_time_ns()):
+            self.event_queue.push(switch_index, t_callback)
+            self.scheduler.wake() # The main loop may be idle-waiting
 
     def process_gpio_events(self):
         """Processes GPIO events from the queue."""
-        with self.queue_lock:
-            events_to_process = list(self.event_queue)
-            self.event_queue.clear()
-        
-        for switch_index in events_to_process:
+        self.event_queue.drain(self._handle_switch_event)
+        # Let the debouncer catch up on edges the kernel merged (pull-up: pressed reads low)
+        now = edge_time_ns()
+        for i, pin in enumerate(self.switch_pins):
+            self.debouncer.check(i, GPIO.input(pin) == GPIO.LOW, now)
+
+    def _handle_switch_event(self, switch_index, t_callback):
+        if self.session is not None:
+            self.session.switch(switch_index)
+        self.hit_trace = self.latency.begin(switch_index, self.current_game, t_callback)
+        try:
             self.on_switch_pressed(switch_index)
+        finally:
+            self.hit_trace = None
 
 
+    def _open_display(self):
+        """Creates the display driver (runs on the display worker thread)."""
+        with self.startup.stage('display'):
+            if self.DISPLAY_DRIVER == 'max7219':
+                return MAX7219(bus=0, device=0, speed_hz=10000000, digits=4)
+            return TM1637(33, 35)
+
     def load_sounds(self):
-        """Loads sound files for the game."""
+        """Starts loading the sound effects in the background. Returns the readiness Future."""
         sound_files = {
-            'background': 'sounds/background.wav',
             'hit': 'sounds/hit.wav',
             'score': 'sounds/score.wav',
             'jackpot': 'sounds/jackpot.wav'
         }
-        
-        for name, file_path in sound_files.items():
-            try:
-                if os.path.exists(file_path):
-                    self.sounds[name] = pygame.mixer.Sound(file_path)
-                    print(f"Loaded sound effect: {name}")
-                else:
-                    print(f"Sound file does not exist: {file_path}")
-            except Exception as e:
-                print(f"Failed to load sound {name}: {e}")
+        return self.sounds.load(sound_files)
                 
     def play_background_music(self):
-        """Plays the background music in a loop."""
+        """Plays the background music in a loop (streamed from disk by the mixer, not preloaded)."""
+        music_file = 'sounds/background.wav'
         try:
-            if 'background' in self.sounds:
-                pygame.mixer.music.load('sounds/background.wav')
+            if os.path.exists(music_file):
+                pygame.mixer.music.load(music_file)
                 pygame.mixer.music.play(-1)  # Play indefinitely
                 pygame.mixer.music.set_volume(0.3) # Set volume
         except Exception as e:
             print(f"Failed to play BGM: {e}")
             
     def play_sound(self, sound_name):
-        """Plays a specific sound effect."""
-        if sound_name in self.sounds:
-            self.sounds[sound_name].play()
+        """Plays a specific sound effect (skipped if not loaded yet, retriggered too fast or outranked)."""
+        self.sounds.play(sound_name)
+
+    def start_attract_mode(self):
+        """Loops the attract-mode light show while the main menu is up."""
+        self.animator.play(self.ATTRACT_PATTERN, loop=True)
             
     def reset_game_variables(self):
         """Resets all game-specific variables."""
-        self.score = 0
-        self.game_time = 0
-        self.game_duration = 30  # Game duration in seconds (still applies to Game 1 and 3)
-        self.game_active = False # Overall game activity for Game 1 and 3. For Game 2, only for initial entry.
-        self.led_states = [False] * 8 # All LEDs off
-        self.switch_states = [False] * 8 # Current state of switches (unused for primary detection)
-        self.last_switch_states = [False] * 8 # Previous state of switches (no longer needed, but kept for robustness)
-        
-        # Game 2 specific variables (reset when entering Game 2 or restarting Game 2)
-        self.points = 100  # Starting points for gambling game
-        self.bet_amount = 10  # Default bet amount
-        self.multiplier = 2  # Default multiplier
-        self.target_leds = []  # LEDs that grant a win in Game 2
-        self.game2_round_active = False # Reset round active state when overall game variables are reset
-        self.game2_game_over = False # Reset Game 2 specific game over flag
+        self.engine.reset()
+        self.apply_effects()
+
+    @property
+    def target_leds(self):
+        """LEDs that grant a win in the current Game 2 round."""
+        return self.engine.target_leds()
+
+    def apply_effects(self):
+        """Carries out (and clears) the effect commands queued by the engine."""
+        effects = self.engine.effects
+        for kind, arg in effects:
+            if kind == LEDS:
+                if arg and self.animator.is_playing():
+                    # New targets/lit LEDs must not hide behind a jackpot flash still running.
+                    # Not waited for: the animator thread releases its override, which writes
+                    # the mask set below to the pins.
+                    self.animator.cancel()
+                self.leds.set_mask(arg)
+                self.update_leds()
+            elif kind == SOUND:
+                self.play_sound(arg)
+            elif kind == DISPLAY:
+                if self.hit_trace is not None:
+                    # Only a value posted for this hit counts as its display feedback, not
+                    # e.g. the timer refresh of a later frame
+                    self.latency.display_posted(self.hit_trace)
+                self.display.display_number(arg)
+            elif kind == SERVO:
+                self.set_servo_angle(arg)
+            elif kind == JACKPOT:
+                self.animator.play(jackpot_flash(len(self.led_pins), self.engine.target_mask))
+                print(f"Jackpot! You win {arg} points!")
+            elif kind == BANNER:
+                # Drawn by the renderer, nothing waits for it
+                self.show_banner(arg, self.RED, 1.5)
+            elif kind == ATTRACT:
+                if arg:
+                    self.start_attract_mode()
+                else:
+                    self.animator.cancel()
+            elif kind == GAME_OVER:
+                if self.current_game == GAMBLING and arg <= 0:
+                    print("Game Over! Points exhausted in Gambling Game!")
+                else:
+                    print(f"Game Over! Final value: {arg}")
+                self.finish_play(arg, completed=True)
+            elif kind == GAME_LEFT:
+                self.finish_play(arg, completed=False)
+            elif kind == GAME_START:
+                print(f"Game {arg} started")
+                if self.feed is not None:
+                    self.feed.publish(cabinet_feed.GAME_START, arg)
+                self.play_game = arg
+                self.play_started = time.time()
+                self.play_t0 = time.monotonic()
+                self.play_hits = 0
+        effects.clear()
+
+    def finish_play(self, value, completed):
+        """Publishes the game just ended, and queues it for the score store (abandoned ones only after a hit)."""
+        started = self.play_started
+        self.play_started = None
+        if self.feed is not None and started is not None:
+            self.feed.publish(cabinet_feed.GAME_OVER if completed else cabinet_feed.GAME_LEFT,
+                              self.play_game, value)
+        if self.scores is None or started is None or (not completed and self.play_hits == 0):
+            return
+        self.scores.record_session(self.play_game, started, time.monotonic() - self.play_t0,
+                                   value, self.play_hits, completed)
+        if completed:
+            best = [entry[0] for entry in self.scores.top_scores(self.play_game)[:5]]
+            print(f"High scores: {best}")
             
     def update_leds(self):
-        """Updates the physical LEDs based on their boolean states."""
-        for i, state in enumerate(self.led_pins):
-            GPIO.output(self.led_pins[i], GPIO.HIGH if self.led_states[i] else GPIO.LOW)
+        """Updates the physical LEDs: only changed pins are written, in a single batched call."""
+        self.leds.flush()
+        self.latency.mark('led')
             
     def on_switch_pressed(self, switch_index):
         """Handles logic when a microswitch is pressed. (Now as a GPIO event callback)"""
-        self.play_sound('hit') # Play a generic hit sound
         print(f"Switch {switch_index+1} pressed!") # Add print for detected press
-        
-        # Delegate to specific game handler
-        if self.current_game == 1:
-            self.handle_game1_switch(switch_index)
-        elif self.current_game == 2:
-            self.handle_game2_switch(switch_index)
-        elif self.current_game == 3:
-            self.handle_game3_switch(switch_index)
-            
-    def handle_game1_switch(self, switch_index):
-        """Logic for Game 1 (Lighting Up) when a switch is pressed."""
-        if self.game_active:
-            if not self.led_states[switch_index]: # If LED is not already lit
-                self.led_states[switch_index] = True # Light it up
-                self.score += 10 # Increase score
-                self.play_sound('score') # Play score sound
-                self.update_leds() # Update physical LEDs
-                
-    def handle_game2_switch(self, switch_index):
-        """Logic for Game 2 (Gambling) when a switch is pressed."""
-        # Only process if a round is actually active and game is not over
-        if self.game2_round_active and not self.game2_game_over: 
-            if switch_index in self.target_leds:
-                win_amount = self.bet_amount * self.multiplier
-                self.points += win_amount
-                self.play_sound('jackpot') # Play jackpot sound
-                print(f"Jackpot! You win {win_amount} points!")
-            else:
-                # Deducting bet already happened at start of round. No further deduction for miss.
-                print(f"Miss! No points gained for hitting switch {switch_index+1}.")
-            
-            # --- Servo Motor Action for Game 2 Sensor Press ---
-            self.set_servo_angle(90) # Set motor to 90 degrees when sensor is pressed
-            # --- End Servo Motor Action ---
-
-            # End the current round
-            self.game2_round_active = False
-            self.led_states = [False] * len(self.led_pins) # Turn off all LEDs after round
-            self.update_leds()
-            self.display.display_number(self.points) # Update display with current points
-
-            # Check for game over *after* points update
-            if self.points <= 0:
-                self.game2_game_over = True # Set Game 2 specific game over flag
-                self.end_game() # Call end_game to show "Game Over" screen
-            
-    def handle_game3_switch(self, switch_index):
-        """Logic for Game 3 (Toggle Lighting) when a switch is pressed."""
-        if self.game_active:
-            if self.led_states[switch_index]: # If LED is currently lit
-                self.led_states[switch_index] = False # Turn it off
-                self.score -= 10 # Deduct score
-                print(f"LED {switch_index+1} turned OFF. Score: {self.score}")
-            else: # If LED is currently off
-                self.led_states[switch_index] = True # Turn it on
-                self.score += 10 # Add score
-                print(f"LED {switch_index+1} turned ON. Score: {self.score}")
-            
-            self.update_leds() # Update physical LEDs
-            self.play_sound('score') # Play score sound for any score change
+        if self.scores is not None:
+            self.scores.count_hit(switch_index)
+        if self.play_started is not None:
+            self.play_hits += 1
+        self.engine.switch(switch_index)
+        self.apply_effects()
+        if self.feed is not None:
+            self.feed.publish(cabinet_feed.HIT, switch_index,
+                              self.points if self.current_game == GAMBLING else self.score)
             
     # --- Removed trigger_chain_reaction as it's no longer used for Game 3 ---
     # def trigger_chain_reaction(self, start_index):
@@ -384,13 +572,48 @@ class PinballGame:
     #     # ... (original chain reaction code) ...
     # --- End Removed ---
         
-    def draw_main_menu(self):
-        """Draws the main menu screen."""
-        self.screen.fill(self.BLACK)
-        
-        title = self.font_large.render("Pinball Game System", True, self.WHITE)
-        title_rect = title.get_rect(center=(self.screen_width//2, 100))
-        self.screen.blit(title, title_rect)
+    # --- Rendering ---
+    # The screen is drawn in retained mode: each screen's static layers (titles,
+    # instructions, LED outlines, banners for the current state) are baked into a
+    # background surface once, and only the widgets whose state changed (score, timer,
+    # LED circles, ...) are redrawn and pushed with pygame.display.update(rects).
+
+    def screen_key(self):
+        """Identifies the static layout currently shown; a new key means a new background."""
+        if self.current_game == 0:
+            return (0,)
+        if self.current_game == 2:
+            if self.game2_game_over:
+                return (2, 'over')
+            return (2, 'round') if self.game2_round_active else (2, 'bet')
+        if not self.game_active:
+            if self.game_time >= self.game_duration:
+                return (self.current_game, 'over', self.score) # Final score is part of the static layer
+            return (self.current_game, 'ready')
+        return (self.current_game, 'play')
+
+    def get_background(self, key):
+        """Returns the baked background for a screen key, drawing it on first use."""
+        background = self.backgrounds.get(key)
+        if background is None:
+            if len(self.backgrounds) >= self.MAX_BACKGROUNDS:
+                self.backgrounds.clear() # Explicit, simple bound: old game-over screens are rarely reused
+            background = pygame.Surface(self.screen.get_size()).convert()
+            background.fill(self.BLACK)
+            if self.current_game == 0:
+                self.draw_main_menu(background)
+            elif self.current_game == 1:
+                self.draw_game1(background)
+            elif self.current_game == 2:
+                self.draw_game2(background)
+            elif self.current_game == 3:
+                self.draw_game3(background)
+            self.backgrounds[key] = background
+        return background
+
+    def draw_main_menu(self, surface):
+        """Draws the static layer of the main menu screen."""
+        self.text.blit(surface, self.font_large, "Pinball Game System", self.WHITE, center=(self.screen_width//2, 100))
         
         menu_items = [
             "1 - Lighting Up",
@@ -402,9 +625,7 @@ class PinballGame:
         colors = [self.CYAN, self.YELLOW, self.PINK, self.RED]
         
         for i, item in enumerate(menu_items):
-            text = self.font_medium.render(item, True, colors[i])
-            text_rect = text.get_rect(center=(self.screen_width//2, 250 + i*80))
-            self.screen.blit(text, text_rect)
+            self.text.blit(surface, self.font_medium, item, colors[i], center=(self.screen_width//2, 250 + i*80))
             
         # Display instructions for each game
         instructions = [
@@ -414,83 +635,38 @@ class PinballGame:
         ]
         
         for i, instruction in enumerate(instructions):
-            text = self.font_small.render(instruction, True, self.WHITE)
-            text_rect = text.get_rect(center=(self.screen_width//2, 600 + i*30))
-            self.screen.blit(text, text_rect)
+            self.text.blit(surface, self.font_small, instruction, self.WHITE, center=(self.screen_width//2, 600 + i*30))
             
-    def draw_game1(self):
-        """Draws the Game 1 (Lighting Up) interface."""
-        self.screen.fill(self.BLACK)
-        
-        title = self.font_large.render("Lighting Up", True, self.CYAN)
-        title_rect = title.get_rect(center=(self.screen_width//2, 50))
-        self.screen.blit(title, title_rect)
-        
-        # Display current score
-        score_text = self.font_medium.render(f"Score: {self.score}", True, self.WHITE)
-        self.screen.blit(score_text, (50, 100))
+    def draw_game1(self, surface):
+        """Draws the static layer of the Game 1 (Lighting Up) interface."""
+        self.text.blit(surface, self.font_large, "Lighting Up", self.CYAN, center=(self.screen_width//2, 50))
         
-        # Display remaining time
-        remaining_time = max(0, self.game_duration - self.game_time)
-        time_text = self.font_medium.render(f"Time: {remaining_time:.1f}s", True, self.WHITE)
-        self.screen.blit(time_text, (50, 150))
-        
-        # Draw the LED grid representation
-        self.draw_led_grid()
+        # Draw the LED grid outlines and numbers
+        self.draw_led_grid(surface)
         
         if not self.game_active:
             if self.game_time >= self.game_duration:
                 # Game over screen
-                end_text = self.font_large.render("Game Over", True, self.RED)
-                end_rect = end_text.get_rect(center=(self.screen_width//2, 400))
-                self.screen.blit(end_text, end_rect)
-                
-                final_score = self.font_medium.render(f"Final Score: {self.score}", True, self.YELLOW)
-                final_rect = final_score.get_rect(center=(self.screen_width//2, 450))
-                self.screen.blit(final_score, final_rect)
-                
-                restart_text = self.font_small.render("Press R to restart, press M to go back to menu", True, self.WHITE)
-                restart_rect = restart_text.get_rect(center=(self.screen_width//2, 500))
-                self.screen.blit(restart_text, restart_rect)
+                self.text.blit(surface, self.font_large, "Game Over", self.RED, center=(self.screen_width//2, 400))
+                self.text.blit_value(surface, self.font_medium, self.YELLOW, "Final Score: ", str(self.score), center=(self.screen_width//2, 450))
+                self.text.blit(surface, self.font_small, "Press R to restart, press M to go back to menu", self.WHITE, center=(self.screen_width//2, 500))
             else:
                 # Instructions before game starts
-                start_text = self.font_medium.render("Press SPACE to start", True, self.GREEN)
-                start_rect = start_text.get_rect(center=(self.screen_width//2, 400))
-                self.screen.blit(start_text, start_rect)
+                self.text.blit(surface, self.font_medium, "Press SPACE to start", self.GREEN, center=(self.screen_width//2, 400))
                 
-    def draw_game2(self):
-        """Draws the Game 2 (Gambling) interface."""
-        self.screen.fill(self.BLACK)
-        
-        title = self.font_large.render("Gambling Game", True, self.YELLOW)
-        title_rect = title.get_rect(center=(self.screen_width//2, 50))
-        self.screen.blit(title, title_rect)
-        
-        # Display current points
-        points_text = self.font_medium.render(f"Points: {self.points}", True, self.WHITE)
-        self.screen.blit(points_text, (50, 100))
-        
-        # Display current bet amount and multiplier
-        bet_text = self.font_medium.render(f"Bet: {self.bet_amount}", True, self.WHITE)
-        self.screen.blit(bet_text, (50, 150))
-        
-        multiplier_text = self.font_medium.render(f"Multiplier: {self.multiplier}x", True, self.WHITE)
-        self.screen.blit(multiplier_text, (50, 200))
+    def draw_game2(self, surface):
+        """Draws the static layer of the Game 2 (Gambling) interface."""
+        self.text.blit(surface, self.font_large, "Gambling Game", self.YELLOW, center=(self.screen_width//2, 50))
         
         # Removed time display as requested for Game 2
         
-        # Draw the LED grid representation
-        self.draw_led_grid()
+        # Draw the LED grid outlines and numbers
+        self.draw_led_grid(surface)
         
         if self.game2_game_over: 
             # Game over due to points exhausted
-            end_text = self.font_large.render("Game Over - Points Exhausted!", True, self.RED)
-            end_rect = end_text.get_rect(center=(self.screen_width//2, 400))
-            self.screen.blit(end_text, end_rect)
-            
-            restart_text = self.font_small.render("Press R to restart Game 2, press M to go back to menu", True, self.WHITE)
-            restart_rect = restart_text.get_rect(center=(self.screen_width//2, 500))
-            self.screen.blit(restart_text, restart_rect)
+            self.text.blit(surface, self.font_large, "Game Over - Points Exhausted!", self.RED, center=(self.screen_width//2, 400))
+            self.text.blit(surface, self.font_small, "Press R to restart Game 2, press M to go back to menu", self.WHITE, center=(self.screen_width//2, 500))
         elif not self.game2_round_active: # If no round is active (player can adjust bet/multiplier or start new round)
             controls = [
                 "UP/DOWN: Adjust Bet Amount",
@@ -499,310 +675,346 @@ class PinballGame:
             ]
             
             for i, control in enumerate(controls):
-                text = self.font_small.render(control, True, self.WHITE)
-                text_rect = text.get_rect(center=(self.screen_width//2, 400 + i*30))
-                self.screen.blit(text, text_rect)
+                self.text.blit(surface, self.font_small, control, self.WHITE, center=(self.screen_width//2, 400 + i*30))
         else: # A gambling round is actively in progress
-            round_active_text = self.font_large.render("Round Active! Hit a switch!", True, self.GREEN)
-            round_active_rect = round_active_text.get_rect(center=(self.screen_width//2, 400))
-            self.screen.blit(round_active_text, round_active_rect)
+            self.text.blit(surface, self.font_large, "Round Active! Hit a switch!", self.GREEN, center=(self.screen_width//2, 400))
                 
-    def draw_game3(self):
-        """Draws the Game 3 (Toggle Lighting) interface."""
+    def draw_game3(self, surface):
+        """Draws the static layer of the Game 3 (Toggle Lighting) interface."""
         # No servo action needed here for smooth startup, only at game start via start_game3()
-        self.screen.fill(self.BLACK)
+        self.text.blit(surface, self.font_large, "Toggle Lighting LOL", self.PINK, center=(self.screen_width//2, 50)) # Updated title
         
-        title = self.font_large.render("Toggle Lighting LOL", True, self.PINK) # Updated title
-        title_rect = title.get_rect(center=(self.screen_width//2, 50))
-        self.screen.blit(title, title_rect)
-        
-        # Display current score
-        score_text = self.font_medium.render(f"Score: {self.score}", True, self.WHITE)
-        self.screen.blit(score_text, (50, 100))
-        
-        # Display remaining time
-        remaining_time = max(0, self.game_duration - self.game_time)
-        time_text = self.font_medium.render(f"Time: {remaining_time:.1f}s", True, self.WHITE)
-        self.screen.blit(time_text, (50, 150))
-        
-        # Draw the LED grid representation
-        self.draw_led_grid()
+        # Draw the LED grid outlines and numbers
+        self.draw_led_grid(surface)
         
         if not self.game_active:
             if self.game_time >= self.game_duration:
                 # Game over screen
-                end_text = self.font_large.render("Game Over", True, self.RED)
-                end_rect = end_text.get_rect(center=(self.screen_width//2, 400))
-                self.screen.blit(end_text, end_rect)
-                
-                final_score = self.font_medium.render(f"Final Score: {self.score}", True, self.YELLOW)
-                final_rect = final_score.get_rect(center=(self.screen_width//2, 450))
-                self.screen.blit(final_score, final_rect)
-                
-                restart_text = self.font_small.render("Press R to restart, press M to go back to menu", True, self.WHITE)
-                restart_rect = restart_text.get_rect(center=(self.screen_width//2, 500))
-                self.screen.blit(restart_text, restart_rect)
+                self.text.blit(surface, self.font_large, "Game Over", self.RED, center=(self.screen_width//2, 400))
+                self.text.blit_value(surface, self.font_medium, self.YELLOW, "Final Score: ", str(self.score), center=(self.screen_width//2, 450))
+                self.text.blit(surface, self.font_small, "Press R to restart, press M to go back to menu", self.WHITE, center=(self.screen_width//2, 500))
             else:
                 # Instructions before game starts
-                start_text = self.font_medium.render("Press SPACE to start", True, self.GREEN)
-                start_rect = start_text.get_rect(center=(self.screen_width//2, 400))
-                self.screen.blit(start_text, start_rect)
+                self.text.blit(surface, self.font_medium, "Press SPACE to start", self.GREEN, center=(self.screen_width//2, 400))
                 
                 # Updated instruction for Game 3
-                info_text = self.font_small.render("Hit a switch to toggle LED on/off. +10 for ON, -10 for OFF.", True, self.WHITE)
-                info_rect = info_text.get_rect(center=(self.screen_width//2, 450))
-                self.screen.blit(info_text, info_rect)
+                self.text.blit(surface, self.font_small, "Hit a switch to toggle LED on/off. +10 for ON, -10 for OFF.", self.WHITE, center=(self.screen_width//2, 450))
                 
-    def draw_led_grid(self):
-        """Draws the visual representation of the LEDs on the screen."""
-        led_size = 60
-        led_spacing = 80
+    def led_position(self, i):
+        """Centre of LED i in the on-screen grid."""
         # Calculate starting X to center the LEDs horizontally
-        start_x = (self.screen_width - (len(self.led_pins) * led_spacing - (led_spacing - led_size))) // 2
-        start_y = 300
-        
-        # Colors for each LED (can be customized)
-        colors = [self.RED, self.GREEN, self.BLUE, self.YELLOW, 
-                  self.ORANGE, self.PURPLE, self.CYAN, self.PINK]
-        
+        start_x = (self.screen_width - (len(self.led_pins) * self.LED_SPACING - (self.LED_SPACING - self.LED_SIZE))) // 2
+        return start_x + i * self.LED_SPACING, 300
+
+    def draw_led_grid(self, surface):
+        """Draws the static part of the LED grid: white borders and the LED numbers."""
+        led_size = self.LED_SIZE
         for i in range(len(self.led_pins)):
-            x = start_x + i * led_spacing
-            y = start_y
+            x, y = self.led_position(i)
             
             # Draw background circle for the LED (white border)
-            pygame.draw.circle(self.screen, self.WHITE, (x, y), led_size//2 + 2)
-            
-            # Draw the LED circle (lit or unlit)
-            color = colors[i] if self.led_states[i] else self.BLACK
-            pygame.draw.circle(self.screen, color, (x, y), led_size//2)
+            pygame.draw.circle(surface, self.WHITE, (x, y), led_size//2 + 2)
+            pygame.draw.circle(surface, self.BLACK, (x, y), led_size//2)
             
             # Draw the LED number below it
-            number = self.font_small.render(str(i+1), True, self.WHITE)
-            number_rect = number.get_rect(center=(x, y + led_size//2 + 20))
-            self.screen.blit(number, number_rect)
+            self.text.blit(surface, self.font_small, str(i+1), self.WHITE, center=(x, y + led_size//2 + 20))
             
-            # If it's Game 2, highlight target LEDs with a white ring
-            if self.current_game == 2 and i in self.target_leds:
-                pygame.draw.circle(self.screen, self.WHITE, (x, y), led_size//2 + 5, 3)
-                
+    def draw_led(self, surface, i, lit, target):
+        """Draws LED i (lit or unlit) and, in Game 2, the white ring marking a target LED."""
+        x, y = self.led_position(i)
+        led_size = self.LED_SIZE
+        color = self.LED_COLORS[i] if lit else self.BLACK
+        rect = pygame.draw.circle(surface, color, (x, y), led_size//2)
+        if target:
+            rect = rect.union(pygame.draw.circle(surface, self.WHITE, (x, y), led_size//2 + 5, 3))
+        return rect
+
+    def dynamic_widgets(self):
+        """
+        Lists the parts of the current screen that change: (name, state, draw, args).
+        draw(surface, *args) must return the rect it covered; it is only called when state changed.
+        """
+        widgets = []
+        draw_label = self.draw_label
+        if self.current_game in (1, 3):
+            widgets.append(('score', self.score, draw_label,
+                            (self.font_medium, self.WHITE, "Score: ", str(self.score), "", (50, 100))))
+            remaining_time = f"{max(0, self.game_duration - self.game_time):.1f}"
+            widgets.append(('time', remaining_time, draw_label,
+                            (self.font_medium, self.WHITE, "Time: ", remaining_time, "s", (50, 150))))
+        elif self.current_game == 2:
+            widgets.append(('points', self.points, draw_label,
+                            (self.font_medium, self.WHITE, "Points: ", str(self.points), "", (50, 100))))
+            widgets.append(('bet', self.bet_amount, draw_label,
+                            (self.font_medium, self.WHITE, "Bet: ", str(self.bet_amount), "", (50, 150))))
+            widgets.append(('multiplier', self.multiplier, draw_label,
+                            (self.font_medium, self.WHITE, "Multiplier: ", str(self.multiplier), "x", (50, 200))))
+        if self.current_game != 0:
+            for i in range(len(self.led_pins)):
+                lit = self.engine.is_lit(i)
+                # If it's Game 2, highlight target LEDs with a white ring
+                target = self.current_game == 2 and self.engine.is_target(i)
+                widgets.append((('led', i), (lit, target), self.draw_led, (i, lit, target)))
+        if self.banner is not None:
+            text, color, until = self.banner
+            if time.monotonic() < until:
+                widgets.append(('banner', self.banner, self.draw_banner, (text, color)))
+            else:
+                self.banner = None
+        if self.profiler.overlay_visible:
+            widgets.append(('profiler', self.profiler.overlay_state(), self.profiler.draw_overlay, (self.font_debug,)))
+        return widgets
+
+    def draw_label(self, surface, font, color, prefix, value, suffix, pos):
+        """Draws a "Label: value" line with its top-left corner at pos."""
+        return self.text.blit_value(surface, font, color, prefix, value, suffix, topleft=pos)
+
+    def draw_banner(self, surface, text, color):
+        """Draws the temporary message set by show_banner()."""
+        return self.text.blit(surface, self.font_medium, text, color, center=(self.screen_width//2, self.screen_height - 100))
+
+    def needs_full_rate(self):
+        """True while the screen changes on its own (running timer, timed banner).
+        LED animations (attract show, jackpot flash) run on the animator thread and don't count."""
+        if self.current_game in (1, 3) and self.game_active:
+            return True
+        return self.banner is not None
+
+    def show_banner(self, text, color, seconds):
+        """Shows a temporary message near the bottom of the screen without blocking."""
+        self.banner = (text, color, time.monotonic() + seconds)
+
+    def render_frame(self):
+        """Brings the screen up to date and returns the list of rects that changed."""
+        screen = self.screen
+        key = self.screen_key()
+        widgets = self.dynamic_widgets()
+
+        if key != self.background_key:
+            # New screen: full redraw from its baked background
+            self.background_key = key
+            background = self.background = self.get_background(key)
+            screen.blit(background, (0, 0))
+            drawn = {}
+            for name, state, draw, args in widgets:
+                drawn[name] = (state, draw(screen, *args))
+            self.widget_rects = drawn
+            return [screen.get_rect()]
+
+        previous = self.widget_rects
+        current = {widget[0] for widget in widgets}
+        stale = {widget[0] for widget in widgets
+                 if widget[0] not in previous or previous[widget[0]][0] != widget[1]}
+        removed = [name for name in previous if name not in current]
+        if not stale and not removed:
+            return []
+
+        # Areas to restore from the background: old rects of changed and removed widgets.
+        # Unchanged widgets overlapping those areas must be redrawn as well.
+        restore = [previous[name][1] for name in stale if name in previous]
+        restore += [previous[name][1] for name in removed]
+        grew = True
+        while grew:
+            grew = False
+            for name, _, _, _ in widgets:
+                if name not in stale and previous[name][1].collidelist(restore) != -1:
+                    stale.add(name)
+                    restore.append(previous[name][1])
+                    grew = True
+
+        background = self.background
+        for rect in restore:
+            screen.blit(background, rect, rect)
+        for name in removed:
+            del previous[name]
+        dirty = list(restore)
+        for name, state, draw, args in widgets: # In list order, so overlays stay on top
+            if name in stale:
+                rect = draw(screen, *args)
+                previous[name] = (state, rect)
+                dirty.append(rect)
+        return dirty
+
     def start_game1(self):
         """Initializes and starts Game 1."""
-        self.reset_game_variables() # Reset common game variables
-        self.game_active = True
-        self.game_time = 0
-        print("Game 1 started (Lighting Up)")
-        self.display.display_number(0) # Clear display
-        # --- Servo Motor Action for Game 1 Start ---
-        self.set_servo_angle(0) # Set motor to 0 degrees when Game 1 starts
-        # --- End Servo Motor Action ---
-        
-    def start_game2_round(self): # Renamed for clarity: this starts a *round* of Game 2
-        """Starts a new round of Game 2 (Gambling)."""
-        if self.points < self.bet_amount:
-            print("Not enough points to place the bet!")
-            # Display a temporary message on screen
-            message_text = self.font_medium.render("Not enough points to bet!", True, self.RED)
-            message_rect = message_text.get_rect(center=(self.screen_width//2, self.screen_height - 100))
-            self.screen.blit(message_text, message_rect)
-            pygame.display.flip()
-            time.sleep(1.5) # Show message for a moment
-            return # Do not start round
-
-        self.points -= self.bet_amount # Deduct bet at the start of the round
-        self.game2_round_active = True # Set round to active
-        
-        # --- Servo Motor Action for Game 2 Round Start ---
-        self.set_servo_angle(0) # Set motor to 0 degrees when bet is confirmed
-        # --- End Servo Motor Action ---
-
-        # Determine number of target LEDs based on multiplier
-        if self.multiplier == 2:
-            num_targets = 4
-        elif self.multiplier == 3:
-            num_targets = 2
-        else:  # 5x
-            num_targets = 1
-            
-        # Select random target LEDs for this round
-        self.target_leds = random.sample(range(len(self.led_pins)), num_targets)
+        self.engine.start_game()
+        self.apply_effects()
         
-        # Light up only the target LEDs
-        self.led_states = [False] * len(self.led_pins)
-        for led_index in self.target_leds:
-            self.led_states[led_index] = True
-        self.update_leds()
-        
-        print(f"Game 2 Round started. Bet: {self.bet_amount}, Multiplier: {self.multiplier}x, Target LEDs: {self.target_leds}")
-        self.display.display_number(self.points) # Display current points on 7-segment display
-            
+    def round_rng(self):
+        """Random generator for a Game 2 round, seeded through the session log when there is one."""
+        if self.session is None:
+            return random
+        return random.Random(self.session.seed())
+
     def start_game3(self):
         """Initializes and starts Game 3 (Toggle Lighting).""" # Updated comment
-        self.reset_game_variables() # Reset common game variables
-        self.game_active = True
-        self.game_time = 0
-        # Turn off all LEDs initially for Game 3 (Crucial for toggle logic)
-        self.led_states = [False] * len(self.led_pins)
-        self.update_leds()
-        print("Game 3 started (Toggle Lighting)") # Updated print
-        self.display.display_number(0) # Clear display
-        self.set_servo_angle(0)
+        self.engine.start_game()
+        self.apply_effects()
         
     def update_game_timer(self, dt):
         """Updates the game timer and handles game end."""
         # Timer only runs for Game 1 and 3 when active
-        if self.current_game in [1, 3] and self.game_active:
-            self.game_time += dt
-            
-            # Update the 7-segment display with remaining time (times 10 for 0.1s precision)
-            remaining_time = max(0, self.game_duration - self.game_time)
-            # Ensure the number is an integer for display_number
-            self.display.display_number(int(remaining_time * 10)) 
-            
-            if self.game_time >= self.game_duration:
-                self.end_game()
+        self.engine.tick(dt)
+        self.apply_effects()
                 
     def end_game(self):
         """Ends the current game (or signals Game 2 end if points exhausted)."""
-        # For Game 1 and 3, this ends the game.
-        # For Game 2, this only sets game2_game_over=True. The game_active flag stays True
-        # until the user explicitly returns to the main menu or restarts Game 2.
-        self.game_active = False 
-        self.game2_round_active = False # Ensure Game 2 round is not active
-
-        # Turn off all physical LEDs
-        self.led_states = [False] * len(self.led_pins)
-        self.update_leds()
-        
-        # Display final score/points on the 7-segment display
-        final_value = self.score if self.current_game != 2 else self.points
-        self.display.display_number(final_value)
+        self.engine.end_game()
+        self.apply_effects()
         
-        # Specific message for Game 2 end (points exhausted)
-        if self.current_game == 2 and final_value <= 0:
-            print("Game Over! Points exhausted in Gambling Game!")
+    def keypad_events(self):
+        """Keypad presses since the last frame, as pygame KEYDOWN events."""
+        events = []
+        for key, pressed, _ in self.keypad.get_events():
+            if pressed and key in self.KEYPAD_MAP:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=self.KEYPAD_MAP[key]))
+        return events
+
+    # Upper bounds (seconds) of the frame time histogram buckets
+    FRAME_TIME_BUCKETS_S = (0.001, 0.002, 0.004, 0.008, 0.0125, 1.0 / 60, 0.025, 0.0334, 0.05, 0.1, 0.25)
+
+    def collect_metrics(self):
+        """Metric families for a scrape (runs on the metrics server thread, reads counters only)."""
+        m = metrics_http
+        profiler = self.profiler
+        families = [
+            m.counter('pinball_frames_total', "Frames rendered", profiler.frames),
+            m.counter('pinball_frames_over_budget_total', "Frames longer than the frame budget",
+                      profiler.over_budget),
+            m.histogram('pinball_frame_seconds', "Frame time (events to flip)",
+                        profiler.histograms['frame'], self.FRAME_TIME_BUCKETS_S),
+        ]
+
+        presses = m.counter('pinball_switch_presses_total', "Debounced switch presses")
+        bounces = m.counter('pinball_switch_bounces_total', "Switch openings that reverted inside a debounce window")
+        for i, state in enumerate(self.debouncer.switches):
+            presses.add(state.accepted, switch=str(i + 1))
+            bounces.add(state.bounces, switch=str(i + 1))
+        dropped = m.counter('pinball_events_dropped_total', "Events lost because a queue was full")
+        dropped.add(self.event_queue.dropped, queue='switch')
+        dropped.add(self.sounds.dropped, queue='sound')
+        if self.keypad is not None:
+            dropped.add(self.keypad.dropped, queue='keypad')
+        if self.feed is not None:
+            dropped.add(self.feed.dropped, queue='feed')
+        families += [presses, bounces, dropped]
+
+        driver = self.display.driver # None until the worker has opened it
+        if isinstance(driver, TM1637):
+            transactions = driver.transmitter.transactions
+            bus_seconds = driver.transmitter.busy_ns / 1e9
+        elif isinstance(driver, MAX7219):
+            transactions = driver.transfers
+            bus_seconds = driver.stats()['wire_us_total'] / 1e6
         else:
-            print(f"Game Over! Final value: {final_value}")
+            transactions = bus_seconds = 0
+        families += [
+            m.counter('pinball_display_transactions_total', "7-segment display bus transactions",
+                      transactions, driver=self.DISPLAY_DRIVER),
+            m.counter('pinball_display_bus_seconds_total', "Time spent in display bus transactions",
+                      bus_seconds, driver=self.DISPLAY_DRIVER),
+            m.counter('pinball_servo_moves_total', "Servo moves driven", self.servo.moves),
+            m.counter('pinball_led_pin_writes_total', "LED pin writes", self.leds.pin_writes),
+            m.counter('pinball_sounds_played_total', "Sound effects played", self.sounds.played),
+            m.gauge('pinball_game_mode', "Current game (0 = menu, 1-3 = game number)", self.current_game),
+            m.gauge('pinball_score', "Game 1/3 score", self.score),
+            m.gauge('pinball_points', "Game 2 points", self.points),
+        ]
+        return families
 
-        # --- Servo Motor Action for Game 1 and 3 End ---
-        # Only set servo to 90 degrees if Game 1 or Game 3 ended (not for Game 2 points exhaustion)
-        if self.current_game in [1, 3]:
-            self.set_servo_angle(90) 
-        # --- End Servo Motor Action ---
-        
     def handle_events(self):
-        """Processes Pygame events (keyboard inputs, window close)."""
-        for event in pygame.event.get():
+        """Processes Pygame events (keyboard inputs, window close) and keypad presses."""
+        events = pygame.event.get()
+        woke_on = self.scheduler.take_event() # Event that ended an idle wait comes first
+        if woke_on is not None:
+            events.insert(0, woke_on)
+        if self.keypad is not None:
+            events.extend(self.keypad_events())
+        session = self.session
+        for event in events:
             if event.type == pygame.QUIT:
+                if session is not None:
+                    session.quit()
                 self.running = False # Set flag to exit main loop
                 
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+                if session is not None:
+                    session.key(event.key)
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle_overlay() # Frame profiler overlay, works on every screen
+
+                elif event.key == pygame.K_ESCAPE:
                     if self.current_game == 0:
                         self.running = False # Exit if in main menu
                     else:
-                        # Go back to main menu from any game
-                        self.current_game = 0
-                        self.reset_game_variables()
-                        self.display.display_number(0) # Clear display
-                        # Ensure servo is at default position when returning to main menu
-                        self.set_servo_angle(90) 
+                        self.engine.to_menu() # Go back to main menu from any game
                         
                 elif self.current_game == 0:  # Main Menu selections
                     if event.key == pygame.K_1:
-                        self.current_game = 1
-                        self.reset_game_variables() # Reset for new game
-                        self.display.display_number(0) # Clear display
+                        self.engine.select_game(1)
                     elif event.key == pygame.K_2:
-                        self.current_game = 2
-                        self.reset_game_variables() # Reset for new game
-                        # Points already reset to 100 by reset_game_variables
-                        self.display.display_number(self.points) # Display starting points for Game 2
-                        # Game 2 itself is "active" as long as points > 0, even if no round is
-                        # currently active, so game_active can be True.
-                        self.game_active = True 
-                        self.game2_game_over = False # Ensure Game 2 is not in game over state on entry
+                        self.engine.select_game(2)
                     elif event.key == pygame.K_3:
-                        self.current_game = 3
-                        self.reset_game_variables() # Reset for new game
-                        self.display.display_number(0) # Clear display
+                        self.engine.select_game(3)
                         
                 else:  # In-game key presses
                     if event.key == pygame.K_SPACE:
-                        # Game 1 or 3: Start if not active
-                        if self.current_game in [1, 3]:
-                            if not self.game_active:
-                                if self.current_game == 1:
-                                    self.start_game1()
-                                elif self.current_game == 3:
-                                    self.start_game3()
-                        # Game 2: Start a new round if not active AND game not over
-                        elif self.current_game == 2:
-                            if not self.game2_round_active and not self.game2_game_over:
-                                self.start_game2_round() # Call the new round-starting function
-                                
+                        # Game 1 or 3: start if not active; Game 2: new round if none is
+                        # running and the game is not over (the engine decides)
+                        if self.engine.start() and self.current_game == GAMBLING:
+                            print(f"Game 2 Round started. Bet: {self.bet_amount}, Multiplier: {self.multiplier}x, Target LEDs: {self.target_leds}")
                     elif event.key == pygame.K_r: # Restart current game
-                        if self.current_game == 1:
-                            self.start_game1() # This will call set_servo_angle(0)
-                        elif self.current_game == 2:
-                            # For Game 2, restart means resetting points and state
-                            self.reset_game_variables() # This sets points to 100 and round_active to False
-                            self.display.display_number(self.points) # Display starting points
-                            self.game_active = True # Allow betting again
-                            self.game2_game_over = False # Clear game over state
-                            self.set_servo_angle(90) # Return servo to default when restarting Game 2
-                        elif self.current_game == 3:
-                            self.start_game3()
-                                
+                        self.engine.restart() # Game 2: back to the starting points
                     elif event.key == pygame.K_m: # Go back to main menu
-                        self.current_game = 0
-                        self.reset_game_variables()
-                        self.display.display_number(0) # Clear display
-                        self.set_servo_angle(90) # Ensure servo is at default position when returning to main menu
-                        
-                    # Game 2 specific controls (only when in Game 2 AND no round is active AND game not over)
-                    elif self.current_game == 2 and not self.game2_round_active and not self.game2_game_over:
-                        if event.key == pygame.K_UP:
-                            # Increase bet, cap at current points, min 10
-                            self.bet_amount = min(self.bet_amount + 10, self.points)
-                            self.bet_amount = max(self.bet_amount, 10) 
-                        elif event.key == pygame.K_DOWN:
-                            # Decrease bet, minimum 10
-                            self.bet_amount = max(self.bet_amount - 10, 10)
-                        elif event.key == pygame.K_LEFT:
-                            # Cycle through multipliers (2x, 3x, 5x)
-                            multipliers = [2, 3, 5]
-                            current_index = multipliers.index(self.multiplier)
-                            self.multiplier = multipliers[(current_index - 1) % len(multipliers)]
-                        elif event.key == pygame.K_RIGHT:
-                            # Cycle through multipliers (2x, 3x, 5x)
-                            multipliers = [2, 3, 5]
-                            current_index = multipliers.index(self.multiplier)
-                            self.multiplier = multipliers[(current_index + 1) % len(multipliers)]
+                        self.engine.to_menu()
+                    # Game 2 bet and multiplier (only between rounds, checked by the engine)
+                    elif event.key == pygame.K_UP:
+                        self.engine.bet_up()
+                    elif event.key == pygame.K_DOWN:
+                        self.engine.bet_down()
+                    elif event.key == pygame.K_LEFT:
+                        self.engine.cycle_multiplier(-1)
+                    elif event.key == pygame.K_RIGHT:
+                        self.engine.cycle_multiplier(1)
+                self.apply_effects()
                             
     def run(self):
         """Main game loop."""
         try:
+            profiler = self.profiler
             while self.running:
-                dt = self.clock.tick(60) / 1000.0  # Delta time for 60 FPS
+                # Delta time: 60 FPS while animating, otherwise waits for input (see needs_full_rate)
+                dt = self.scheduler.wait(self.needs_full_rate())
+                if self.session is not None:
+                    self.session.frame(dt)
+                profiler.begin_frame()
                 
                 self.handle_events() # Process keyboard and window events
+                profiler.mark('events')
                 self.process_gpio_events() # Processes GPIO events from the queue
+                profiler.mark('gpio')
                 
                 # Update timer only for Game 1 and 3 when active
                 if self.current_game in [1, 3] and self.game_active:
                     self.update_game_timer(dt)
+                profiler.mark('timer')
                 
-                # Draw the current screen based on game state
-                if self.current_game == 0:
-                    self.draw_main_menu()
-                elif self.current_game == 1:
-                    self.draw_game1()
-                elif self.current_game == 2:
-                    self.draw_game2()
-                elif self.current_game == 3:
-                    self.draw_game3()
+                # Redraw what changed on the current screen
+                dirty_rects = self.render_frame()
+                profiler.mark('draw')
                     
-                pygame.display.flip() # Update the full display surface to the screen
+                # Push only the changed areas to the display
+                if dirty_rects:
+                    pygame.display.update(dirty_rects)
+                    self.pixels_pushed += sum(rect.width * rect.height for rect in dirty_rects)
+                self.latency.present()
+                profiler.mark('flip')
+                profiler.end_frame()
+                if self.session is not None:
+                    self.session.state(self.score, self.points)
+                if self.startup.first_frame_ms is None:
+                    self.startup.first_frame()
+                    print(self.startup.report())
                 
         except KeyboardInterrupt:
             print("Game interrupted by user.")
@@ -811,15 +1023,51 @@ class PinballGame:
 
     def cleanup(self):
         """Cleans up GPIO pins, stops music, and quits Pygame."""
-        # Turn off all LEDs before cleanup
-        for pin in self.led_pins:
-            GPIO.output(pin, GPIO.LOW)
+        if self.metrics is not None:
+            self.metrics.stop()
+        # Export frame timings if requested
+        if self.profile_csv:
+            try:
+                self.profiler.export_csv(self.profile_csv)
+                print(f"Frame profile written to {self.profile_csv}")
+            except OSError as e:
+                print(f"Failed to write frame profile: {e}")
+
+        if self.session is not None:
+            self.session.close()
+        if self.game_active: # Store and publish a game still in progress
+            self.finish_play(self.points if self.current_game == GAMBLING else self.score, completed=False)
+        if self.scores is not None:
+            self.scores.close()
+        if self.feed is not None:
+            self.feed.close()
+
+        # Send the last display value and stop the display worker
+        self.display.stop()
+        if os.environ.get('PINBALL_LATENCY_REPORT'):
+            print(self.latency.report())
+        if self.event_queue.dropped:
+            print(f"Switch events dropped on overflow: {self.event_queue.stats()}")
+        if self.debouncer.bounces:
+            for i, stats in enumerate(self.debouncer.stats()):
+                print(f"Switch {i+1} debounce: {stats}")
+        if self.keypad is not None:
+            self.keypad.stop()
+        # Stop the servo controller before its PWM channel goes away
+        self.servo.stop()
+
+        # Stop the light show, then turn off all LEDs before cleanup
+        self.animator.stop()
+        self.leds.set_mask(0)
+        self.update_leds()
             
         # Clean up all GPIO settings (remove event detection and reset pins)
         GPIO.cleanup()
         
-        # Stop any playing music
-        pygame.mixer.music.stop()
+        # Stop any playing music (the mixer may still be opening if we quit right away)
+        if pygame.mixer.get_init():
+            pygame.mixer.music.stop()
+            self.sounds.stop()
         
         # --- Servo Motor Cleanup ---
         self.servo_pwm.stop() # Stop PWM signal
@@ -839,8 +1087,14 @@ if __name__ == "__main__":
         # Ensure GPIO is cleaned up even if game.run() itself fails
         # Attempt to stop PWM even in error case, if pwm object exists
         try:
+            if 'game' in locals() and hasattr(game, 'servo'):
+                game.servo.stop()
+            if 'game' in locals() and hasattr(game, 'animator'):
+                game.animator.stop()
             if 'game' in locals() and hasattr(game, 'servo_pwm'):
                 game.servo_pwm.stop()
+            if 'game' in locals() and hasattr(game, 'display'):
+                game.display.stop()
         except NameError:
             pass # game object might not have been created yet
         finally:
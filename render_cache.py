@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文字渲染快取
+Caches rendered text so static strings are rendered once, and composes changing
+numbers (score, time, points, bet) from a pre-rendered digit glyph atlas.
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+
+class DigitAtlas:
+    """Pre-rendered glyphs for the characters numbers are made of, in one font and color."""
+
+    CHARS = "0123456789.-"
+
+    def __init__(self, font, color, antialias=True):
+        self.glyphs = {c: font.render(c, antialias, color) for c in self.CHARS}
+        self.height = max(g.get_height() for g in self.glyphs.values())
+
+    def width(self, text):
+        glyphs = self.glyphs
+        return sum(glyphs[c].get_width() for c in text)
+
+    def blit(self, surface, text, pos):
+        """Blits text (digits, '.' and '-' only) with its top-left at pos; returns the end x."""
+        x, y = pos
+        glyphs = self.glyphs
+        for c in text:
+            glyph = glyphs[c]
+            surface.blit(glyph, (x, y))
+            x += glyph.get_width()
+        return x
+
+
+class TextCache:
+    """
+    Bounded LRU cache of rendered text surfaces keyed by (font, text, color).
+
+    Static strings are rendered once; numbers go through blit_value(), which uses a
+    DigitAtlas per (font, color) so changing values never call font.render. When the
+    cache is full the least recently used surface is evicted; evict() and clear()
+    drop entries explicitly (e.g. when leaving a screen).
+    """
+
+    def __init__(self, max_entries=256, max_atlases=16):
+        self.max_entries = max_entries
+        self.max_atlases = max_atlases
+        self._surfaces = OrderedDict()
+        self._atlases = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        """Returns the cached surface for text, rendering it on first use."""
+        key = (font, text, color, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self._surfaces[key] = font.render(text, antialias, color)
+        if len(self._surfaces) > self.max_entries:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def atlas(self, font, color, antialias=True):
+        """Returns the digit atlas for (font, color), building it on first use."""
+        key = (font, color, antialias)
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = self._atlases[key] = DigitAtlas(font, color, antialias)
+            if len(self._atlases) > self.max_atlases:
+                self._atlases.popitem(last=False)
+        else:
+            self._atlases.move_to_end(key)
+        return atlas
+
+    def blit(self, surface, font, text, color, **anchor):
+        """Blits cached static text, positioned with a Rect keyword (e.g. center=(x, y)); returns its rect."""
+        rendered = self.render(font, text, color)
+        rect = rendered.get_rect(**anchor)
+        surface.blit(rendered, rect)
+        return rect
+
+    def blit_value(self, surface, font, color, prefix, value, suffix="", **anchor):
+        """
+        Blits prefix + value + suffix, e.g. ("Score: ", "120", ""), positioned with a Rect
+        keyword. prefix and suffix come from the text cache, value from the digit atlas.
+        Returns the rect covered.
+        """
+        head = self.render(font, prefix, color) if prefix else None
+        tail = self.render(font, suffix, color) if suffix else None
+        atlas = self.atlas(font, color)
+
+        width = atlas.width(value)
+        height = atlas.height
+        if head is not None:
+            width += head.get_width()
+            height = max(height, head.get_height())
+        if tail is not None:
+            width += tail.get_width()
+            height = max(height, tail.get_height())
+
+        rect = pygame.Rect(0, 0, width, height)
+        if anchor:
+            (name, pos), = anchor.items()
+            setattr(rect, name, pos)
+        x = rect.x
+        if head is not None:
+            surface.blit(head, (x, rect.y))
+            x += head.get_width()
+        x = atlas.blit(surface, value, (x, rect.y))
+        if tail is not None:
+            surface.blit(tail, (x, rect.y))
+        return rect
+
+    def evict(self, font=None):
+        """Drops every cached surface (or only those rendered with font)."""
+        if font is None:
+            self.evictions += len(self._surfaces)
+            self._surfaces.clear()
+            self._atlases.clear()
+            return
+        for key in [k for k in self._surfaces if k[0] is font]:
+            del self._surfaces[key]
+            self.evictions += 1
+        for key in [k for k in self._atlases if k[0] is font]:
+            del self._atlases[key]
+
+    def clear(self):
+        self.evict()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+    def stats(self):
+        return {
+            'entries': len(self._surfaces),
+            'atlases': len(self._atlases),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+遊戲紀錄重播
+Replays a session log (see session_log.py) through the game logic headless and
+as fast as possible, and checks that it produces the same score/points trace as
+the recorded session.
+
+    python replay.py session.pbrec          # exit status 1 if the trace differs
+    python replay.py session.pbrec --trace  # also print the replayed trace
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+# Must be set before the game modules import GPIO / pygame
+os.environ.setdefault('PINBALL_GPIO', 'sim')
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.pop('PINBALL_RECORD', None) # Never record the replay itself
+os.environ['PINBALL_SCORES'] = '' # Nor store its scores
+os.environ.pop('PINBALL_FEED', None) # Nor publish it
+
+import pygame
+
+from session_log import (KEY, QUIT, SWITCH, STATE_SCORE, SessionReplay, read_session,
+                         recorded_trace, split_frames)
+
+
+def replay(records, game=None):
+    """
+    Feeds records through a headless PinballGame, frame by frame in the order of the
+    main loop: key events through handle_events, then switch hits through
+    on_switch_pressed, then the game timer. Returns (replayed trace, recorded trace).
+    """
+    from pinball_game import PinballGame
+    if game is None:
+        game = PinballGame()
+    session = game.session = SessionReplay(records)
+    for dt, events in split_frames(records):
+        session.frame(dt)
+        for kind, _, value in events:
+            if kind == KEY:
+                pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=value))
+            elif kind == QUIT:
+                pygame.event.post(pygame.event.Event(pygame.QUIT))
+        game.handle_events()
+        for kind, arg, _ in events:
+            if kind == SWITCH:
+                game.on_switch_pressed(arg)
+        if game.current_game in [1, 3] and game.game_active:
+            game.update_game_timer(dt)
+        session.state(game.score, game.points)
+    return session.trace, recorded_trace(records)
+
+
+def _format(entry):
+    frame, arg, value = entry
+    return f"frame {frame}: {'score' if arg == STATE_SCORE else 'points'} = {value}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded pinball session")
+    parser.add_argument('log', help="session log written with PINBALL_RECORD=<file>")
+    parser.add_argument('--trace', action='store_true', help="print the replayed score/points trace")
+    args = parser.parse_args(argv)
+
+    records = read_session(args.log)
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        from pinball_game import PinballGame
+        game = PinballGame()
+        trace, expected = replay(records, game)
+        game.cleanup()
+    elapsed = time.perf_counter() - t0
+
+    frames = trace[-1][0] if trace else 0
+    recorded_s = records[-1][3] / 1e9 if records else 0.0
+    print(f"Replayed {len(records)} records ({recorded_s:.1f}s of play) in {elapsed:.2f}s")
+    if args.trace:
+        for entry in trace:
+            print(_format(entry))
+
+    if trace == expected:
+        print(f"Trace matches the recording ({len(trace)} changes, last at frame {frames})")
+        return 0
+    for i, (got, want) in enumerate(zip(trace, expected)):
+        if got != want:
+            print(f"Trace differs at change {i}: replay {_format(got)}, recorded {_format(want)}")
+            break
+    else:
+        print(f"Trace length differs: replay {len(trace)} changes, recorded {len(expected)}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
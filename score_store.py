@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分數與統計儲存
+Persistent high scores, session statistics and per-switch hit counts in SQLite.
+
+Callers never touch the disk: record_session() and count_hit() only update the
+in-memory cache and queue the change, and a writer thread owns the database
+connection, opened in WAL mode, and commits the queued changes in batched
+transactions. Reads (top_scores, switch_hits) are served from the cache, which the
+writer fills from the database when it starts.
+
+The queue is bounded: while the database is unavailable or too slow, new changes
+are dropped (and counted) instead of piling up in memory. Games left before their
+end are stored as sessions but kept out of the high scores.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    game INTEGER NOT NULL,
+    started_at REAL NOT NULL,
+    duration_s REAL NOT NULL,
+    value INTEGER NOT NULL,
+    hits INTEGER NOT NULL,
+    completed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_top ON sessions (game, value DESC);
+CREATE TABLE IF NOT EXISTS switch_hits (
+    switch INTEGER PRIMARY KEY,
+    hits INTEGER NOT NULL
+);
+"""
+
+_STOP = object()
+
+
+class ScoreStore:
+    def __init__(self, path, top_n=10, batch_size=64, flush_interval_s=1.0, capacity=1024):
+        self.path = path
+        self.top_n = top_n
+        self.batch_size = batch_size
+        # Longest time a queued change waits before it is committed, and hit counts before they are queued
+        self.flush_interval_s = flush_interval_s
+
+        self._lock = threading.Lock() # Guards the cache
+        self._top = {} # Game -> [(value, started_at)], best first
+        self._hits = {} # Switch -> hits (stored + pending)
+        self._pending_hits = {} # Switch -> hits not yet queued to the writer
+        self._hits_queued_at = time.monotonic()
+        self._queue = queue.Queue(maxsize=capacity) # Full -> new changes dropped
+        self.loaded = threading.Event() # Set once the cache holds the stored data
+
+        # Counters (each written by one side only)
+        self.enqueued = 0 # Game side
+        self.dropped_full = 0 # Game side: queue full
+        self.written = 0 # Writer side: committed
+        self.dropped_failed = 0 # Writer side: in a failed transaction
+        self.transactions = 0
+        self.errors = 0
+
+        self._thread = threading.Thread(target=self._run, name="score-writer", daemon=True)
+        self._thread.start()
+
+    # --- Game side (never blocks on I/O) ---
+
+    def record_session(self, game, started_at, duration_s, value, hits, completed=True):
+        """
+        Stores a finished (or abandoned) game session; value is the final score or
+        points. Only completed games enter the high scores.
+        """
+        if completed:
+            self._add_top(game, value, started_at)
+        self._put(('session', (game, started_at, duration_s, value, hits, int(completed))))
+        self._queue_hits()
+
+    def count_hit(self, switch_index):
+        """Counts one switch hit (queued at most flush_interval_s later, or with the next session)."""
+        with self._lock:
+            self._hits[switch_index] = self._hits.get(switch_index, 0) + 1
+            self._pending_hits[switch_index] = self._pending_hits.get(switch_index, 0) + 1
+        if time.monotonic() - self._hits_queued_at >= self.flush_interval_s:
+            self._queue_hits()
+
+    def _put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped_full += 1
+            return
+        self.enqueued += 1
+
+    def _queue_hits(self):
+        self._hits_queued_at = time.monotonic()
+        with self._lock:
+            pending = self._pending_hits
+            self._pending_hits = {}
+        if pending:
+            self._put(('hits', pending))
+
+    def _add_top(self, game, value, started_at):
+        with self._lock:
+            top = self._top.setdefault(game, [])
+            top.append((value, started_at))
+            top.sort(key=lambda entry: entry[0], reverse=True)
+            del top[self.top_n:]
+
+    def top_scores(self, game):
+        """Best (value, started_at) entries of a game, best first, from the cache."""
+        with self._lock:
+            return list(self._top.get(game, ()))
+
+    def switch_hits(self):
+        """Switch index -> total hits, from the cache."""
+        with self._lock:
+            return dict(self._hits)
+
+    # --- Writer thread ---
+
+    def _load(self, db):
+        games = [row[0] for row in db.execute("SELECT DISTINCT game FROM sessions")]
+        stored_top = {
+            game: db.execute("SELECT value, started_at FROM sessions WHERE game = ? AND completed = 1 "
+                             "ORDER BY value DESC LIMIT ?", (game, self.top_n)).fetchall()
+            for game in games
+        }
+        stored_hits = dict(db.execute("SELECT switch, hits FROM switch_hits"))
+        # Merge with whatever the game recorded while the database was opening
+        with self._lock:
+            for game, rows in stored_top.items():
+                top = self._top.setdefault(game, [])
+                top.extend(tuple(row) for row in rows)
+                top.sort(key=lambda entry: entry[0], reverse=True)
+                del top[self.top_n:]
+            for switch, hits in stored_hits.items():
+                self._hits[switch] = self._hits.get(switch, 0) + hits
+        self.loaded.set()
+
+    def _write(self, db, batch):
+        with db: # One transaction per batch
+            for kind, data in batch:
+                if kind == 'session':
+                    db.execute("INSERT INTO sessions (game, started_at, duration_s, value, hits, completed) "
+                               "VALUES (?, ?, ?, ?, ?, ?)", data)
+                else:
+                    db.executemany("INSERT INTO switch_hits (switch, hits) VALUES (?, ?) "
+                                   "ON CONFLICT(switch) DO UPDATE SET hits = hits + excluded.hits",
+                                   data.items())
+        self.written += len(batch)
+        self.transactions += 1
+
+    def _run(self):
+        try:
+            db = sqlite3.connect(self.path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL") # WAL stays consistent; a power cut may lose the last batch
+            db.executescript(SCHEMA)
+            self._load(db)
+        except sqlite3.Error as e:
+            print(f"Score store unavailable ({self.path}): {e}")
+            self.errors += 1
+            self.loaded.set()
+            return # Scores stay in memory only
+
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval_s)
+            except queue.Empty:
+                continue
+            batch = []
+            deadline = time.monotonic() + self.flush_interval_s
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    # Collect what arrives shortly after, into the same transaction
+                    item = self._queue.get(timeout=max(0.0, min(0.05, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(db, batch)
+                except sqlite3.Error as e:
+                    print(f"Score store write failed: {e}")
+                    self.errors += 1
+                    self.dropped_failed += len(batch)
+        db.close()
+
+    @property
+    def dropped(self):
+        """Changes lost either way."""
+        return self.dropped_full + self.dropped_failed
+
+    @property
+    def backlog(self):
+        """Changes queued and not yet written (or lost in a failed write)."""
+        return self.enqueued - self.written - self.dropped_failed
+
+    def stats(self):
+        return {
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'backlog': self.backlog,
+            'dropped_full': self.dropped_full,
+            'dropped_failed': self.dropped_failed,
+            'transactions': self.transactions,
+            'errors': self.errors,
+        }
+
+    def close(self, timeout=2.0):
+        """Queues the remaining hit counts, then lets the writer commit everything and stop."""
+        self._queue_hits()
+        if not self._thread.is_alive():
+            return # Database never opened: nothing to write
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return # Writer stuck or gone: nothing more will be written
+        self._thread.join(timeout)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非阻塞伺服馬達控制
+Moves the SG90 servo from a background thread so game code never sleeps on it.
+"""
+
+import threading
+
+
+def sg90_duty(angle):
+    """SG90 maps 0-180 degrees to roughly 2-12% duty cycle at 50Hz."""
+    return 2 + (angle / 18)
+
+
+class MoveHandle:
+    """Returned by ServoController.move_to(); lets the caller optionally wait for the move."""
+
+    def __init__(self, angle):
+        self.angle = angle
+        self.superseded = False # True if a newer target replaced this one before it settled
+        self._done = threading.Event()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Blocks until the move has settled (or was superseded). Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def _finish(self, superseded=False):
+        self.superseded = superseded
+        self._done.set()
+
+
+class ServoController:
+    """
+    Owns a servo PWM channel on a background thread.
+
+    Only the latest requested target is kept: a new target replaces one that has not
+    been reached yet instead of queueing behind it. Once a move has had settle_time to
+    complete the duty cycle drops to 0, which stops the SG90 from jittering.
+    """
+
+    def __init__(self, pwm, settle_time=0.5, duty_for_angle=sg90_duty):
+        self.pwm = pwm
+        self.settle_time = settle_time
+        self.duty_for_angle = duty_for_angle
+        self.angle = None # Last angle the servo settled at (None = unknown)
+        self.moves = 0 # Moves actually driven
+        self.superseded = 0 # Targets replaced before they settled
+
+        self._cond = threading.Condition()
+        self._target = None # Pending MoveHandle
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="servo", daemon=True)
+        self._thread.start()
+
+    def move_to(self, angle):
+        """Requests a move to angle and returns immediately with a MoveHandle."""
+        handle = MoveHandle(angle)
+        with self._cond:
+            if self._target is not None:
+                self._target._finish(superseded=True)
+                self.superseded += 1
+            self._target = handle
+            self._cond.notify()
+        return handle
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and self._target is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                handle = self._target
+
+            if handle.angle == self.angle:
+                # Already there; nothing to drive
+                with self._cond:
+                    if self._target is handle:
+                        self._target = None
+                        handle._finish()
+                continue
+
+            self.pwm.ChangeDutyCycle(self.duty_for_angle(handle.angle))
+            self.moves += 1
+
+            with self._cond:
+                # Give the servo time to get there, unless a new target arrives first
+                self._cond.wait_for(lambda: self._target is not handle or not self._running,
+                                    timeout=self.settle_time)
+                if self._target is handle:
+                    self._target = None
+                    self.angle = handle.angle
+                    self.pwm.ChangeDutyCycle(0) # Settled: stop driving to avoid jitter
+                    handle._finish()
+                else:
+                    self.angle = None # Stopped somewhere on the way
+
+    def wait_idle(self, timeout=None):
+        """Blocks until no move is pending. Returns False on timeout."""
+        with self._cond:
+            handle = self._target
+        return handle.wait(timeout) if handle is not None else True
+
+    def stop(self, timeout=1.0):
+        """Stops the controller thread (a pending move is abandoned)."""
+        with self._cond:
+            self._running = False
+            if self._target is not None:
+                self._target._finish(superseded=True)
+                self._target = None
+            self._cond.notify()
+        self._thread.join(timeout)
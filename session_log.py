@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+遊戲紀錄與重播
+Compact binary gameplay log. Every frame tick, key press, switch hit and RNG seed
+is appended as a fixed 16-byte record, together with the score/points whenever
+they change, so a session can be fed back through the game logic later.
+
+    PINBALL_RECORD=session.pbrec python pinball_game.py   # record a session
+    python replay.py session.pbrec                        # replay it headless
+
+Record layout (little endian): kind u8, arg u8, 2 pad bytes, value i32,
+t_ns i64 (nanoseconds since the start of the session).
+
+The game thread only packs records into a queue; a writer thread appends them to
+the file every flush_interval_s, so no write to the SD card happens in a frame.
+"""
+
+import collections
+import random
+import struct
+import threading
+import time
+
+MAGIC = b'PBREC\x00\x01\x00' # Format name + version 1
+
+RECORD = struct.Struct('<BBxxiq')
+
+# Record kinds
+FRAME = 0 # value = frame delta time in microseconds
+KEY = 1 # value = pygame key code
+QUIT = 2
+SWITCH = 3 # arg = switch index
+SEED = 4 # value = seed drawn for the random choices that follow
+STATE = 5 # arg = STATE_SCORE or STATE_POINTS, value = new value
+
+STATE_SCORE = 0
+STATE_POINTS = 1
+
+KIND_NAMES = {FRAME: 'frame', KEY: 'key', QUIT: 'quit', SWITCH: 'switch', SEED: 'seed', STATE: 'state'}
+
+
+class SessionRecorder:
+    """Appends the records of a live session to a file, from a writer thread."""
+
+    def __init__(self, path, flush_interval_s=0.5):
+        self.path = path
+        self.flush_interval_s = flush_interval_s # Longest time a record waits in memory
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._t0 = time.monotonic_ns()
+        self._last_state = [None, None]
+        self._pending = collections.deque() # Packed records not yet written
+        self._wake = threading.Event()
+
+        # Counters (each written by one side only)
+        self.records = 0 # Game side
+        self.written = 0 # Writer side
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="session-log", daemon=True)
+        self._thread.start()
+
+    def _write(self, kind, arg=0, value=0):
+        self._pending.append(RECORD.pack(kind, arg, value, time.monotonic_ns() - self._t0))
+        self.records += 1
+
+    def _flush(self):
+        pending = self._pending
+        chunk = []
+        while pending:
+            chunk.append(pending.popleft())
+        if chunk:
+            self._file.write(b''.join(chunk))
+            self._file.flush()
+            self.written += len(chunk)
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self.flush_interval_s)
+            self._flush()
+        self._flush() # Whatever was queued before close()
+
+    def frame(self, dt):
+        self._write(FRAME, value=round(dt * 1000000))
+
+    def key(self, key):
+        self._write(KEY, value=key)
+
+    def quit(self):
+        self._write(QUIT)
+
+    def switch(self, switch_index):
+        self._write(SWITCH, arg=switch_index)
+
+    def seed(self):
+        """Draws a new seed for the game's random choices and logs it."""
+        seed = random.getrandbits(31)
+        self._write(SEED, value=seed)
+        return seed
+
+    def state(self, score, points):
+        """Logs score/points if they changed since the last call."""
+        for arg, value in ((STATE_SCORE, score), (STATE_POINTS, points)):
+            if value != self._last_state[arg]:
+                self._last_state[arg] = value
+                self._write(STATE, arg=arg, value=value)
+
+    def close(self, timeout=1.0):
+        """Stops the writer thread and writes what is still queued."""
+        if self._file.closed:
+            return
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout)
+        if not self._thread.is_alive(): # A writer stuck on the disk keeps the file
+            self._file.close()
+
+
+def read_session(path):
+    """Returns the records of a session log as a list of (kind, arg, value, t_ns) tuples."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a session log")
+    body = data[len(MAGIC):]
+    body = body[:len(body) - len(body) % RECORD.size] # Drop a torn last record
+    return list(RECORD.iter_unpack(body))
+
+
+class SessionReplay:
+    """
+    Stands in for SessionRecorder while a log is replayed: hands the logged seeds back
+    to the game in order, and collects the score/points trace the replay produces.
+    """
+
+    def __init__(self, records):
+        self._seeds = [value for kind, _, value, _ in records if kind == SEED]
+        self._next_seed = 0
+        self._last_state = [None, None]
+        self.trace = [] # (frame number, STATE_SCORE/STATE_POINTS, value)
+        self.frame_number = 0
+
+    def frame(self, dt):
+        self.frame_number += 1
+
+    def key(self, key):
+        pass
+
+    def quit(self):
+        pass
+
+    def switch(self, switch_index):
+        pass
+
+    def seed(self):
+        if self._next_seed >= len(self._seeds):
+            raise RuntimeError("Replay asked for more random seeds than were recorded")
+        seed = self._seeds[self._next_seed]
+        self._next_seed += 1
+        return seed
+
+    def state(self, score, points):
+        for arg, value in ((STATE_SCORE, score), (STATE_POINTS, points)):
+            if value != self._last_state[arg]:
+                self._last_state[arg] = value
+                self.trace.append((self.frame_number, arg, value))
+
+    def close(self):
+        pass
+
+
+def split_frames(records):
+    """Groups records by frame: yields (dt, events) with events as (kind, arg, value) in log order."""
+    dt = None
+    events = []
+    for kind, arg, value, _ in records:
+        if kind == FRAME:
+            if dt is not None:
+                yield dt, events
+            dt = value / 1000000.0
+            events = []
+        elif dt is not None and kind in (KEY, QUIT, SWITCH):
+            events.append((kind, arg, value))
+    if dt is not None:
+        yield dt, events
+
+
+def recorded_trace(records):
+    """The score/points trace logged during recording, in the same form as SessionReplay.trace."""
+    trace = []
+    frame_number = 0
+    for kind, arg, value, _ in records:
+        if kind == FRAME:
+            frame_number += 1
+        elif kind == STATE:
+            trace.append((frame_number, arg, value))
+    return trace
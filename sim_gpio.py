@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+模擬 GPIO 後端
+Drop-in stand-in for RPi.GPIO so the game and the hardware scripts run (and can be
+profiled) on a workstation. Selected with PINBALL_GPIO=sim, see gpio_backend.py.
+
+Besides the RPi.GPIO API it provides a virtual clock that timestamps every pin
+transition, and an input injector to script switch presses.
+"""
+
+import threading
+from collections import deque
+
+# --- RPi.GPIO constants ---
+BOARD = 10
+BCM = 11
+OUT = 0
+IN = 1
+LOW = 0
+HIGH = 1
+PUD_OFF = 20
+PUD_DOWN = 21
+PUD_UP = 22
+RISING = 31
+FALLING = 32
+BOTH = 33
+HARD_PWM = 43
+SERIAL = 40
+SPI = 41
+I2C = 42
+UNKNOWN = -1
+VERSION = '0.7.1-sim'
+RPI_INFO = {'P1_REVISION': 3, 'TYPE': 'Simulated', 'PROCESSOR': 'sim', 'RAM': 'sim'}
+
+# Maximum number of transitions kept in the log (older ones are discarded)
+LOG_LIMIT = 1000000
+
+
+class VirtualClock:
+    """
+    Simulated time in nanoseconds. Advances only when told to: explicitly with
+    advance(), or by op_cost_ns on every simulated GPIO call (0 by default), which
+    lets a benchmark model the cost of the real GPIO library.
+    """
+
+    def __init__(self):
+        self.now = 0
+        self.op_cost_ns = 0
+
+    def now_ns(self):
+        return self.now
+
+    def advance(self, ns):
+        self.now += ns
+        return self.now
+
+    def reset(self):
+        self.now = 0
+
+
+class _Pin:
+    __slots__ = ('direction', 'pull', 'level', 'edge', 'callbacks', 'bouncetime_ns',
+                 'last_event_ns', 'event_flag')
+
+    def __init__(self, direction, pull, level):
+        self.direction = direction
+        self.pull = pull
+        self.level = level
+        self.edge = None
+        self.callbacks = []
+        self.bouncetime_ns = 0
+        self.last_event_ns = None
+        self.event_flag = False
+
+
+clock = VirtualClock()
+transitions = deque(maxlen=LOG_LIMIT) # (virtual ns, channel, level) for every level change
+stats = {'outputs': 0, 'inputs': 0, 'setups': 0, 'transitions': 0, 'callbacks': 0}
+
+_pins = {}
+_mode = None
+_warnings = True
+_lock = threading.RLock()
+_schedule = [] # Scripted input changes: (virtual ns, channel, level), kept sorted
+
+
+def _tick():
+    if clock.op_cost_ns:
+        clock.now += clock.op_cost_ns
+
+
+def _channels(channel):
+    return channel if isinstance(channel, (list, tuple)) else (channel,)
+
+
+def _set_level(channel, pin, level):
+    if pin.level != level:
+        pin.level = level
+        transitions.append((clock.now, channel, level))
+        stats['transitions'] += 1
+
+
+# --- RPi.GPIO API ---
+
+def setmode(mode):
+    global _mode
+    if mode not in (BOARD, BCM):
+        raise ValueError("An invalid mode was passed to setmode()")
+    if _mode is not None and _mode != mode:
+        raise ValueError("A different mode has already been set!")
+    _mode = mode
+
+
+def getmode():
+    return _mode
+
+
+def setwarnings(flag):
+    global _warnings
+    _warnings = bool(flag)
+
+
+def setup(channel, direction, pull_up_down=PUD_OFF, initial=-1):
+    if _mode is None:
+        raise RuntimeError("Please set pin numbering mode using GPIO.setmode(GPIO.BOARD) or GPIO.setmode(GPIO.BCM)")
+    with _lock:
+        for ch in _channels(channel):
+            pin = _pins.get(ch)
+            if direction == OUT:
+                level = initial if initial in (LOW, HIGH) else (pin.level if pin else LOW)
+            else:
+                level = LOW if pull_up_down == PUD_DOWN else HIGH
+            if pin is None:
+                pin = _pins[ch] = _Pin(direction, pull_up_down, level)
+                transitions.append((clock.now, ch, level))
+            else:
+                pin.direction = direction
+                pin.pull = pull_up_down
+                _set_level(ch, pin, level)
+            stats['setups'] += 1
+    _tick()
+
+
+def output(channel, value):
+    channels = _channels(channel)
+    values = value if isinstance(value, (list, tuple)) else (value,) * len(channels)
+    if len(values) != len(channels):
+        raise RuntimeError("Number of channels != number of values")
+    with _lock:
+        for ch, val in zip(channels, values):
+            pin = _pins.get(ch)
+            if pin is None or pin.direction != OUT:
+                raise RuntimeError("The GPIO channel has not been set up as an OUTPUT")
+            _set_level(ch, pin, HIGH if val else LOW)
+            stats['outputs'] += 1
+    _tick()
+
+
+def input(channel):
+    pin = _pins.get(channel)
+    if pin is None:
+        raise RuntimeError("You must setup() the GPIO channel first")
+    stats['inputs'] += 1
+    _tick()
+    return pin.level
+
+
+def add_event_detect(channel, edge, callback=None, bouncetime=None):
+    pin = _pins.get(channel)
+    if pin is None or pin.direction != IN:
+        raise RuntimeError("You must setup() the GPIO channel as an input first")
+    if pin.edge is not None:
+        raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+    pin.edge = edge
+    pin.bouncetime_ns = int(bouncetime * 1000000) if bouncetime else 0
+    pin.callbacks = [callback] if callback else []
+
+
+def add_event_callback(channel, callback):
+    pin = _pins.get(channel)
+    if pin is None or pin.edge is None:
+        raise RuntimeError("Add event detection using add_event_detect first before adding a callback")
+    pin.callbacks.append(callback)
+
+
+def remove_event_detect(channel):
+    pin = _pins.get(channel)
+    if pin is not None:
+        pin.edge = None
+        pin.callbacks = []
+
+
+def event_detected(channel):
+    pin = _pins.get(channel)
+    if pin is None or not pin.event_flag:
+        return False
+    pin.event_flag = False
+    return True
+
+
+def gpio_function(channel):
+    pin = _pins.get(channel)
+    return pin.direction if pin else UNKNOWN
+
+
+def cleanup(channel=None):
+    global _mode
+    with _lock:
+        if channel is None:
+            _pins.clear()
+            _mode = None
+        else:
+            for ch in _channels(channel):
+                _pins.pop(ch, None)
+
+
+class PWM:
+    """Software PWM object; duty-cycle and frequency changes are logged on the virtual clock."""
+
+    log = deque(maxlen=LOG_LIMIT) # (virtual ns, channel, frequency, duty cycle)
+
+    def __init__(self, channel, frequency):
+        pin = _pins.get(channel)
+        if pin is None or pin.direction != OUT:
+            raise RuntimeError("You must setup() the GPIO channel as an output first")
+        self.channel = channel
+        self.frequency = frequency
+        self.duty_cycle = 0.0
+        self.running = False
+
+    def _record(self):
+        PWM.log.append((clock.now, self.channel, self.frequency, self.duty_cycle if self.running else 0.0))
+        _tick()
+
+    def start(self, dutycycle):
+        self.running = True
+        self.duty_cycle = dutycycle
+        self._record()
+
+    def ChangeDutyCycle(self, dutycycle):
+        if not 0.0 <= dutycycle <= 100.0:
+            raise ValueError("dutycycle must have a value from 0.0 to 100.0")
+        self.duty_cycle = dutycycle
+        self._record()
+
+    def ChangeFrequency(self, frequency):
+        self.frequency = frequency
+        self._record()
+
+    def stop(self):
+        self.running = False
+        self._record()
+
+
+# --- Simulation helpers (not part of RPi.GPIO) ---
+
+def inject(channel, level):
+    """
+    Drives an input pin to level at the current virtual time, as the outside world
+    would, and runs the edge-detect callbacks synchronously (honouring bouncetime).
+    """
+    level = HIGH if level else LOW
+    with _lock:
+        pin = _pins.get(channel)
+        if pin is None or pin.direction != IN:
+            raise RuntimeError(f"Channel {channel} is not set up as an input")
+        if pin.level == level:
+            return False
+        _set_level(channel, pin, level)
+        if pin.edge is None:
+            return False
+        rising = level == HIGH
+        if pin.edge != BOTH and (pin.edge == RISING) != rising:
+            return False
+        if pin.bouncetime_ns and pin.last_event_ns is not None \
+                and clock.now - pin.last_event_ns < pin.bouncetime_ns:
+            return False
+        pin.last_event_ns = clock.now
+        pin.event_flag = True
+        callbacks = list(pin.callbacks)
+    for callback in callbacks:
+        stats['callbacks'] += 1
+        callback(channel)
+    return True
+
+
+def press(channel, hold_ns=20000000, active_low=True):
+    """Schedules a press of hold_ns on a switch input, starting at the current virtual time."""
+    pressed, released = (LOW, HIGH) if active_low else (HIGH, LOW)
+    schedule(clock.now, channel, pressed)
+    schedule(clock.now + hold_ns, channel, released)
+
+
+def schedule(at_ns, channel, level):
+    """Queues an input change for virtual time at_ns (applied by run_until)."""
+    with _lock:
+        _schedule.append((at_ns, channel, level))
+        _schedule.sort(key=lambda item: item[0])
+
+
+def run_until(at_ns):
+    """Advances the virtual clock to at_ns, applying every scheduled input change on the way."""
+    while True:
+        with _lock:
+            if not _schedule or _schedule[0][0] > at_ns:
+                break
+            when, channel, level = _schedule.pop(0)
+        if when > clock.now:
+            clock.now = when
+        inject(channel, level)
+    if at_ns > clock.now:
+        clock.now = at_ns
+
+
+def level(channel):
+    """Returns the current level of any set-up pin (input or output)."""
+    return _pins[channel].level
+
+
+def transitions_since(t_ns, channel=None):
+    """Returns logged transitions at or after virtual time t_ns, optionally for one channel."""
+    with _lock: # Other threads (e.g. LED animations) may be writing pins
+        return [t for t in transitions if t[0] >= t_ns and (channel is None or t[1] == channel)]
+
+
+def reset():
+    """Clears pins, logs, scheduled input, counters and the virtual clock."""
+    global _mode
+    with _lock:
+        _pins.clear()
+        _schedule.clear()
+        transitions.clear()
+        PWM.log.clear()
+        for key in stats:
+            stats[key] = 0
+        clock.reset()
+        _mode = None
+
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+音效通道池
+Sound effects are decoded on a background thread (startup never waits on audio)
+and played on a small pool of reserved mixer channels with priorities:
+a higher priority sound steals the oldest, lowest priority voice when every
+channel is busy, and the same sound retriggered too quickly is dropped.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import pygame
+
+
+class SoundPool:
+    """
+    Owns the effect sounds and num_channels reserved mixer channels.
+
+    load(files) returns immediately; ready is a Future that resolves to the dict of
+    loaded sounds once decoding is done. play() before then is a no-op for sounds
+    that are not loaded yet. The mixer itself is also opened by the loader if it is
+    not initialized yet, since opening the audio device can take a while.
+    """
+
+    def __init__(self, priorities, num_channels=4, min_interval_s=0.05):
+        # Sound name -> priority (higher wins when stealing a voice; unknown names get 0)
+        self.priorities = dict(priorities)
+        # Same sound retriggered within this many seconds is dropped
+        self.min_interval_s = min_interval_s
+        self.num_channels = num_channels
+        self.channels = [] # Reserved once the mixer is open (see _open_channels)
+        # Per channel: (priority, start time) of the voice last started on it
+        self._voices = []
+
+        self.sounds = {}
+        self.ready = Future()
+        self.ready.set_result(self.sounds) # Nothing to load yet
+        self._last_played = {}
+
+        # Counters
+        self.played = 0
+        self.stolen = 0 # Voices cut off by a higher priority sound
+        self.dropped = 0 # No channel free and nothing of lower priority to steal
+        self.rate_limited = 0
+        self.not_ready = 0 # Requested before it was loaded (or missing)
+
+    def load(self, files):
+        """Starts decoding {name: path} on a background thread. Returns the readiness Future."""
+        self.ready = Future()
+        thread = threading.Thread(target=self._load, args=(dict(files), self.ready),
+                                  name="sound-loader", daemon=True)
+        thread.start()
+        return self.ready
+
+    def _open_channels(self):
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        # Reserve the first channels for effects so nothing else (e.g. Sound.play()) takes them
+        num_channels = self.num_channels
+        if pygame.mixer.get_num_channels() < num_channels:
+            pygame.mixer.set_num_channels(num_channels)
+        pygame.mixer.set_reserved(num_channels)
+        self._voices = [(0, 0.0)] * num_channels
+        self.channels = [pygame.mixer.Channel(i) for i in range(num_channels)]
+
+    def _load(self, files, ready):
+        try:
+            if not self.channels:
+                self._open_channels()
+            for name, file_path in files.items():
+                try:
+                    if os.path.exists(file_path):
+                        # Published one by one so early sounds are playable before the rest load
+                        self.sounds[name] = pygame.mixer.Sound(file_path)
+                        print(f"Loaded sound effect: {name}")
+                    else:
+                        print(f"Sound file does not exist: {file_path}")
+                except Exception as e:
+                    print(f"Failed to load sound {name}: {e}")
+            ready.set_result(self.sounds)
+        except Exception as e:
+            ready.set_exception(e)
+
+    def play(self, name):
+        """Plays name on a pool channel. Returns the channel, or None if the sound was not played."""
+        sound = self.sounds.get(name)
+        if sound is None:
+            self.not_ready += 1
+            return None
+
+        now = time.monotonic()
+        if now - self._last_played.get(name, -1e9) < self.min_interval_s:
+            self.rate_limited += 1
+            return None
+
+        priority = self.priorities.get(name, 0)
+        index = self._pick_channel(priority)
+        if index is None:
+            self.dropped += 1
+            return None
+        channel = self.channels[index]
+        if channel.get_busy():
+            self.stolen += 1
+        channel.play(sound)
+        self._voices[index] = (priority, now)
+        self._last_played[name] = now
+        self.played += 1
+        return channel
+
+    def _pick_channel(self, priority):
+        """A free channel, else the oldest voice of the lowest priority not above priority."""
+        victim = None
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return i
+            voice = self._voices[i]
+            if voice[0] <= priority and (victim is None or voice < self._voices[victim]):
+                victim = i
+        return victim
+
+    def stop(self):
+        for channel in self.channels:
+            channel.stop()
+
+    def stats(self):
+        return {
+            'loaded': len(self.sounds),
+            'played': self.played,
+            'stolen': self.stolen,
+            'dropped': self.dropped,
+            'rate_limited': self.rate_limited,
+            'not_ready': self.not_ready,
+        }
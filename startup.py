@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+啟動階段計時
+Times the startup stages of the game, both the ones run in line and the ones
+started on background threads, up to the first frame on screen.
+
+    startup = StartupProfile()
+    with startup.stage('display'):
+        ...
+    startup.track('audio', sounds.load(files)) # a Future completed by a loader thread
+    ...
+    startup.first_frame()
+    print(startup.report())
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    def __init__(self, t0=None):
+        # Origin of every timestamp (perf_counter seconds); defaults to now
+        self.t0 = time.perf_counter() if t0 is None else t0
+        # (name, start_ms, duration_ms, background) in completion order
+        self.stages = []
+        self.first_frame_ms = None
+        self._lock = threading.Lock()
+
+    def _ms(self, t):
+        return (t - self.t0) * 1000.0
+
+    def _record(self, name, start):
+        end = time.perf_counter()
+        background = threading.current_thread() is not threading.main_thread()
+        with self._lock:
+            self.stages.append((name, self._ms(start), (end - start) * 1000.0, background))
+
+    @contextmanager
+    def stage(self, name):
+        """Times the enclosed block as a startup stage (a background one if not on the main thread)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(name, start)
+
+    def track(self, name, future):
+        """Records a stage that runs elsewhere and ends when future completes (timed from now)."""
+        start = time.perf_counter()
+        future.add_done_callback(lambda _: self._record(name, start))
+        return future
+
+    def first_frame(self):
+        """Marks the first frame as presented (only the first call counts)."""
+        if self.first_frame_ms is None:
+            self.first_frame_ms = self._ms(time.perf_counter())
+
+    def summary(self):
+        """Returns the timings as a dict of stage name -> duration (ms), plus first_frame_ms."""
+        with self._lock:
+            result = {name: duration for name, _, duration, _ in self.stages}
+        result['first_frame_ms'] = self.first_frame_ms
+        return result
+
+    def report(self):
+        """One log line: each stage with its duration ('~' marks background stages)."""
+        with self._lock:
+            parts = [f"{'~' if background else ''}{name} {duration:.0f}ms"
+                     for name, _, duration, background in self.stages]
+        if self.first_frame_ms is not None:
+            parts.append(f"first frame at {self.first_frame_ms:.0f}ms")
+        return "Startup: " + ", ".join(parts)
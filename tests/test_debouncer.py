@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from debouncer import SwitchDebouncer
+
+MS = 1000000
+
+
+def feed(debouncer, times_ms):
+    """Edges of switch 0 at the given times (alternating, starting with a close); accepted presses."""
+    return [debouncer.edge(0, int(t * MS)) for t in times_ms]
+
+
+def test_bouncy_press_is_one_press():
+    debouncer = SwitchDebouncer(1, hold_ms=10, release_ms=8, auto_tune=False)
+    accepted = feed(debouncer, [100, 100.5, 101, 101.5, 102, 150])
+    assert accepted == [True, False, False, False, False, False]
+    assert debouncer.switches[0].bounces == 2
+
+
+def test_short_press_is_not_a_bounce():
+    debouncer = SwitchDebouncer(1, hold_ms=10, release_ms=8, auto_tune=False)
+    accepted = feed(debouncer, [100, 103, 200, 203])
+    assert accepted == [True, False, True, False]
+    assert debouncer.switches[0].bounces == 0
+    assert debouncer.switches[0].hold_bounce_ns == 0
+
+
+def test_release_bounce_is_rejected():
+    debouncer = SwitchDebouncer(1, hold_ms=10, release_ms=8, auto_tune=False)
+    accepted = feed(debouncer, [100, 150, 152, 153, 300])
+    assert accepted == [True, False, False, False, True]
+    assert debouncer.switches[0].release_bounce_ns == 2 * MS
+
+
+def test_missed_edge_is_resynced():
+    debouncer = SwitchDebouncer(1, hold_ms=10, release_ms=8, auto_tune=False)
+    feed(debouncer, [100]) # The release edge is lost: tracked level stays closed
+    assert not debouncer.check(0, False, 200 * MS) # First disagreement only noted
+    assert debouncer.check(0, False, 220 * MS)
+    assert feed(debouncer, [300]) == [True]
+    assert debouncer.switches[0].resyncs == 1
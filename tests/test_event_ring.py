@@ -0,0 +1,99 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from event_ring import SwitchEventRing, DROP_OLDEST, DROP_NEWEST
+
+
+class PushOnRead(list):
+    """Slot list that runs a queued push right after one of its slots is read."""
+
+    def __init__(self, values):
+        super().__init__(values)
+        self.pending = []
+
+    def __getitem__(self, index):
+        value = list.__getitem__(self, index)
+        if self.pending:
+            self.pending.pop(0)()
+        return value
+
+
+def stamp(switch_index):
+    return 1000 + switch_index
+
+
+def fill(ring, switches):
+    for switch_index in switches:
+        ring.push(switch_index, stamp(switch_index))
+
+
+def drain_all(ring):
+    events = []
+    ring.drain(lambda switch_index, t_ns: events.append((switch_index, t_ns)))
+    return events
+
+
+def test_fifo_order():
+    ring = SwitchEventRing(4)
+    fill(ring, [1, 2, 3])
+    assert drain_all(ring) == [(1, stamp(1)), (2, stamp(2)), (3, stamp(3))]
+    assert len(ring) == 0
+
+
+def test_drop_oldest_keeps_newest():
+    ring = SwitchEventRing(4, overflow=DROP_OLDEST)
+    fill(ring, range(7))
+    assert drain_all(ring) == [(i, stamp(i)) for i in (3, 4, 5, 6)]
+    assert ring.dropped == 3
+
+
+def test_drop_newest_keeps_oldest():
+    ring = SwitchEventRing(4, overflow=DROP_NEWEST)
+    fill(ring, range(7))
+    assert drain_all(ring) == [(i, stamp(i)) for i in (0, 1, 2, 3)]
+    assert ring.dropped == 3
+
+
+def test_push_between_slot_reads_is_not_torn():
+    # Full ring; the producer overwrites the oldest slot after the consumer has read its
+    # switch index but before it reads the timestamp
+    ring = SwitchEventRing(4, overflow=DROP_OLDEST)
+    fill(ring, [0, 1, 2, 3])
+    ring._switch = PushOnRead(ring._switch)
+    ring._switch.pending.append(lambda: ring.push(9, stamp(9)))
+
+    events = drain_all(ring) + drain_all(ring)
+    assert all(t_ns == stamp(switch_index) for switch_index, t_ns in events)
+    assert [switch_index for switch_index, _ in events] == [1, 2, 3, 9]
+    assert ring.dropped == 1
+
+
+class DrainOnWrite(list):
+    """Slot list that runs a queued consumer drain just before one of its slots is written."""
+
+    def __init__(self, values):
+        super().__init__(values)
+        self.pending = []
+
+    def __setitem__(self, index, value):
+        if self.pending:
+            self.pending.pop(0)()
+        list.__setitem__(self, index, value)
+
+
+def test_drain_during_push_skips_half_written_slot():
+    # Full ring; the consumer runs while the producer has written the new switch index
+    # into the oldest slot but not yet its timestamp
+    ring = SwitchEventRing(4, overflow=DROP_OLDEST)
+    fill(ring, [0, 1, 2, 3])
+    events = []
+    ring._stamp = DrainOnWrite(ring._stamp)
+    ring._stamp.pending.append(lambda: events.extend(drain_all(ring)))
+    ring.push(9, stamp(9))
+
+    events += drain_all(ring)
+    assert all(t_ns == stamp(switch_index) for switch_index, t_ns in events)
+    assert [switch_index for switch_index, _ in events] == [1, 2, 3, 9]
+    assert ring.dropped == 1
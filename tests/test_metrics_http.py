@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from frame_profiler import Histogram
+from metrics_http import histogram, render
+
+
+def buckets(family):
+    return {labels['le']: value for suffix, labels, value in family.samples if suffix == '_bucket'}
+
+
+def test_slow_frame_lands_in_its_bucket():
+    hist = Histogram(bucket_us=50, buckets=5001) # Up to 250 ms
+    hist.add(120000000) # 120 ms
+    family = histogram('frame_seconds', "Frame time", hist, (0.05, 0.1, 0.25))
+    assert buckets(family) == {'0.05': 0, '0.1': 0, '0.25': 1, '+Inf': 1}
+
+
+def test_bounds_past_the_range_are_left_out():
+    hist = Histogram(bucket_us=50, buckets=1000) # Up to ~50 ms, then overflow
+    hist.add(120000000)
+    family = histogram('frame_seconds', "Frame time", hist, (0.01, 0.25))
+    assert buckets(family) == {'0.01': 0, '+Inf': 1}
+
+
+def test_render_text_format():
+    hist = Histogram(bucket_us=50, buckets=5001)
+    hist.add(2000000)
+    text = render([histogram('frame_seconds', "Frame time", hist, (0.001, 0.004))])
+    assert '# TYPE frame_seconds histogram' in text
+    assert 'frame_seconds_bucket{le="0.001"} 0' in text
+    assert 'frame_seconds_bucket{le="0.004"} 1' in text
+    assert 'frame_seconds_count 1' in text
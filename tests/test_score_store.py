@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from score_store import ScoreStore
+
+
+def test_abandoned_games_stay_out_of_high_scores(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    store = ScoreStore(path)
+    store.record_session(1, 1000.0, 60.0, 500, 10, completed=True)
+    store.record_session(1, 2000.0, 30.0, 900, 12, completed=False)
+    assert [value for value, _ in store.top_scores(1)] == [500]
+    store.close()
+    assert store.written == store.enqueued and store.backlog == 0
+
+    reopened = ScoreStore(path)
+    reopened.loaded.wait(2.0)
+    assert [value for value, _ in reopened.top_scores(1)] == [500]
+    reopened.close()
+
+
+def test_queue_is_bounded_without_a_database(tmp_path):
+    store = ScoreStore(str(tmp_path / 'missing' / 'scores.db'), capacity=4)
+    store.loaded.wait(2.0)
+    for i in range(10):
+        store.record_session(1, float(i), 1.0, i, 1)
+    assert store.enqueued == 4
+    assert store.dropped_full == 6
+    store.close()
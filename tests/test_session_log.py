@@ -0,0 +1,22 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_log import FRAME, KEY, STATE, SWITCH, SessionRecorder, read_session
+
+
+def test_recorded_session_reads_back(tmp_path):
+    path = str(tmp_path / 'session.pbrec')
+    recorder = SessionRecorder(path, flush_interval_s=0.01)
+    for i in range(1000):
+        recorder.frame(1 / 60)
+        recorder.switch(i % 5)
+    recorder.key(32)
+    recorder.state(100, 0)
+    recorder.close()
+
+    records = read_session(path)
+    assert recorder.written == recorder.records == len(records) == 2003
+    assert [kind for kind, _, _, _ in records[:2]] == [FRAME, SWITCH]
+    assert [(kind, value) for kind, _, value, _ in records[-3:]] == [(KEY, 32), (STATE, 100), (STATE, 0)]
@@ -0,0 +1,70 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tm1637_wave import TM1637Encoder, TM1637Transmitter
+
+CLK = 33
+DIO = 35
+
+
+class Bus:
+    """Two-wire bus model: records every (clk, dio) line state. A released DIO is pulled low (ACK)."""
+
+    OUT, IN, PUD_UP, LOW, HIGH = 0, 1, 22, 0, 1
+
+    def __init__(self):
+        self.driven = {CLK: 1, DIO: 1}
+        self.dio_input = False
+        self.states = [self.lines()]
+
+    def lines(self):
+        return (self.driven[CLK], 0 if self.dio_input else self.driven[DIO])
+
+    def _changed(self):
+        state = self.lines()
+        if state != self.states[-1]:
+            self.states.append(state)
+
+    def output(self, channels, values):
+        if isinstance(channels, int):
+            channels, values = (channels,), (values,)
+        for channel, value in zip(channels, values):
+            self.driven[channel] = value
+            self._changed()
+
+    def setup(self, channel, direction, pull_up_down=None, initial=None):
+        assert channel == DIO
+        self.dio_input = direction == self.IN
+        if initial is not None:
+            self.driven[DIO] = initial
+        self._changed()
+
+    def input(self, channel):
+        return self.lines()[1]
+
+
+def stop_conditions(states):
+    """Indexes of the state changes where DIO rises while CLK stays high."""
+    return [i for i in range(1, len(states))
+            if states[i - 1] == (1, 0) and states[i] == (1, 1)]
+
+
+def send(payload, ack_check):
+    bus = Bus()
+    encoder = TM1637Encoder(CLK, DIO, ack_check=ack_check)
+    ok = TM1637Transmitter(bus, encoder).send(payload)
+    return bus.states, ok
+
+
+def test_ack_check_only_stops_at_the_end():
+    states, ok = send((0xC0, 0x3F, 0x06, 0x5B, 0x4F), ack_check=True)
+    assert ok
+    assert stop_conditions(states) == [len(states) - 1]
+
+
+def test_no_ack_check_only_stops_at_the_end():
+    states, ok = send((0xC0, 0x3F, 0x06, 0x5B, 0x4F), ack_check=False)
+    assert ok
+    assert stop_conditions(states) == [len(states) - 1]
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TM1637 波形編譯與傳送
+Compiles TM1637 transactions (start, bytes, ACK slots, stop) into pin transition
+lists once, caches them by payload, and replays them with as few GPIO calls as possible.
+"""
+
+import time
+
+from bus_timing import delay_ns
+
+# Markers used in ACK-checking waveforms (never valid GPIO channel numbers)
+DIO_INPUT = -1 # Release DIO (switch to input with pull-up)
+ACK_SAMPLE = -2 # Read DIO (ACK is low), while CLK is high
+DIO_OUTPUT = -3 # Take DIO back as an output, driven high (only once CLK is low again)
+
+
+class Waveform:
+    """A compiled transaction: a tuple of (channel(s), value(s)) steps."""
+
+    __slots__ = ('payload', 'steps', 'transitions')
+
+    def __init__(self, payload, steps, transitions):
+        self.payload = payload
+        self.steps = steps
+        self.transitions = transitions # Pin level changes driven by this waveform
+
+
+class TM1637Encoder:
+    """
+    Turns a payload (bytes sent between one start and one stop condition) into a Waveform.
+
+    Each step is one GPIO.output() call. Consecutive writes that do not need a clock
+    phase between them are merged into a single list write (RPi.GPIO writes list
+    channels in order, so the sequence on the wire is unchanged), and writes that
+    would not change a pin's level are dropped. Both pins are idle-high between
+    transactions.
+
+    With ack_check off, DIO is never turned around: during the ACK clock the master
+    drives DIO low, which is the level the TM1637 pulls it to, so there is no contention.
+    """
+
+    def __init__(self, clk_pin, dio_pin, ack_check=False, high=1, low=0):
+        self.clk_pin = clk_pin
+        self.dio_pin = dio_pin
+        self.ack_check = ack_check
+        self.high = high
+        self.low = low
+        self._cache = {}
+
+    def get(self, payload):
+        """Returns the cached Waveform for payload, compiling it on first use."""
+        waveform = self._cache.get(payload)
+        if waveform is None:
+            waveform = self._cache[payload] = self.compile(payload)
+        return waveform
+
+    def cache_size(self):
+        return len(self._cache)
+
+    def compile(self, payload):
+        """Compiles payload (bytes or a tuple of ints) into a Waveform."""
+        clk, dio, high, low = self.clk_pin, self.dio_pin, self.high, self.low
+        levels = {clk: high, dio: high} # Idle state: both lines high
+        steps = []
+        phase = [] # Writes waiting to be emitted as one step
+
+        def write(pin, level):
+            if levels[pin] != level:
+                levels[pin] = level
+                phase.append((pin, level))
+
+        def end_phase():
+            if phase:
+                if len(phase) == 1:
+                    steps.append(phase[0])
+                else:
+                    steps.append((tuple(p for p, _ in phase), tuple(v for _, v in phase)))
+                phase.clear()
+
+        # Start condition: DIO falls while CLK is high
+        write(dio, low)
+        end_phase()
+
+        for byte in payload:
+            # 8 data bits, LSB first: change DIO while CLK is low, latch on the rising edge
+            for bit in range(8):
+                write(clk, low)
+                write(dio, high if (byte >> bit) & 0x01 else low)
+                end_phase()
+                write(clk, high)
+                end_phase()
+
+            # ACK slot (9th clock)
+            write(clk, low)
+            if self.ack_check:
+                end_phase()
+                steps.append((DIO_INPUT, None))
+                levels[dio] = None # Driven by the TM1637 now
+                write(clk, high)
+                end_phase()
+                steps.append((ACK_SAMPLE, None))
+                # Release the ACK clock before driving DIO again: DIO rising while CLK
+                # is high would be a stop condition
+                write(clk, low)
+                end_phase()
+                steps.append((DIO_OUTPUT, None))
+                levels[dio] = high
+            else:
+                write(dio, low)
+                end_phase()
+                write(clk, high)
+                end_phase()
+
+        # Stop condition: DIO rises while CLK is high
+        write(clk, low)
+        write(dio, low)
+        end_phase()
+        write(clk, high)
+        end_phase()
+        write(dio, high)
+        end_phase()
+
+        transitions = 0
+        for channels, _ in steps:
+            if isinstance(channels, tuple):
+                transitions += len(channels)
+            elif channels >= 0:
+                transitions += 1
+        return Waveform(bytes(payload), tuple(steps), transitions)
+
+
+class TM1637Transmitter:
+    """Replays compiled waveforms on the GPIO pins and keeps transfer statistics."""
+
+    def __init__(self, gpio, encoder, half_period_ns=0):
+        self.gpio = gpio
+        self.encoder = encoder
+        # Delay after every step (half a clock period); 0 runs the bus as fast as GPIO allows
+        self.half_period_ns = half_period_ns
+        # Statistics
+        self.transactions = 0
+        self.transitions = 0
+        self.busy_ns = 0
+        self.ack_failures = 0
+
+    def send(self, payload):
+        """Sends one transaction. Returns False if ACK checking is on and an ACK was missed."""
+        waveform = self.encoder.get(payload)
+        t0 = time.perf_counter_ns()
+        ok = self._replay_ack(waveform.steps) if self.encoder.ack_check else self._replay(waveform.steps)
+        self.busy_ns += time.perf_counter_ns() - t0
+        self.transactions += 1
+        self.transitions += waveform.transitions
+        if not ok:
+            self.ack_failures += 1
+        return ok
+
+    def _replay(self, steps):
+        output = self.gpio.output
+        half_period_ns = self.half_period_ns
+        if not half_period_ns:
+            for channels, values in steps:
+                output(channels, values)
+        else:
+            for channels, values in steps:
+                output(channels, values)
+                delay_ns(half_period_ns)
+        return True
+
+    def _replay_ack(self, steps):
+        gpio = self.gpio
+        output = gpio.output
+        dio = self.encoder.dio_pin
+        half_period_ns = self.half_period_ns
+        ok = True
+        for channels, values in steps:
+            if channels == DIO_INPUT:
+                gpio.setup(dio, gpio.IN, pull_up_down=gpio.PUD_UP)
+            elif channels == ACK_SAMPLE:
+                ok = gpio.input(dio) == gpio.LOW and ok
+            elif channels == DIO_OUTPUT:
+                gpio.setup(dio, gpio.OUT, initial=gpio.HIGH)
+            else:
+                output(channels, values)
+            if half_period_ns:
+                delay_ns(half_period_ns)
+        return ok
+
+    def stats(self):
+        """Returns the transfer counters as a dict."""
+        return {
+            'transactions': self.transactions,
+            'transitions': self.transitions,
+            'busy_us': self.busy_ns / 1000.0,
+            'ack_failures': self.ack_failures,
+        }